@@ -0,0 +1,39 @@
+"""Store classification values and validation rules as JSONB with GIN indexes
+
+Revision ID: 1d5e8a3b7c40
+Revises: 7f4a2c9e6b31
+Create Date: 2025-03-25 15:48:29.107352
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '1d5e8a3b7c40'
+down_revision = '7f4a2c9e6b31'
+branch_labels = None
+depends_on = None
+
+# (table, column, index)
+COLUMNS = [
+    ('classificationresult', 'value', 'ix_classificationresult_value'),
+    ('classificationscheme', 'validation_rules', 'ix_classificationscheme_validation_rules'),
+]
+
+
+def upgrade():
+    inspector = sa.inspect(op.get_bind())
+    for table, column, index in COLUMNS:
+        current = {c['name']: c['type'] for c in inspector.get_columns(table)}[column]
+        # The type change rewrites the table under an exclusive lock.
+        if not isinstance(current, postgresql.JSONB):
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE jsonb USING {column}::jsonb")
+        op.execute(f"CREATE INDEX IF NOT EXISTS {index} ON {table} USING gin ({column} jsonb_path_ops)")
+
+
+def downgrade():
+    for table, column, index in COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS {index}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE json USING {column}::json")
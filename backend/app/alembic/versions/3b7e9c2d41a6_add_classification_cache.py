@@ -0,0 +1,37 @@
+"""Add classification cache
+
+Revision ID: 3b7e9c2d41a6
+Revises: f14ba1ae33ed
+Create Date: 2025-03-10 10:12:41.118203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '3b7e9c2d41a6'
+down_revision = 'f14ba1ae33ed'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if sa.inspect(op.get_bind()).has_table('classificationcacheentry'):
+        return
+    op.create_table(
+        'classificationcacheentry',
+        sa.Column('key', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+        sa.Column('value', sa.JSON(), nullable=True),
+        sa.Column('provider', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('model', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index(op.f('ix_classificationcacheentry_created_at'), 'classificationcacheentry', ['created_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_classificationcacheentry_created_at'), table_name='classificationcacheentry')
+    op.drop_table('classificationcacheentry')
@@ -0,0 +1,57 @@
+"""Cascade deletes from workspaces, documents and schemes
+
+Revision ID: 5c1e7f3a9b24
+Revises: 8d2f4a6c1e90
+Create Date: 2025-03-14 16:20:37.881409
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7f3a9b24'
+down_revision = '8d2f4a6c1e90'
+branch_labels = None
+depends_on = None
+
+# (table, column, referred table, referred column, index the column)
+FOREIGN_KEYS = [
+    ('file', 'document_id', 'document', 'id', True),
+    ('classificationresult', 'document_id', 'document', 'id', True),
+    ('classificationresult', 'scheme_id', 'classificationscheme', 'id', True),
+    ('classificationfield', 'scheme_id', 'classificationscheme', 'id', True),
+    ('classificationscheme', 'workspace_id', 'workspace', 'uid', True),
+    ('savedresultset', 'workspace_id', 'workspace', 'uid', True),
+    # Covered by ix_document_workspace_insertion_id
+    ('document', 'workspace_id', 'workspace', 'uid', False),
+]
+
+
+def _replace_foreign_keys(ondelete):
+    inspector = sa.inspect(op.get_bind())
+    for table, column, referred_table, referred_column, _ in FOREIGN_KEYS:
+        for fk in inspector.get_foreign_keys(table):
+            if fk['constrained_columns'] == [column] and fk['referred_table'] == referred_table:
+                if (fk.get('options') or {}).get('ondelete') == ondelete:
+                    continue
+                op.drop_constraint(fk['name'], table, type_='foreignkey')
+                op.create_foreign_key(
+                    fk['name'], table, referred_table, [column], [referred_column], ondelete=ondelete
+                )
+
+
+def upgrade():
+    _replace_foreign_keys('CASCADE')
+    # Every cascaded row is looked up by its foreign key
+    for table, column, _, _, indexed in FOREIGN_KEYS:
+        if indexed:
+            op.execute(f'CREATE INDEX IF NOT EXISTS ix_{table}_{column} ON {table} ({column})')
+
+
+def downgrade():
+    for table, column, _, _, indexed in FOREIGN_KEYS:
+        if indexed:
+            op.execute(f'DROP INDEX IF EXISTS ix_{table}_{column}')
+    _replace_foreign_keys(None)
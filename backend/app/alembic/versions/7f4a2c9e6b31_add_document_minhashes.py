@@ -0,0 +1,36 @@
+"""Add MinHash signatures for near-duplicate detection
+
+Revision ID: 7f4a2c9e6b31
+Revises: e62b9f4c7d15
+Create Date: 2025-03-24 10:17:03.640211
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '7f4a2c9e6b31'
+down_revision = 'e62b9f4c7d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not sa.inspect(op.get_bind()).has_table('documentminhash'):
+        op.create_table(
+            'documentminhash',
+            sa.Column('document_id', sa.Integer(), sa.ForeignKey('document.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('workspace_id', sa.Integer(), sa.ForeignKey('workspace.uid', ondelete='CASCADE'), nullable=False),
+            sa.Column('text_hash', sqlmodel.sql.sqltypes.AutoString(length=64), nullable=False),
+            sa.Column('signature', sa.ARRAY(sa.BigInteger()), nullable=False),
+            sa.Column('bands', sa.ARRAY(sa.BigInteger()), nullable=False),
+            sa.PrimaryKeyConstraint('document_id')
+        )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documentminhash_workspace_id ON documentminhash (workspace_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documentminhash_bands ON documentminhash USING gin (bands)")
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS documentminhash")
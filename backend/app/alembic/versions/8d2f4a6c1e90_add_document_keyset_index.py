@@ -0,0 +1,31 @@
+"""Add document keyset pagination index
+
+Revision ID: 8d2f4a6c1e90
+Revises: 3b7e9c2d41a6
+Create Date: 2025-03-12 09:41:05.502117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f4a6c1e90'
+down_revision = '3b7e9c2d41a6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Built concurrently so large document tables stay writable
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_document_workspace_insertion_id "
+            "ON document (workspace_id, insertion_date, id)"
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_document_workspace_insertion_id")
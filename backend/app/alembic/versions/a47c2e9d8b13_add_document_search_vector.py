@@ -0,0 +1,39 @@
+"""Add full-text search vector to documents
+
+Revision ID: a47c2e9d8b13
+Revises: 5c1e7f3a9b24
+Create Date: 2025-03-18 11:05:52.214730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'a47c2e9d8b13'
+down_revision = '5c1e7f3a9b24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Must match SEARCH_CONFIG and the weights used by the document search endpoint.
+    # text_content is capped because a tsvector can't exceed 1 MB.
+    # Adding a stored generated column rewrites the table once.
+    op.execute("""
+        ALTER TABLE document ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(summary, '')), 'B') ||
+            setweight(to_tsvector('english', left(coalesce(text_content, ''), 500000)), 'C')
+        ) STORED
+    """)
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_document_search_vector ON document USING GIN (search_vector)"
+    )
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_document_search_vector")
+    op.execute("ALTER TABLE document DROP COLUMN IF EXISTS search_vector")
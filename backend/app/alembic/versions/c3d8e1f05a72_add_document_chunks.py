@@ -0,0 +1,62 @@
+"""Add document chunks with embeddings for semantic search
+
+Revision ID: c3d8e1f05a72
+Revises: a47c2e9d8b13
+Create Date: 2025-03-20 09:41:17.502936
+
+"""
+import logging
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+from app.core.config import settings
+
+logger = logging.getLogger("alembic.runtime.migration")
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3d8e1f05a72'
+down_revision = 'a47c2e9d8b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Semantic search needs pgvector >= 0.5 (HNSW). Without it, or without the privilege to
+    # create it, the table is left out and semantic search stays disabled. After running
+    # CREATE EXTENSION vector later, init_db creates the table on the next start.
+    bind = op.get_bind()
+    if bind.execute(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'vector'")).first():
+        try:
+            with bind.begin_nested():
+                bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS vector"))
+        except sa.exc.DBAPIError as e:
+            logger.warning(f"Could not create the vector extension: {e.orig}")
+    if not bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'vector'")).first():
+        logger.warning("pgvector is not installed, semantic document search is disabled")
+        return
+
+    if not sa.inspect(op.get_bind()).has_table('documentchunk'):
+        op.execute(f"""
+            CREATE TABLE documentchunk (
+                id SERIAL PRIMARY KEY,
+                document_id INTEGER NOT NULL REFERENCES document (id) ON DELETE CASCADE,
+                workspace_id INTEGER NOT NULL REFERENCES workspace (uid) ON DELETE CASCADE,
+                chunk_index INTEGER NOT NULL,
+                text TEXT NOT NULL,
+                content_hash VARCHAR(64) NOT NULL,
+                embedding vector({settings.EMBEDDING_DIMENSIONS}) NOT NULL
+            )
+        """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documentchunk_document_id ON documentchunk (document_id)")
+    op.execute("CREATE INDEX IF NOT EXISTS ix_documentchunk_workspace_id ON documentchunk (workspace_id)")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_documentchunk_embedding "
+        "ON documentchunk USING hnsw (embedding vector_cosine_ops)"
+    )
+
+
+def downgrade():
+    op.execute("DROP TABLE IF EXISTS documentchunk")
@@ -0,0 +1,36 @@
+"""Add content hashes for deduplication and content-addressed files
+
+Revision ID: e62b9f4c7d15
+Revises: c3d8e1f05a72
+Create Date: 2025-03-21 14:02:45.318774
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'e62b9f4c7d15'
+down_revision = 'c3d8e1f05a72'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing rows keep NULL hashes: they aren't deduplicated against and
+    # their files stay at {document_id}/{name}
+    op.execute("ALTER TABLE document ADD COLUMN IF NOT EXISTS content_hash VARCHAR(64)")
+    op.execute("ALTER TABLE file ADD COLUMN IF NOT EXISTS sha256 VARCHAR(64)")
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_document_workspace_content_hash "
+        "ON document (workspace_id, content_hash) WHERE content_hash IS NOT NULL"
+    )
+    op.execute("CREATE INDEX IF NOT EXISTS ix_file_sha256 ON file (sha256)")
+
+
+def downgrade():
+    op.execute("DROP INDEX IF EXISTS ix_file_sha256")
+    op.execute("DROP INDEX IF EXISTS uq_document_workspace_content_hash")
+    op.execute("ALTER TABLE file DROP COLUMN IF EXISTS sha256")
+    op.execute("ALTER TABLE document DROP COLUMN IF EXISTS content_hash")
@@ -1,8 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlmodel import Session, select
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Header, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import List, Optional, Union, Dict, Any
 from datetime import datetime, timezone
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import selectinload
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, model_validator, Field
 
 from app.models import (
@@ -14,23 +17,84 @@ from app.models import (
     DocumentRead,
     ClassificationScheme,
     ClassificationSchemeRead,
-    Workspace,
     ClassificationField,
-    FieldType
+    FieldType,
+    ClassificationRunCreate,
+    ClassificationRunStatus,
+    SavedResultSet,
+    LabelCount,
+    LabelFrequencyOut,
+    HistogramBin,
+    NumericSummaryOut,
+    TimeSeriesPoint,
+    TimeSeriesOut,
+    CrossTabCell,
+    CrossTabOut,
+    compute_display_value,
+    scheme_display_rules
+)
+from app.api.deps import AsyncSessionDep, WorkspaceDep
+from app.core.near_duplicates import near_duplicate_clusters
+from app.core.queries import DocumentView, document_view_options, omit_deferred_text
+from app.core.result_filters import compile_filters
+from app.core.result_aggregates import (
+    PERCENTILES,
+    TimeInterval,
+    bucket_histogram_statement,
+    crosstab_statement,
+    field_count_statement,
+    histogram_bounds,
+    label_frequency_statement,
+    numeric_summary_statement,
+    result_criteria,
+    time_series_statement
+)
+from app.core.result_export import (
+    MEDIA_TYPES,
+    ExportFormat,
+    export_statement,
+    field_columns,
+    stream_export
+)
+from app.api.v2.classification import (
+    classify_text,
+    classification_runs,
+    resolve_provider,
+    run_classification_batch
 )
-from app.api.deps import SessionDep, CurrentUser
-from app.api.v2.classification import classify_text 
 
 router = APIRouter(
     prefix="/workspaces/{workspace_id}/classification_results",
     tags=["ClassificationResults"]
 )
 
+def result_read_options(view: DocumentView = "full") -> tuple:
+    """Everything ClassificationResultRead serializes; async sessions can't lazy-load."""
+    return (
+        selectinload(ClassificationResult.document).options(
+            selectinload(Document.files), *document_view_options(view)
+        ),
+        selectinload(ClassificationResult.scheme).selectinload(ClassificationScheme.fields),
+    )
+
+
+RESULT_READ_OPTIONS = result_read_options()
+
+
+async def load_result_read(session: AsyncSession, result_id: int) -> ClassificationResultRead:
+    result = (await session.exec(
+        select(ClassificationResult)
+        .options(*RESULT_READ_OPTIONS)
+        .where(ClassificationResult.id == result_id)
+        .execution_options(populate_existing=True)
+    )).one()
+    return ClassificationResultRead.model_validate(result)
+
 @router.post("", response_model=ClassificationResultRead)
-def create_classification_result(
+async def create_classification_result(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     result_in: ClassificationResultCreate
 ) -> ClassificationResultRead:
@@ -38,13 +102,8 @@ def create_classification_result(
     Create (store) an individual classification result.
     Verifies that the workspace exists and that the referenced document and scheme belong to that workspace.
     """
-    # Check workspace permission
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
     # Retrieve and validate document
-    document = session.get(Document, result_in.document_id)
+    document = await session.get(Document, result_in.document_id)
     if not document or document.workspace_id != workspace_id:
         raise HTTPException(status_code=404, detail="Document not found in this workspace")
     
@@ -52,9 +111,9 @@ def create_classification_result(
     scheme_stmt = select(ClassificationScheme).where(
         ClassificationScheme.id == result_in.scheme_id
     ).options(
-        joinedload(ClassificationScheme.fields)
+        selectinload(ClassificationScheme.fields)
     )
-    scheme = session.exec(scheme_stmt).first()
+    scheme = (await session.exec(scheme_stmt)).first()
     
     if not scheme or scheme.workspace_id != workspace_id:
         raise HTTPException(status_code=404, detail="Classification scheme not found in this workspace")
@@ -69,7 +128,7 @@ def create_classification_result(
         fields_statement = select(ClassificationField).where(
             ClassificationField.scheme_id == result_in.scheme_id
         )
-        field_rows = session.exec(fields_statement).all()
+        field_rows = (await session.exec(fields_statement)).all()
         
         # Since we can't modify the scheme object directly (it's a SQLAlchemy Row),
         # we'll create a new ClassificationScheme instance with the same data
@@ -84,7 +143,7 @@ def create_classification_result(
             scheme_data["model_instructions"] = getattr(scheme, 'model_instructions', None)
             scheme_data["validation_rules"] = getattr(scheme, 'validation_rules', None)
             scheme_data["workspace_id"] = getattr(scheme, 'workspace_id', workspace_id)  # Use the provided workspace_id
-            scheme_data["user_id"] = getattr(scheme, 'user_id', current_user.id)  # Use the current user's ID
+            scheme_data["user_id"] = getattr(scheme, 'user_id', access.user_id)  # Use the current user's ID
             scheme_data["created_at"] = getattr(scheme, 'created_at', datetime.now(timezone.utc))
             scheme_data["updated_at"] = getattr(scheme, 'updated_at', datetime.now(timezone.utc))
         except Exception as attr_error:
@@ -95,7 +154,7 @@ def create_classification_result(
                 "name": f"Scheme {result_in.scheme_id}",
                 "description": f"Description for scheme {result_in.scheme_id}",
                 "workspace_id": workspace_id,
-                "user_id": current_user.id,
+                "user_id": access.user_id,
                 "created_at": datetime.now(timezone.utc),
                 "updated_at": datetime.now(timezone.utc)
             }
@@ -129,24 +188,24 @@ def create_classification_result(
     # Check for existing result with same run_id
     if result_in.run_id:
         try:
-            existing_result = session.exec(
+            existing_result = (await session.exec(
                 select(ClassificationResult)
                 .where(
                     ClassificationResult.document_id == result_in.document_id,
                     ClassificationResult.scheme_id == result_in.scheme_id,
                     ClassificationResult.run_id == result_in.run_id
                 )
-            ).first()
+            )).first()
             
             if existing_result:
-                return ClassificationResultRead.model_validate(existing_result)
+                return await load_result_read(session, existing_result.id)
         except Exception as e:
             print(f"Error checking for existing result: {e}")
             # Continue with classification even if checking for existing result fails
     
     try:
-        # Get classification result
-        classification_output = classify_text(document.text_content, scheme.id)
+        # Get classification result, off the event loop since the LLM call blocks
+        classification_output = await run_in_threadpool(classify_text, document.text_content, scheme.id)
         
         # Create the classification result storing the raw output
         classification_result = ClassificationResult(
@@ -160,22 +219,73 @@ def create_classification_result(
         )
         
         session.add(classification_result)
-        session.commit()
-        session.refresh(classification_result)
+        await session.commit()
         
-        return ClassificationResultRead.model_validate(classification_result)
+        return await load_result_read(session, classification_result.id)
     except Exception as e:
         print(f"Error in create_classification_result: {e}")
         import traceback
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
 
+@router.get("/export")
+async def export_classification_results(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    format: ExportFormat = "parquet",
+    run_id: Optional[int] = None,
+    scheme_ids: List[int] = Query(None),
+    result_set_id: Optional[int] = None
+) -> StreamingResponse:
+    """
+    Stream results as Arrow IPC or Parquet, one row per result with each scheme field in a typed column:
+    int fields as int64, str as string, List[str] as list<string> and List[Dict] as JSON text.
+    Select a run, schemes or a saved result set (combinable); schemes default to those of the
+    result set, or to every scheme of the workspace for a run.
+    Rows are read from a server-side cursor and written in record batches, so large runs don't
+    have to fit in memory.
+    """
+    if run_id is None and not scheme_ids and result_set_id is None:
+        raise HTTPException(status_code=400, detail="Select a run_id, scheme_ids or a result_set_id to export")
+
+    requested_scheme_ids = set(scheme_ids or [])
+    document_ids = None
+    if result_set_id is not None:
+        result_set = await session.get(SavedResultSet, result_set_id)
+        if not result_set or result_set.workspace_id != workspace_id:
+            raise HTTPException(status_code=404, detail="Result set not found")
+        document_ids = result_set.document_ids or []
+        scheme_ids = [scheme_id for scheme_id in result_set.scheme_ids or [] if not scheme_ids or scheme_id in scheme_ids]
+
+    scheme_stmt = (
+        select(ClassificationScheme)
+        .where(ClassificationScheme.workspace_id == workspace_id)
+        .options(selectinload(ClassificationScheme.fields))
+        .order_by(ClassificationScheme.id)
+    )
+    if scheme_ids is not None:
+        scheme_stmt = scheme_stmt.where(ClassificationScheme.id.in_(scheme_ids))
+    schemes = (await session.exec(scheme_stmt)).all()
+    if requested_scheme_ids - {scheme.id for scheme in schemes} and result_set_id is None:
+        raise HTTPException(status_code=404, detail="Classification scheme not found in this workspace")
+
+    statement = export_statement(workspace_id, [scheme.id for scheme in schemes], run_id, document_ids)
+    name = f"run-{run_id}" if run_id is not None else f"result-set-{result_set_id}" if result_set_id is not None else "results"
+    return StreamingResponse(
+        stream_export(statement, field_columns(schemes), format),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="workspace-{workspace_id}-{name}.{format}"'}
+    )
+
+
 
 @router.get("/{result_id}", response_model=ClassificationResultRead)
-def get_classification_result(
+async def get_classification_result(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     result_id: int
 ) -> ClassificationResultRead:
@@ -183,20 +293,11 @@ def get_classification_result(
     Load (retrieve) an individual classification result by its ID.
     Verifies that this result's document and scheme belong to the workspace.
     """
-    # Check that the workspace exists and belongs to the current user
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    # Updated query with joinedload
-    result = session.exec(
+    result = (await session.exec(
         select(ClassificationResult)
-        .options(
-            joinedload(ClassificationResult.document),
-            joinedload(ClassificationResult.scheme)
-        )
+        .options(*RESULT_READ_OPTIONS)
         .where(ClassificationResult.id == result_id)
-    ).first()
+    )).first()
 
     if not result or not result.document or not result.scheme:
         raise HTTPException(status_code=404, detail="Result not found")
@@ -216,24 +317,27 @@ def get_classification_result(
 
 @router.get("", response_model=List[EnhancedClassificationResultRead])
 @router.get("/", response_model=List[EnhancedClassificationResultRead])
-def list_classification_results(
+async def list_classification_results(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     document_ids: List[int] = Query(None),
     scheme_ids: List[int] = Query(None),
     run_name: Optional[str] = Query(None),
+    filters: List[str] = Query(None, alias="filter"),
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    view: DocumentView = "full"
 ) -> List[EnhancedClassificationResultRead]:
     """
     List all classification results for the given workspace.
+    `view=summary` leaves the documents' text_content out.
+
+    `filter` conditions on the result value are evaluated in the database and may be repeated,
+    all of them have to match. The form is `field:op:value` with op one of eq, ne, contains,
+    gt, gte, lt, lte, or `field:exists`, e.g. `filter=categories:contains:Healthcare&filter=score:gte:7`.
     """
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
     base_stmt = select(ClassificationResult).where(
         ClassificationResult.document_id.in_(
             select(Document.id).where(Document.workspace_id == workspace_id)
@@ -246,29 +350,40 @@ def list_classification_results(
         base_stmt = base_stmt.where(ClassificationResult.scheme_id.in_(scheme_ids))
     if run_name:
         base_stmt = base_stmt.where(ClassificationResult.run_name == run_name)
+    if filters:
+        base_stmt = base_stmt.where(*compile_filters(ClassificationResult.value, filters))
 
-    statement = base_stmt.offset(skip).limit(limit)
-    results = session.exec(statement).all()
+    statement = base_stmt.options(*result_read_options(view)).offset(skip).limit(limit)
+    results = (await session.exec(statement)).all()
+    omit_deferred_text(result.document for result in results)
     
+    # Schemes repeat across rows: serialize each and derive its display rules once per request
+    scheme_map: Dict[int, tuple] = {}
     enhanced_results = []
     for result in results:
+        if result.scheme_id not in scheme_map:
+            scheme_map[result.scheme_id] = (
+                ClassificationSchemeRead.model_validate(result.scheme),
+                scheme_display_rules(result.scheme),
+            )
+        scheme_read, display_rules = scheme_map[result.scheme_id]
+
+        # Ensure value is always a dict
+        value = result.value if isinstance(result.value, dict) else {'value': result.value}
+
         result_data = {
             'id': result.id,
             'document_id': result.document_id,
             'scheme_id': result.scheme_id,
-            'value': result.value,
+            'value': value,
             'timestamp': result.timestamp,
             'run_name': result.run_name,
             'run_description': result.run_description,
             'document': result.document,
-            'scheme': result.scheme,
-            'run_id': result.run_id
+            'scheme': scheme_read,
+            'run_id': result.run_id,
+            'display_value': compute_display_value(value, display_rules)
         }
-        
-        # Ensure value is always a dict
-        if not isinstance(result_data['value'], dict):
-            result_data['value'] = {'value': result_data['value']}
-        
         enhanced_results.append(
             EnhancedClassificationResultRead.model_validate(result_data)
         )
@@ -276,32 +391,293 @@ def list_classification_results(
     return enhanced_results
 
 @router.get("/by_run/{run_id}", response_model=List[ClassificationResultRead])
-def get_results_by_run(
+async def get_results_by_run(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
-    run_id: int
+    run_id: int,
+    view: DocumentView = "full"
 ) -> List[ClassificationResultRead]:
     """
     Retrieve all classification results for a specific run ID.
+    `view=summary` leaves the documents' text_content out.
     """
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
-    results = session.exec(
+    results = (await session.exec(
         select(ClassificationResult)
-        .options(
-            joinedload(ClassificationResult.document),
-            joinedload(ClassificationResult.scheme)
-        )
+        .options(*result_read_options(view))
         .where(
             ClassificationResult.run_id == run_id,
             ClassificationResult.document_id.in_(
                 select(Document.id).where(Document.workspace_id == workspace_id)
             )
         )
-    ).all()
+    )).all()
+    omit_deferred_text(result.document for result in results)
     
     return [ClassificationResultRead.model_validate(result) for result in results]
+
+
+@router.post("/runs", response_model=ClassificationRunStatus, status_code=202)
+async def create_classification_run(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    run_in: ClassificationRunCreate,
+    background_tasks: BackgroundTasks,
+    x_api_key: str | None = Header(None, alias="X-API-Key"),
+    provider: str | None = Query("Google"),
+    model: str | None = Query("gemini-2.0-flash-exp")
+) -> ClassificationRunStatus:
+    """
+    Start a classification run over a set of documents in the background.
+    Documents are taken from `document_ids`, from a saved result set, or default
+    to every document in the workspace. Poll `/runs/{run_id}` for progress.
+    With `representatives_only`, near-duplicate documents are classified once per
+    cluster and the representative's results are copied to the others.
+    """
+    if not run_in.scheme_ids:
+        raise HTTPException(status_code=400, detail="At least one scheme is required")
+
+    scheme_ids = set((await session.exec(
+        select(ClassificationScheme.id).where(
+            ClassificationScheme.id.in_(run_in.scheme_ids),
+            ClassificationScheme.workspace_id == workspace_id
+        )
+    )).all())
+    if scheme_ids != set(run_in.scheme_ids):
+        raise HTTPException(status_code=404, detail="Classification scheme not found in this workspace")
+
+    document_stmt = select(Document.id).where(Document.workspace_id == workspace_id)
+    if run_in.saved_result_set_id is not None:
+        result_set = await session.get(SavedResultSet, run_in.saved_result_set_id)
+        if not result_set or result_set.workspace_id != workspace_id:
+            raise HTTPException(status_code=404, detail="Result set not found")
+        document_stmt = document_stmt.where(Document.id.in_(result_set.document_ids or []))
+    if run_in.document_ids is not None:
+        document_stmt = document_stmt.where(Document.id.in_(run_in.document_ids))
+    document_ids = (await session.exec(document_stmt.order_by(Document.id))).all()
+
+    siblings = {}
+    if run_in.representatives_only:
+        clusters = await near_duplicate_clusters(session, workspace_id, document_ids=list(document_ids))
+        siblings = {members[0]: members[1:] for members in clusters}
+        copied_ids = {document_id for members in clusters for document_id in members[1:]}
+        document_ids = [document_id for document_id in document_ids if document_id not in copied_ids]
+
+    key = (workspace_id, run_in.run_id)
+    existing_run = classification_runs.get(key)
+    if existing_run and existing_run.status in ("queued", "running"):
+        raise HTTPException(status_code=409, detail="Run is already in progress")
+
+    run_provider, run_model = resolve_provider(provider, model)
+    status = ClassificationRunStatus(
+        run_id=run_in.run_id,
+        workspace_id=workspace_id,
+        provider=run_provider,
+        model=run_model,
+        total=(len(document_ids) + sum(len(ids) for ids in siblings.values())) * len(run_in.scheme_ids)
+    )
+    classification_runs.set(key, status)
+
+    background_tasks.add_task(
+        run_classification_batch,
+        status,
+        scheme_ids=list(run_in.scheme_ids),
+        document_ids=list(document_ids),
+        run_name=run_in.run_name,
+        run_description=run_in.run_description,
+        api_key=x_api_key,
+        siblings=siblings
+    )
+    return status
+
+
+@router.get("/runs/{run_id}", response_model=ClassificationRunStatus)
+async def get_classification_run(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    run_id: int
+) -> ClassificationRunStatus:
+    """
+    Progress of a classification run started on this worker.
+    """
+    status = classification_runs.get((workspace_id, run_id))
+    if not status:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return status
+
+
+# Field types whose values can be counted as labels
+LABEL_FIELD_TYPES = (FieldType.STR, FieldType.LIST_STR, FieldType.INT)
+
+
+async def load_scheme_field(
+    session: AsyncSession,
+    workspace_id: int,
+    scheme_id: int,
+    field: Optional[str]
+) -> Optional[ClassificationField]:
+    """The named field of a scheme in the workspace, None when no field is asked for."""
+    scheme = (await session.exec(
+        select(ClassificationScheme)
+        .where(ClassificationScheme.id == scheme_id)
+        .options(selectinload(ClassificationScheme.fields))
+    )).first()
+    if not scheme or scheme.workspace_id != workspace_id:
+        raise HTTPException(status_code=404, detail="Classification scheme not found in this workspace")
+    if field is None:
+        return None
+    for scheme_field in scheme.fields:
+        if scheme_field.name == field:
+            return scheme_field
+    raise HTTPException(status_code=404, detail=f"Field '{field}' not found in scheme {scheme_id}")
+
+
+def require_label_field(scheme_field: ClassificationField) -> None:
+    if scheme_field.type not in LABEL_FIELD_TYPES:
+        raise HTTPException(status_code=400, detail=f"Field '{scheme_field.name}' of type {scheme_field.type.value} has no labels")
+
+
+@router.get("/aggregates/labels", response_model=LabelFrequencyOut)
+async def aggregate_labels(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    scheme_id: int,
+    field: str,
+    run_id: Optional[int] = None,
+    filters: List[str] = Query(None, alias="filter"),
+    limit: int = Query(100, ge=1, le=1000)
+) -> LabelFrequencyOut:
+    """
+    How often each label of a field occurs across a scheme's results, most frequent first.
+    List fields count every element, `filter` takes the same conditions as the result listing.
+    """
+    scheme_field = await load_scheme_field(session, workspace_id, scheme_id, field)
+    require_label_field(scheme_field)
+
+    criteria = result_criteria(ClassificationResult, workspace_id, scheme_id, run_id, filters)
+    rows = (await session.execute(label_frequency_statement(criteria, field, limit))).all()
+    results = (await session.execute(field_count_statement(criteria, field))).scalar_one()
+    return LabelFrequencyOut(
+        scheme_id=scheme_id,
+        field=field,
+        results=results,
+        data=[LabelCount(label=label, count=count) for label, count in rows]
+    )
+
+
+@router.get("/aggregates/numeric", response_model=NumericSummaryOut)
+async def aggregate_numeric(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    scheme_id: int,
+    field: str,
+    run_id: Optional[int] = None,
+    filters: List[str] = Query(None, alias="filter"),
+    bins: int = Query(10, ge=1, le=100)
+) -> NumericSummaryOut:
+    """
+    Count, mean, range, percentiles and histogram of an int field.
+    Scales spanning at most 100 values get one bin per value, wider ones `bins` equal-width bins.
+    """
+    scheme_field = await load_scheme_field(session, workspace_id, scheme_id, field)
+    if scheme_field.type != FieldType.INT:
+        raise HTTPException(status_code=400, detail=f"Field '{field}' is not numeric")
+
+    criteria = result_criteria(ClassificationResult, workspace_id, scheme_id, run_id, filters)
+    count, mean, minimum, maximum, percentiles = (
+        await session.execute(numeric_summary_statement(criteria, field))
+    ).one()
+    summary = NumericSummaryOut(scheme_id=scheme_id, field=field, count=count)
+    if not count:
+        return summary
+
+    summary.mean, summary.min, summary.max = mean, minimum, maximum
+    summary.percentiles = {
+        f"p{round(fraction * 100)}": value for fraction, value in zip(PERCENTILES, percentiles or [])
+    }
+
+    lower, upper, bins = histogram_bounds(minimum, maximum, scheme_field.scale_min, scheme_field.scale_max, bins)
+    counts = dict((await session.execute(
+        bucket_histogram_statement(criteria, field, lower, upper, bins)
+    )).all())
+    width = (upper - lower) / bins
+    summary.histogram = [
+        HistogramBin(lower=lower + index * width, upper=lower + (index + 1) * width, count=counts.get(index + 1, 0))
+        for index in range(bins)
+    ]
+    return summary
+
+
+@router.get("/aggregates/timeseries", response_model=TimeSeriesOut)
+async def aggregate_timeseries(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    scheme_id: int,
+    field: Optional[str] = None,
+    interval: TimeInterval = "day",
+    run_id: Optional[int] = None,
+    filters: List[str] = Query(None, alias="filter")
+) -> TimeSeriesOut:
+    """
+    Results per `interval` of their documents' insertion date.
+    Without `field` only counts, with an int field the mean per bucket, with a label field one point per label and bucket.
+    """
+    scheme_field = await load_scheme_field(session, workspace_id, scheme_id, field)
+    if scheme_field is not None:
+        require_label_field(scheme_field)
+    numeric = scheme_field is not None and scheme_field.type == FieldType.INT
+
+    criteria = result_criteria(ClassificationResult, workspace_id, scheme_id, run_id, filters)
+    rows = (await session.execute(time_series_statement(criteria, interval, field, numeric))).all()
+    if scheme_field is None:
+        data = [TimeSeriesPoint(bucket=bucket, count=count) for bucket, count in rows]
+    elif numeric:
+        data = [TimeSeriesPoint(bucket=bucket, count=count, mean=mean) for bucket, count, mean in rows]
+    else:
+        data = [TimeSeriesPoint(bucket=bucket, label=label, count=count) for bucket, label, count in rows]
+    return TimeSeriesOut(scheme_id=scheme_id, field=field, interval=interval, data=data)
+
+
+@router.get("/aggregates/crosstab", response_model=CrossTabOut)
+async def aggregate_crosstab(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    scheme_id: int,
+    field: str,
+    other_scheme_id: int,
+    other_field: str,
+    run_id: Optional[int] = None,
+    filters: List[str] = Query(None, alias="filter"),
+    limit: int = Query(1000, ge=1, le=10000)
+) -> CrossTabOut:
+    """
+    Documents per pair of labels of two fields, possibly of two schemes, largest cells first.
+    Pass `run_id` to pair results of the same run; `filter` applies to the first scheme's results.
+    """
+    require_label_field(await load_scheme_field(session, workspace_id, scheme_id, field))
+    require_label_field(await load_scheme_field(session, workspace_id, other_scheme_id, other_field))
+
+    criteria = result_criteria(ClassificationResult, workspace_id, scheme_id, run_id, filters)
+    rows = (await session.execute(
+        crosstab_statement(criteria, field, other_scheme_id, other_field, run_id, limit)
+    )).all()
+    return CrossTabOut(
+        scheme_id=scheme_id,
+        field=field,
+        other_scheme_id=other_scheme_id,
+        other_field=other_field,
+        data=[CrossTabCell(row=row, column=column, count=count) for row, column, count in rows]
+    )
@@ -1,56 +1,76 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from app.models import Document,ClassificationScheme, ClassificationSchemeCreate, ClassificationSchemeRead, ClassificationSchemeUpdate, Workspace, ClassificationResult, ClassificationResultCreate, ClassificationResultRead, SavedResultSet, SavedResultSetCreate, SavedResultSetRead, DocumentRead, FileRead, ClassificationField, FieldType
-from sqlmodel import Session, select, func
-from app.api.deps import SessionDep, CurrentUser
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.api.deps import AsyncSessionDep, WorkspaceDep
 from typing import List, Any, Dict
 from datetime import datetime, timezone
 from pydantic import BaseModel, Field, create_model
 import os
 from app.core.opol_config import opol
-from sqlalchemy.orm import joinedload
-from sqlalchemy import distinct
+from app.api.v2.classification import invalidate_scheme_model
+from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, distinct
 
 router = APIRouter(prefix="/workspaces/{workspace_id}/classification_schemes")
 
+
+async def get_owned_scheme(
+    session: AsyncSession,
+    workspace_id: int,
+    scheme_id: int,
+    user_id: int,
+    *options
+) -> ClassificationScheme:
+    """
+    Scheme with its fields, checked against the workspace and its owner in one query.
+    """
+    scheme = (await session.exec(
+        select(ClassificationScheme)
+        .join(Workspace, Workspace.uid == ClassificationScheme.workspace_id)
+        .where(
+            ClassificationScheme.id == scheme_id,
+            ClassificationScheme.workspace_id == workspace_id,
+            Workspace.user_id_ownership == user_id
+        )
+        .options(selectinload(ClassificationScheme.fields), *options)
+        .execution_options(populate_existing=True)
+    )).first()
+    if not scheme:
+        raise HTTPException(status_code=404, detail="Classification scheme not found")
+    return scheme
+
 @router.post("/saved_results", response_model=SavedResultSetRead)
-def create_saved_result_set(
+async def create_saved_result_set(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     result_set_in: SavedResultSetCreate
 ) -> SavedResultSetRead:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
     result_set = SavedResultSet(
         **result_set_in.model_dump(),
         workspace_id=workspace_id
     )
     
     session.add(result_set)
-    session.commit()
-    session.refresh(result_set)
+    await session.commit()
     return result_set
 
 @router.get("/saved_results", response_model=List[SavedResultSetRead])
-def read_saved_result_sets(
+async def read_saved_result_sets(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1)
 ) -> List[SavedResultSetRead]:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
     statement = select(SavedResultSet).where(
         SavedResultSet.workspace_id == workspace_id
     ).offset(skip).limit(limit)
-    result_sets = session.exec(statement).all()
+    result_sets = (await session.exec(statement)).all()
     
     return [
         SavedResultSetRead(
@@ -67,17 +87,13 @@ def read_saved_result_sets(
 
 @router.post("/", response_model=ClassificationSchemeRead)
 @router.post("", response_model=ClassificationSchemeRead)
-def create_classification_scheme(
+async def create_classification_scheme(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     scheme_in: ClassificationSchemeCreate
 ) -> ClassificationSchemeRead:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
     # Validate fields
     for field in scheme_in.fields:
         if field.type == FieldType.INT:
@@ -120,10 +136,10 @@ def create_classification_scheme(
         model_instructions=scheme_in.model_instructions,
         validation_rules=scheme_in.validation_rules,
         workspace_id=workspace_id,
-        user_id=current_user.id
+        user_id=access.user_id
     )
     session.add(scheme)
-    session.flush()  # Get scheme.id without committing
+    await session.flush()  # Get scheme.id without committing
 
     # Create fields
     for field_data in scheme_in.fields:
@@ -140,25 +156,19 @@ def create_classification_scheme(
         )
         session.add(field)
 
-    session.commit()
-    session.refresh(scheme)
-    return scheme
+    await session.commit()
+    return await get_owned_scheme(session, workspace_id, scheme.id, access.user_id)
 
 @router.get("", response_model=List[ClassificationSchemeRead])
 @router.get("/", response_model=List[ClassificationSchemeRead])
-def read_classification_schemes(
+async def read_classification_schemes(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     skip: int = 0,
     limit: int = 100
 ) -> List[ClassificationSchemeRead]:
-    # Verify workspace access
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
     # Updated query to include fields relationship
     stmt = (
         select(
@@ -166,7 +176,7 @@ def read_classification_schemes(
             func.count(ClassificationResult.id).label('classification_count'),
             func.count(distinct(ClassificationResult.document_id)).label('document_count')
         )
-        .options(joinedload(ClassificationScheme.fields))
+        .options(selectinload(ClassificationScheme.fields))
         .join(ClassificationResult, ClassificationResult.scheme_id == ClassificationScheme.id, isouter=True)
         .where(ClassificationScheme.workspace_id == workspace_id)
         .group_by(ClassificationScheme.id)
@@ -174,8 +184,7 @@ def read_classification_schemes(
         .limit(limit)
     )
 
-    # Add .unique() to handle the collection joinedload
-    results = session.exec(stmt).unique().all()
+    results = (await session.exec(stmt)).all()
 
     return [
         ClassificationSchemeRead(
@@ -188,88 +197,77 @@ def read_classification_schemes(
     ]
 
 @router.get("/{scheme_id}", response_model=ClassificationSchemeRead)
-def read_classification_scheme(
+async def read_classification_scheme(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     scheme_id: int
 ) -> ClassificationSchemeRead:
-    scheme = session.get(ClassificationScheme, scheme_id)
-    if (
-        not scheme
-        or scheme.workspace_id != workspace_id
-        or scheme.workspace.user_id_ownership != current_user.id
-    ):
-        raise HTTPException(status_code=404, detail="Classification scheme not found")
-    return scheme
+    return await get_owned_scheme(session, workspace_id, scheme_id, access.user_id)
 
 @router.patch("/{scheme_id}", response_model=ClassificationSchemeRead)
-def update_classification_scheme(
+async def update_classification_scheme(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     scheme_id: int,
     scheme_in: ClassificationSchemeUpdate
 ) -> ClassificationSchemeRead:
-    scheme = session.get(ClassificationScheme, scheme_id)
-    if (
-        not scheme
-        or scheme.workspace_id != workspace_id
-        or scheme.workspace.user_id_ownership != current_user.id
-    ):
-        raise HTTPException(status_code=404, detail="Classification scheme not found")
+    scheme = await get_owned_scheme(session, workspace_id, scheme_id, access.user_id)
     
     for field, value in scheme_in.model_dump(exclude_unset=True).items():
         setattr(scheme, field, value)
     scheme.updated_at = datetime.now(timezone.utc)
     
     session.add(scheme)
-    session.commit()
-    session.refresh(scheme)
-    return scheme
+    await session.commit()
+    invalidate_scheme_model(scheme_id)
+    return await get_owned_scheme(session, workspace_id, scheme_id, access.user_id)
 
 @router.delete("/{scheme_id}")
-def delete_classification_scheme(
+async def delete_classification_scheme(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     scheme_id: int
 ) -> Any:
-    scheme = session.get(ClassificationScheme, scheme_id)
-    if (
-        not scheme
-        or scheme.workspace_id != workspace_id
-        or scheme.workspace.user_id_ownership != current_user.id
-    ):
+    # Fields and results go with it through ON DELETE CASCADE
+    deleted = (await session.execute(
+        delete(ClassificationScheme)
+        .where(
+            ClassificationScheme.id == scheme_id,
+            ClassificationScheme.workspace_id == workspace_id,
+            ClassificationScheme.workspace_id.in_(
+                select(Workspace.uid).where(Workspace.user_id_ownership == access.user_id)
+            )
+        )
+        .returning(ClassificationScheme.id)
+    )).first()
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Classification scheme not found")
-    session.delete(scheme)
-    session.commit()
+    await session.commit()
+    invalidate_scheme_model(scheme_id)
     return {"message": "Classification scheme deleted successfully"}
 
 @router.post("/{scheme_id}/classify/{document_id}", response_model=ClassificationResultRead)
-def classify_document(
+async def classify_document(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     scheme_id: int,
     document_id: int
 ) -> Any:
-    # Verify workspace access
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-    
     # Get scheme and document
-    scheme = session.get(ClassificationScheme, scheme_id)
-    document = session.exec(
+    scheme = await session.get(ClassificationScheme, scheme_id, options=[selectinload(ClassificationScheme.fields)])
+    document = (await session.exec(
         select(Document)
-        .options(joinedload(Document.files))
+        .options(selectinload(Document.files))
         .where(Document.id == document_id)
-    ).unique().one()
+    )).one()
     
     if not scheme or scheme.workspace_id != workspace_id:
         raise HTTPException(status_code=404, detail="Classification scheme not found")
@@ -326,7 +324,7 @@ def classify_document(
     )
     
     try:
-        result = fastclass.classify(DynamicClassification, scheme.model_instructions or "", classification_text)
+        result = await run_in_threadpool(fastclass.classify, DynamicClassification, scheme.model_instructions or "", classification_text)
         score = result.score
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Classification failed: {str(e)}")
@@ -338,8 +336,7 @@ def classify_document(
         score=score
     )
     session.add(classification_result)
-    session.commit()
-    session.refresh(classification_result)
+    await session.commit()
     
     # Return the result with explicit field mapping
     return ClassificationResultRead(
@@ -365,18 +362,14 @@ def classify_document(
     )
 
 @router.get("/saved_results/{result_set_id}", response_model=SavedResultSetRead)
-def get_saved_result_set(
+async def get_saved_result_set(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     result_set_id: int
 ) -> SavedResultSetRead:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
-    result_set = session.get(SavedResultSet, result_set_id)
+    result_set = await session.get(SavedResultSet, result_set_id)
     if not result_set or result_set.workspace_id != workspace_id:
         raise HTTPException(status_code=404, detail="Result set not found")
 
@@ -384,8 +377,11 @@ def get_saved_result_set(
     results_stmt = select(ClassificationResult).where(
         ClassificationResult.document_id.in_(result_set.document_ids),
         ClassificationResult.scheme_id.in_(result_set.scheme_ids)
+    ).options(
+        selectinload(ClassificationResult.document).selectinload(Document.files),
+        selectinload(ClassificationResult.scheme).selectinload(ClassificationScheme.fields)
     )
-    results = session.exec(results_stmt).all()
+    results = (await session.exec(results_stmt)).all()
 
     return SavedResultSetRead(
         id=result_set.id,
@@ -400,21 +396,19 @@ def get_saved_result_set(
 
 @router.delete("")
 @router.delete("/")
-def delete_all_classification_schemes(
+async def delete_all_classification_schemes(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int
 ) -> Any:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
-    statement = select(ClassificationScheme).where(ClassificationScheme.workspace_id == workspace_id)
-    schemes = session.exec(statement).all()
-
-    for scheme in schemes:
-        session.delete(scheme)
-
-    session.commit()
+    # One DELETE, fields and results cascade in the database
+    scheme_ids = (await session.execute(
+        delete(ClassificationScheme)
+        .where(ClassificationScheme.workspace_id == workspace_id)
+        .returning(ClassificationScheme.id)
+    )).scalars().all()
+    await session.commit()
+    for scheme_id in scheme_ids:
+        invalidate_scheme_model(scheme_id)
     return {"message": "All classification schemes deleted successfully"}
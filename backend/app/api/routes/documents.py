@@ -1,18 +1,62 @@
+import asyncio
 import logging
 import io
 import os
-from typing import Any, List, Optional, Dict
-from datetime import datetime, timezone
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Response
-import fitz  # PyMuPDF
+import tempfile
+import uuid
+from typing import Any, Dict, Iterator, List, Literal, Optional
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, UploadFile, File, Form, Header, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, select
-from sqlalchemy.orm import joinedload
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy import and_, any_, cast, delete, func, insert, literal, literal_column, text, tuple_, update
+from sqlalchemy.dialects.postgresql import DOUBLE_PRECISION, TSVECTOR, insert as pg_insert
+from sqlalchemy.orm import aliased, selectinload
 from pydantic import BaseModel
 
-from app.models import Document, DocumentRead, DocumentUpdate, Workspace, User, File as FileModel, FileRead
-from app.api.deps import SessionDep, CurrentUser
+from app.models import (
+    Document,
+    DocumentChunk,
+    DocumentMinHash,
+    DocumentRead,
+    DocumentsOut,
+    DocumentSearchHit,
+    DocumentSearchOut,
+    DocumentSearchType,
+    DocumentTransferResult,
+    DocumentUpdate,
+    NearDuplicateCluster,
+    NearDuplicateClustersOut,
+    Workspace,
+    User,
+    File as FileModel,
+    FileRead,
+    Message,
+    PdfExtractionJobCreate,
+    PdfExtractionJobStatus,
+)
+from app.api.deps import AsyncSessionDep, CurrentUser, WorkspaceDep
+from app.core.byte_ranges import etag_matches, parse_range_header
+from app.core.cache import LRUCache
 from app.core.config import settings
-from minio import Minio
+from app.core.db import async_engine
+from app.core.dedup import document_content_hash, file_sha256, stored_object_name
+from app.core.embeddings import EmbedderUnavailable, embed_documents, get_embedder, vector_index_available
+from app.core.near_duplicates import near_duplicate_clusters, update_minhashes
+from app.core.pagination import decode_cursor, encode_cursor, estimate_count
+from app.core.pdf_extraction import extract_pdf, extract_upload
+from app.core.queries import DocumentView, document_view_options, id_array, omit_deferred_text
+from app.core.storage import (
+    blob_lock_key,
+    lock_blob,
+    minio_client,
+    remove_stored_files,
+    remove_stored_objects,
+    stored_objects_statement,
+)
+from minio.commonconfig import CopySource
 from minio.error import S3Error
 
 # Configure logging
@@ -20,52 +64,129 @@ logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(
 
 router = APIRouter(prefix="/workspaces/{workspace_id}/documents")
 
-# MinIO Client
-class MinioClient:
-    def __init__(self):
-        self.client = Minio(
-            endpoint=settings.MINIO_ENDPOINT,
-            access_key=settings.MINIO_ROOT_USER,
-            secret_key=settings.MINIO_ROOT_PASSWORD,
-            secure=settings.MINIO_SECURE,
-        )
-        self.bucket_name = settings.MINIO_BUCKET_NAME
-        self._ensure_bucket_exists()
+async def index_documents(document_ids: List[int]) -> None:
+    """
+    Background indexing after documents are written: near-duplicate signatures, then embeddings.
+    Both skip documents whose text hasn't changed.
+    """
+    if not document_ids:
+        return
+    await update_minhashes(document_ids)
+    await embed_documents(document_ids)
 
-    def _ensure_bucket_exists(self):
-        try:
-            if not self.client.bucket_exists(self.bucket_name):
-                self.client.make_bucket(self.bucket_name)
-                logging.info(f"Bucket '{self.bucket_name}' created.")
-        except S3Error as e:
-            logging.error(f"Error creating bucket: {e}")
-            raise HTTPException(
-                status_code=500, detail="Failed to create bucket."
-            )
+# Extraction jobs started on this worker, keyed by (workspace_id, job_id)
+pdf_extraction_jobs = LRUCache(maxsize=1024)
 
-    async def upload_file(self, file: UploadFile, object_name: str):
-        try:
-            file_content = await file.read()
-            self.client.put_object(
-                bucket_name=self.bucket_name,
-                object_name=object_name,
-                data=io.BytesIO(file_content),
-                length=len(file_content),
-                content_type=file.content_type,
-            )
-            logging.info(f"File '{file.filename}' uploaded successfully to '{object_name}'.")
-        except S3Error as e:
-            logging.error(f"Error uploading file: {e}")
-            raise HTTPException(
-                status_code=500, detail="Failed to upload file."
-            )
-        except Exception as e:
-            logging.error(f"Unexpected error during file upload: {e}")
-            raise HTTPException(
-                status_code=500, detail="Unexpected error during file upload."
-            )
+async def extract_stored_pdf(object_name: str):
+    """Download a stored PDF to a temporary file and extract it in the process pool."""
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "source.pdf")
+        await run_in_threadpool(minio_client.client.fget_object, minio_client.bucket_name, object_name, path)
+        return await extract_pdf(path)
+
+async def run_pdf_extraction_job(
+    status: PdfExtractionJobStatus,
+    files: List[tuple[int, str]],
+    autofill: bool = False
+) -> None:
+    """
+    Extract text for (document_id, object_name) pairs and write it to Document.text_content.
+    Failures are recorded per file and don't stop the rest of the job.
+    """
+    status.status = "running"
+    status.started_at = datetime.now(timezone.utc)
+    semaphore = asyncio.Semaphore(settings.PDF_EXTRACTION_MAX_FILES)
+    extracted: List[int] = []
+
+    async def process(document_id: int, object_name: str) -> None:
+        async with semaphore:
+            try:
+                extraction = await extract_stored_pdf(object_name)
+                async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                    document = await session.get(Document, document_id)
+                    if not document:
+                        raise ValueError("document no longer exists")
+                    document.text_content = extraction.text_content
+                    if autofill:
+                        document.title = extraction.title or document.title
+                        document.summary = extraction.summary or None
+                    session.add(document)
+                    await session.commit()
+                extracted.append(document_id)
+                status.completed += 1
+            except Exception as e:
+                logging.error(f"Error extracting {object_name}: {e}")
+                status.failed += 1
+                status.errors.append(f"{object_name}: {e}")
+
+    try:
+        await asyncio.gather(*(process(document_id, object_name) for document_id, object_name in files))
+        status.status = "completed"
+        status.finished_at = datetime.now(timezone.utc)
+        await index_documents(sorted(set(extracted)))
+    except Exception as e:
+        logging.error(f"PDF extraction job {status.job_id} failed: {e}")
+        status.status = "failed"
+        status.errors.append(str(e))
+    finally:
+        status.finished_at = status.finished_at or datetime.now(timezone.utc)
+
+def start_pdf_extraction_job(
+    background_tasks: BackgroundTasks,
+    workspace_id: int,
+    files: List[tuple[int, str]],
+    autofill: bool = False
+) -> PdfExtractionJobStatus:
+    status = PdfExtractionJobStatus(
+        job_id=uuid.uuid4().hex,
+        workspace_id=workspace_id,
+        total=len(files),
+        document_ids=sorted({document_id for document_id, _ in files}),
+    )
+    pdf_extraction_jobs.set((workspace_id, status.job_id), status)
+    background_tasks.add_task(run_pdf_extraction_job, status, files, autofill)
+    return status
+
+async def load_document_reads(session: AsyncSession, document_ids: List[int]) -> List[DocumentRead]:
+    """
+    Documents with their files as DocumentRead, ordered by ID.
+    Async sessions can't lazy-load, so files are fetched here in one extra query.
+    """
+    if not document_ids:
+        return []
+    statement = (
+        select(Document)
+        .where(Document.id.in_(document_ids))
+        .options(selectinload(Document.files))
+        .order_by(Document.id)
+        .execution_options(populate_existing=True)
+    )
+    documents = (await session.exec(statement)).all()
+    return [DocumentRead.model_validate(document) for document in documents]
 
-minio_client = MinioClient()
+async def insert_document(session: AsyncSession, values: Dict[str, Any]) -> tuple[int, bool]:
+    """
+    Insert a document unless its workspace already has one with the same content_hash.
+    Returns (document_id, created). ON CONFLICT also covers concurrent ingests of the same content.
+    """
+    document_id = (await session.execute(
+        pg_insert(Document)
+        .values(**values)
+        .on_conflict_do_nothing(
+            index_elements=["workspace_id", "content_hash"],
+            index_where=Document.content_hash.isnot(None)
+        )
+        .returning(Document.id)
+    )).scalar()
+    if document_id is not None:
+        return document_id, True
+    existing_id = (await session.execute(
+        select(Document.id).where(
+            Document.workspace_id == values["workspace_id"],
+            Document.content_hash == values["content_hash"]
+        )
+    )).scalar_one()
+    return existing_id, False
 
 class DocumentCreateForm(BaseModel):
     title: str = Form(...)
@@ -80,8 +201,8 @@ class DocumentCreateForm(BaseModel):
 @router.post("/", response_model=DocumentRead)
 async def create_document(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     title: str = Form(...),
     url: Optional[str] = Form(None),
@@ -91,8 +212,15 @@ async def create_document(
     summary: Optional[str] = Form(None),
     top_image: Optional[str] = Form(None),
     insertion_date: Optional[datetime] = Form(None),
-    files: Optional[List[UploadFile]] = File(None)
+    files: Optional[List[UploadFile]] = File(None),
+    background_tasks: BackgroundTasks,
+    response: Response
 ) -> Any:
+    """
+    Create a document, optionally with files.
+    If the workspace already has a document with the same files, text or URL, that document
+    is returned instead and its ID is sent in the `X-Duplicate-Of` header.
+    """
     logging.info(f"Creating document with title: {title}, url: {url}, content_type: {content_type}, insertion_date: {insertion_date}, files: {files}")
 
     # Log content lengths with None checks
@@ -109,11 +237,7 @@ async def create_document(
         # Handle date input
         insertion_date = insertion_date or datetime.now(timezone.utc)
 
-        workspace = session.get(Workspace, workspace_id)
-        if not workspace or workspace.user_id_ownership != current_user.id:
-            raise HTTPException(status_code=404, detail="Workspace not found")
-
-        logging.info(f"Creating document for workspace {workspace_id} by user {current_user.id}")
+        logging.info(f"Creating document for workspace {workspace_id} by user {access.user_id}")
         logging.info(f"Document data: title={title}, top_image={top_image}, url={url}, content_type={content_type}, source={source}, files={files}")
 
         # Clean text content and summary to remove NULL bytes and handle encoding issues
@@ -123,7 +247,27 @@ async def create_document(
         if summary:
             summary = summary.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
 
+        # Files are stored under their sha256 before the row exists, a duplicate's blobs are already there
+        stored_files = []
+        failed_files = []
+        for file in files or []:
+            try:
+                logging.info(f"File name: {file.filename}, size: {file.size}")
+                sha256 = await run_in_threadpool(file_sha256, file.file)
+                await lock_blob(session, sha256)
+                object_name = await minio_client.store_file(file, sha256)
+                stored_files.append((file, sha256))
+                logging.info(f"Uploaded file: {file.filename} to {object_name}")
+            except Exception as e:
+                logging.error(f"Error uploading file {file.filename}: {e}")
+                failed_files.append(file.filename)
+
+        # A hash of only the stored files would match documents that lack the failed ones
+        content_hash = None if failed_files else document_content_hash(
+            text_content, url, [sha256 for _, sha256 in stored_files]
+        )
         document_data_dict = {
+            "content_hash": content_hash,
             "title": title,
             "url": url,
             "content_type": content_type,
@@ -133,88 +277,300 @@ async def create_document(
             "top_image": top_image,
             "insertion_date": insertion_date,
             "workspace_id": workspace_id,
-            "user_id": current_user.id
+            "user_id": access.user_id
         }
 
-        document = Document(**document_data_dict)
-        session.add(document)
-        session.flush()  # Remove await
-
-        # Handle file uploads
-        if files:
-            for file in files:
-                try:
-                    logging.info(f"File name: {file.filename}, size: {file.size}")
-                    object_name = f"{document.id}/{file.filename}"
-                    await minio_client.upload_file(file, object_name)  # Keep await here as it's an async operation
-                    file_model = FileModel(name=file.filename, filetype=file.content_type, size=file.size, document_id=document.id)
-                    session.add(file_model)
-                    print(f"Uploaded file: {file.filename} to {object_name}")
-                except Exception as e:
-                    print(f"Error uploading file {file.filename}: {e}")
+        document_id, created = await insert_document(session, document_data_dict)
+        if not created:
+            await session.rollback()
+            logging.info(f"Document duplicates document {document_id}, returning the existing one.")
+            response.headers["X-Duplicate-Of"] = str(document_id)
+            return (await load_document_reads(session, [document_id]))[0]
 
-        session.add(document)
-        session.commit()  # Remove await
-        session.refresh(document)  # Remove await
+        for file, sha256 in stored_files:
+            file_model = FileModel(name=file.filename, filetype=file.content_type, size=file.size, sha256=sha256, document_id=document_id)
+            session.add(file_model)
+
+        await session.commit()
 
-        logging.info(f"Document {document.id} created successfully.")
-        return document
+        logging.info(f"Document {document_id} created successfully.")
+        background_tasks.add_task(index_documents, [document_id])
+        return (await load_document_reads(session, [document_id]))[0]
     except Exception as e:
         logging.error(f"Error creating document: {e}")
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail=str(e))
 
-@router.get("", response_model=List[DocumentRead])
-@router.get("/", response_model=List[DocumentRead])
-def read_documents(
+@router.get("", response_model=List[DocumentRead], deprecated=True)
+@router.get("/", response_model=List[DocumentRead], deprecated=True)
+async def read_documents(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     skip: int = 0,
-    limit: int = 100
+    limit: int = 100,
+    view: DocumentView = "full"
 ) -> Any:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
-
+    """
+    Documents in the workspace by ID, paginated by offset. `view=summary` leaves out text_content,
+    fetch it with the single-document endpoint.
+    Deprecated, deep offsets scan every skipped row. Use `/page`, which pages by keyset and can estimate the total.
+    """
     statement = (
         select(Document)
         .where(Document.workspace_id == workspace_id)
+        .options(selectinload(Document.files), *document_view_options(view))
+        .order_by(Document.id)
         .offset(skip)
         .limit(limit)
     )
-    documents = session.exec(statement).all()
-    
-    document_reads = []
-    for document in documents:
-        document_read = DocumentRead.model_validate(document)
-        document_reads.append(document_read)
+    documents = (await session.exec(statement)).all()
+    omit_deferred_text(documents)
+    return documents
+
+@router.get("/page", response_model=DocumentsOut)
+async def read_documents_page(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=500),
+    count: Literal["none", "estimate", "exact"] = "none",
+    view: DocumentView = "summary"
+) -> Any:
+    """
+    Documents newest first, paginated by keyset on (insertion_date, id).
+    Pass `next_cursor` from the previous page as `cursor`. Deep pages cost the same as the first,
+    unlike offset pagination. `count` optionally adds a planner estimate or an exact total.
+    text_content is left out unless `view=full`.
+    """
+    in_workspace = Document.workspace_id == workspace_id
+    statement = select(Document).where(in_workspace)
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            last_date, last_id = datetime.fromisoformat(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        statement = statement.where(
+            tuple_(Document.insertion_date, Document.id) < tuple_(last_date, last_id)
+        )
+    statement = (
+        statement
+        .options(selectinload(Document.files), *document_view_options(view))
+        .order_by(Document.insertion_date.desc(), Document.id.desc())
+        .limit(limit + 1)
+    )
+    documents = (await session.exec(statement)).all()
+    omit_deferred_text(documents)
+
+    next_cursor = None
+    if len(documents) > limit:
+        documents = documents[:limit]
+        next_cursor = encode_cursor(documents[-1].insertion_date, documents[-1].id)
+
+    total = None
+    if count == "exact":
+        total = (await session.exec(select(func.count()).select_from(Document).where(in_workspace))).one()
+    elif count == "estimate":
+        total = await estimate_count(session, select(Document.id).where(in_workspace))
+
+    return DocumentsOut(data=documents, count=total, next_cursor=next_cursor)
+
+# Text search configuration of document.search_vector, see the add_document_search_vector migration
+SEARCH_CONFIG = "english"
+# Generated column, not mapped on Document so regular loads don't carry it
+search_vector = literal_column("document.search_vector", type_=TSVECTOR)
+
+async def text_search(
+    session: AsyncSession,
+    workspace_id: int,
+    q: str,
+    cursor: Optional[str],
+    limit: int
+) -> DocumentSearchOut:
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    # ts_rank_cd returns real, which comes back rounded to its shortest text form. As float8
+    # the cursor carries the exact value, so hits tying the last one's rank aren't skipped.
+    rank_value = cast(func.ts_rank_cd(search_vector, query), DOUBLE_PRECISION)
+    rank = rank_value.label("rank")
+    page = (
+        select(Document.id, rank)
+        .where(Document.workspace_id == workspace_id, search_vector.op("@@")(query))
+    )
+    if cursor:
+        values = decode_cursor(cursor)
+        try:
+            last_rank, last_id = float(values[0]), int(values[1])
+        except (IndexError, TypeError, ValueError):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        page = page.where(tuple_(rank_value, Document.id) < tuple_(last_rank, last_id))
+    page = page.order_by(rank.desc(), Document.id.desc()).limit(limit + 1).cte("page")
+
+    # Headlines are the expensive part, so they are only computed for the rows of this page
+    headline = func.ts_headline(
+        SEARCH_CONFIG,
+        func.left(func.coalesce(Document.text_content, Document.summary, Document.title), 100_000),
+        query,
+        "StartSel=<mark>, StopSel=</mark>, MaxFragments=2, MaxWords=30, MinWords=10"
+    )
+    statement = (
+        select(Document, page.c.rank, headline)
+        .join(page, page.c.id == Document.id)
+        .options(selectinload(Document.files), *document_view_options("summary"))
+        .order_by(page.c.rank.desc(), Document.id.desc())
+    )
+    rows = (await session.execute(statement)).all()
+    omit_deferred_text(row[0] for row in rows)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0].id)
+
+    return DocumentSearchOut(
+        data=[
+            DocumentSearchHit(document=DocumentRead.model_validate(document), rank=rank_value, headline=snippet or "")
+            for document, rank_value, snippet in rows
+        ],
+        next_cursor=next_cursor
+    )
+
+# Nearest chunks fetched per requested document, several chunks of one document often rank together
+SEMANTIC_CANDIDATES_PER_HIT = 5
+
+async def semantic_search(session: AsyncSession, workspace_id: int, q: str, limit: int) -> DocumentSearchOut:
+    if not await vector_index_available(session):
+        raise HTTPException(status_code=503, detail="Semantic search is not available, pgvector is not installed")
+    try:
+        vector = (await run_in_threadpool(get_embedder().embed, [q]))[0]
+    except EmbedderUnavailable:
+        raise HTTPException(status_code=503, detail="Semantic search is not available, the embedding model isn't loaded")
+    # SET doesn't take bind parameters, the value is an int from settings
+    await session.execute(text(f"SET LOCAL hnsw.ef_search = {int(settings.EMBEDDING_SEARCH_EF)}"))
+
+    distance = DocumentChunk.embedding.cosine_distance(vector)
+    nearest = (
+        select(DocumentChunk.document_id, DocumentChunk.text, distance.label("distance"))
+        .where(DocumentChunk.workspace_id == workspace_id)
+        .order_by(distance)
+        .limit(limit * SEMANTIC_CANDIDATES_PER_HIT)
+        .subquery("nearest")
+    )
+    # Closest chunk per document
+    best = (
+        select(nearest.c.document_id, nearest.c.text, nearest.c.distance)
+        .distinct(nearest.c.document_id)
+        .order_by(nearest.c.document_id, nearest.c.distance)
+        .subquery("best")
+    )
+    statement = (
+        select(Document, best.c.distance, best.c.text)
+        .join(best, best.c.document_id == Document.id)
+        .options(selectinload(Document.files), *document_view_options("summary"))
+        .order_by(best.c.distance, Document.id)
+        .limit(limit)
+    )
+    rows = (await session.execute(statement)).all()
+    omit_deferred_text(row[0] for row in rows)
+
+    return DocumentSearchOut(
+        data=[
+            DocumentSearchHit(
+                document=DocumentRead.model_validate(document),
+                rank=1.0 - distance_value,
+                headline=chunk[:300]
+            )
+            for document, distance_value, chunk in rows
+        ]
+    )
+
+@router.get("/search", response_model=DocumentSearchOut)
+async def search_documents(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    q: str = Query(..., min_length=1),
+    search_type: DocumentSearchType = DocumentSearchType.TEXT,
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100)
+) -> Any:
+    """
+    Search title, summary and text_content of the workspace's documents.
+
+    - `text`: full-text search, `q` takes web search syntax ("quoted phrases", OR, -excluded).
+      Hits are ranked with ts_rank_cd, title matches weigh most, and come with highlighted snippets.
+      Pass `next_cursor` back as `cursor` for the next page.
+    - `semantic`: nearest documents by embedding similarity, the closest chunk is the headline.
+      Returns the top `limit` documents only. Documents are embedded in the background
+      after they are written, so very recent changes may not be found yet.
+      Answers 503 on servers without pgvector or without the embedding model.
+    """
+    if search_type == DocumentSearchType.SEMANTIC:
+        if cursor:
+            raise HTTPException(status_code=400, detail="Cursors are only supported for text search")
+        return await semantic_search(session, workspace_id, q, limit)
+    return await text_search(session, workspace_id, q, cursor, limit)
+
+@router.post("/index", response_model=Message, status_code=202)
+async def index_workspace_documents(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    background_tasks: BackgroundTasks
+) -> Any:
+    """
+    Queue (re)indexing of every document in the workspace for near-duplicate detection
+    and semantic search, e.g. for documents from before either existed or after changing
+    EMBEDDING_MODEL. Documents whose index is current are skipped.
+    """
+    document_ids = (await session.exec(
+        select(Document.id).where(Document.workspace_id == workspace_id).order_by(Document.id)
+    )).all()
+    background_tasks.add_task(index_documents, list(document_ids))
+    return Message(message=f"Indexing of {len(document_ids)} documents queued")
 
-    return document_reads
+@router.get("/near-duplicates", response_model=NearDuplicateClustersOut)
+async def read_near_duplicates(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    threshold: Optional[float] = Query(None, ge=0.0, le=1.0)
+) -> Any:
+    """
+    Groups of near-duplicate documents (e.g. the same wire story under different titles),
+    by MinHash similarity of their text. Only groups of two or more are listed.
+    The first document of each group is its representative.
+    """
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    clusters = await near_duplicate_clusters(session, workspace_id, threshold=threshold)
+    return NearDuplicateClustersOut(
+        data=[NearDuplicateCluster(representative_id=members[0], document_ids=members) for members in clusters],
+        threshold=threshold
+    )
 
 @router.get("/{document_id}", response_model=DocumentRead)
-def read_document(
+async def read_document(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     document_id: int
 ) -> Any:
-    document = session.get(Document, document_id)
+    # Eagerly load the files relationship
+    statement = select(Document).options(selectinload(Document.files)).where(Document.id == document_id)
+    document = (await session.exec(statement)).first()
     if (
         not document
         or document.workspace_id != workspace_id
-        or document.user_id != current_user.id
+        or document.user_id != access.user_id
     ):
         raise HTTPException(status_code=404, detail="Document not found")
-    
-    # Eagerly load the files relationship
-    statement = select(Document).options(joinedload(Document.files)).where(Document.id == document_id)
-    document = session.exec(statement).first()
-
-    if not document:
-        raise HTTPException(status_code=404, detail="Document not found")
 
     # Convert File objects to FileRead objects
     files = [FileRead.model_validate(file) for file in document.files]
@@ -227,19 +583,20 @@ def read_document(
     return document_read
 
 @router.patch("/{document_id}", response_model=DocumentRead)
-def update_document(
+async def update_document(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     document_id: int,
-    document_in: DocumentUpdate
+    document_in: DocumentUpdate,
+    background_tasks: BackgroundTasks
 ) -> Any:
-    document = session.get(Document, document_id)
+    document = await session.get(Document, document_id)
     if (
         not document
         or document.workspace_id != workspace_id
-        or document.user_id != current_user.id
+        or document.user_id != access.user_id
     ):
         raise HTTPException(status_code=404, detail="Document not found")
 
@@ -256,51 +613,56 @@ def update_document(
         setattr(document, field, value)
 
     session.add(document)
-    session.commit()
-    session.refresh(document)
-    return document
+    await session.commit()
+    if update_data.keys() & {"title", "summary", "text_content"}:
+        background_tasks.add_task(index_documents, [document.id])
+    return (await load_document_reads(session, [document.id]))[0]
 
 @router.delete("/{document_id}")
-def delete_document(
+async def delete_document(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
-    document_id: int
+    document_id: int,
+    background_tasks: BackgroundTasks
 ) -> Any:
-    document = session.get(Document, document_id)
+    document = await session.get(Document, document_id)
     if (
         not document
         or document.workspace_id != workspace_id
-        or document.user_id != current_user.id
+        or document.user_id != access.user_id
     ):
         raise HTTPException(status_code=404, detail="Document not found")
 
-    session.delete(document)
-    session.commit()
+    # Files and classification results go with it through ON DELETE CASCADE
+    stored = (await session.execute(stored_objects_statement(Document.id == document_id))).all()
+    await session.execute(delete(Document).where(Document.id == document_id))
+    await session.commit()
+    background_tasks.add_task(remove_stored_files, stored)
     return {"message": "Document deleted successfully"}
 
 @router.get("/{document_id}/files", response_model=List[FileRead])
-def get_document_files(
+async def get_document_files(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     document_id: int
 ) -> Any:
-    document = session.get(Document, document_id)
+    document = await session.get(Document, document_id, options=[selectinload(Document.files)])
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
     return document.files
 
 @router.delete("/{document_id}/files/{file_id}")
-def delete_document_file(
+async def delete_document_file(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     document_id: int,
     file_id: int) -> Any:   
-    document = session.get(Document, document_id)
+    document = await session.get(Document, document_id, options=[selectinload(Document.files)])
     if not document:
         raise HTTPException(status_code=404, detail="Document not found")
 
@@ -310,137 +672,294 @@ def delete_document_file(
 
     document.files = [file for file in document.files if file.id != file_id]
     session.add(document)
-    session.commit()
+    await session.commit()
     return {"message": "File deleted successfully"}
 
+def iter_object(response, chunk_size: int) -> Iterator[bytes]:
+    """Yield a MinIO object in chunks and hand the connection back to the pool when done."""
+    try:
+        yield from response.stream(chunk_size)
+    finally:
+        response.close()
+        response.release_conn()
+
 @router.get("/files/{file_id}/download")
 async def download_file(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
-    file_id: int
+    file_id: int,
+    presigned: bool = False,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
 ):
-    file = session.get(FileModel, file_id)
+    """
+    Stream a file from storage, honouring `Range` and `If-None-Match`.
+    With `presigned=true` a short-lived URL is returned instead, so the bytes bypass the API.
+    """
+    file = await session.get(FileModel, file_id)
     if not file:
         raise HTTPException(status_code=404, detail="File not found")
 
-    # Fetch the file from MinIO
+    object_name = stored_object_name(file.document_id, file.name, file.sha256)
+    disposition = f"attachment;filename={file.name}"
+
+    if presigned:
+        url = await run_in_threadpool(
+            minio_client.client.presigned_get_object,
+            minio_client.bucket_name,
+            object_name,
+            expires=timedelta(seconds=settings.MINIO_PRESIGNED_URL_EXPIRE_SECONDS),
+            response_headers={"response-content-disposition": disposition},
+        )
+        return {"url": url, "expires_in": settings.MINIO_PRESIGNED_URL_EXPIRE_SECONDS}
+
+    try:
+        stat = await run_in_threadpool(
+            minio_client.client.stat_object, minio_client.bucket_name, object_name
+        )
+    except S3Error as e:
+        logging.error(f"Error fetching file from MinIO: {e}")
+        if e.code in ("NoSuchKey", "NoSuchObject"):
+            raise HTTPException(status_code=404, detail="File not found in storage.")
+        raise HTTPException(status_code=500, detail="Failed to fetch file from storage.")
+
+    etag = f'"{stat.etag}"'
+    headers = {
+        "Accept-Ranges": "bytes",
+        "ETag": etag,
+        "Content-Disposition": disposition,
+    }
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = parse_range_header(range_header, stat.size) if range_header else None
+    start, end = byte_range or (0, stat.size - 1)
+    length = end - start + 1 if stat.size else 0
+    headers["Content-Length"] = str(length)
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+
     try:
-        object = minio_client.client.get_object(
-            bucket_name=minio_client.bucket_name,
-            object_name=f"{file.document_id}/{file.name}",
+        response = await run_in_threadpool(
+            minio_client.client.get_object,
+            minio_client.bucket_name,
+            object_name,
+            offset=start,
+            length=length,
         )
-        file_data = object.read()
     except S3Error as e:
         logging.error(f"Error fetching file from MinIO: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch file from storage.")
 
-    # Return the file as a response
-    return Response(
-        file_data,
-        media_type=file.filetype,
-        headers={"Content-Disposition": f"attachment;filename={file.name}"},
+    return StreamingResponse(
+        iter_object(response, settings.MINIO_DOWNLOAD_CHUNK_SIZE),
+        status_code=206 if byte_range else 200,
+        media_type=file.filetype or stat.content_type,
+        headers=headers,
     )
 
 @router.delete("")
 @router.delete("/")
-def delete_all_documents(
+async def delete_all_documents(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
-    workspace_id: int
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    background_tasks: BackgroundTasks
 ) -> Any:
-    workspace = session.get(Workspace, workspace_id)
-    if not workspace or workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Workspace not found")
+    """
+    Delete every document in the workspace with one DELETE, children cascade in the database.
+    Stored files are removed afterwards in the background.
+    """
+    in_workspace = Document.workspace_id == workspace_id
+    stored = (await session.execute(stored_objects_statement(in_workspace))).all()
+    await session.execute(delete(Document).where(in_workspace))
+    await session.commit()
+    background_tasks.add_task(remove_stored_files, stored)
+    return {"message": "All documents deleted successfully"}
 
-    statement = select(Document).where(Document.workspace_id == workspace_id)
-    documents = session.exec(statement).all()
+def copied_columns(table, *exclude: str) -> List[str]:
+    return [column.name for column in table.columns if column.name not in exclude]
 
-    for document in documents:
-        session.delete(document)
+async def copy_stored_files(files: List[tuple[int, int, str]]) -> List[Dict[str, Any]]:
+    """
+    Server-side copy of (source_document_id, target_document_id, name) objects, several at a time.
+    Returns the copies that failed.
+    """
+    semaphore = asyncio.Semaphore(settings.MINIO_COPY_CONCURRENCY)
 
-    session.commit()
-    return {"message": "All documents deleted successfully"}
+    async def copy_one(source_id: int, target_id: int, name: str) -> Optional[Dict[str, Any]]:
+        async with semaphore:
+            try:
+                await run_in_threadpool(
+                    minio_client.client.copy_object,
+                    minio_client.bucket_name,
+                    f"{target_id}/{name}",
+                    CopySource(minio_client.bucket_name, f"{source_id}/{name}"),
+                )
+                return None
+            except Exception as e:
+                logging.error(f"Error copying file {source_id}/{name}: {e}")
+                return {"document_id": source_id, "name": name, "error": str(e)}
+
+    results = await asyncio.gather(*(copy_one(*file) for file in files))
+    return [failure for failure in results if failure]
 
-@router.post("/transfer")
-def transfer_documents(
+@router.post("/transfer", response_model=DocumentTransferResult)
+async def transfer_documents(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     target_workspace_id: int,
     document_ids: List[int],
     copy: bool = False
 ) -> Any:
-    """Transfer or copy documents to another workspace"""
-    # Check source workspace access
-    source_workspace = session.get(Workspace, workspace_id)
-    if not source_workspace or source_workspace.user_id_ownership != current_user.id:
-        raise HTTPException(status_code=404, detail="Source workspace not found")
-
-    # Check target workspace access
-    target_workspace = session.get(Workspace, target_workspace_id)
-    if not target_workspace or target_workspace.user_id_ownership != current_user.id:
+    """
+    Transfer or copy documents to another workspace.
+    A move is a single UPDATE. A copy reserves new IDs up front, copies the stored files
+    concurrently, then inserts documents and files with INSERT ... SELECT in one short transaction.
+    Content-addressed files are shared by the copies rather than copied.
+    Documents whose content the target workspace already has are left out and reported in `duplicates`.
+    """
+    # The source workspace is checked by WorkspaceDep, the target here
+    target_workspace = await session.get(Workspace, target_workspace_id)
+    if not target_workspace or target_workspace.user_id_ownership != access.user_id:
         raise HTTPException(status_code=404, detail="Target workspace not found")
 
+    requested = list(dict.fromkeys(document_ids))
+    copied_objects: List[str] = []
+    # Index rows that follow their documents, chunks only exist with pgvector
+    index_models = [DocumentChunk, DocumentMinHash] if await vector_index_available(session) else [DocumentMinHash]
+    in_source = and_(Document.id == any_(id_array(requested)), Document.workspace_id == workspace_id)
+
     try:
-        for doc_id in document_ids:
-            document = session.get(Document, doc_id)
-            if not document or document.workspace_id != workspace_id:
-                continue
-
-            if copy:
-                # Create a new document with the same data
-                new_doc = Document(
-                    title=document.title,
-                    url=document.url,
-                    content_type=document.content_type,
-                    source=document.source,
-                    text_content=document.text_content,
-                    summary=document.summary,
-                    top_image=document.top_image,
-                    workspace_id=target_workspace_id,
-                    user_id=current_user.id,
-                    insertion_date=datetime.now(timezone.utc)
+        existing = aliased(Document)
+        duplicates = dict((await session.execute(
+            select(Document.id, existing.id)
+            .join(existing, and_(
+                existing.workspace_id == target_workspace_id,
+                existing.content_hash == Document.content_hash
+            ))
+            .where(in_source)
+        )).all())
+        if duplicates:
+            in_source = and_(in_source, Document.id.not_in(list(duplicates)))
+
+        if not copy:
+            moved = (await session.execute(
+                update(Document)
+                .where(in_source)
+                .values(workspace_id=target_workspace_id)
+                .returning(Document.id)
+            )).scalars().all()
+            for index_model in index_models:
+                await session.execute(
+                    update(index_model)
+                    .where(index_model.document_id == any_(id_array(list(moved))))
+                    .values(workspace_id=target_workspace_id)
+                )
+            await session.commit()
+            id_mapping = {document_id: document_id for document_id in moved}
+            failed_files = []
+        else:
+            # nextval isn't transactional, so IDs can be reserved before anything is written
+            document_table = Document.__table__
+            id_mapping = dict((await session.execute(
+                select(Document.id, func.nextval(func.pg_get_serial_sequence("document", "id")))
+                .where(in_source)
+                .order_by(Document.id)
+            )).all())
+            # Only files from before content addressing have per-document objects to copy
+            stored_files = (await session.execute(
+                select(FileModel.document_id, FileModel.name)
+                .where(
+                    FileModel.document_id == any_(id_array(list(id_mapping))),
+                    FileModel.sha256.is_(None)
+                )
+            )).all()
+            # End the read transaction so no connection is held during the copies
+            await session.commit()
+
+            failed_files = await copy_stored_files(
+                [(source_id, id_mapping[source_id], name) for source_id, name in stored_files]
+            )
+            failed = {(failure["document_id"], failure["name"]) for failure in failed_files}
+            copied_objects = [
+                f"{id_mapping[source_id]}/{name}"
+                for source_id, name in stored_files if (source_id, name) not in failed
+            ]
+
+            # The copied rows share their source's blobs
+            await session.execute(
+                select(func.pg_advisory_xact_lock_shared(blob_lock_key(FileModel.sha256)))
+                .where(FileModel.document_id == any_(id_array(list(id_mapping))), FileModel.sha256.isnot(None))
+            )
+            mapping = func.unnest(
+                id_array(list(id_mapping)), id_array(list(id_mapping.values()))
+            ).table_valued("old_id", "new_id").render_derived("id_mapping")
+            document_columns = copied_columns(document_table, "id", "workspace_id", "user_id", "insertion_date")
+            await session.execute(
+                insert(Document).from_select(
+                    ["id", "workspace_id", "user_id", "insertion_date", *document_columns],
+                    select(
+                        mapping.c.new_id,
+                        literal(target_workspace_id),
+                        literal(access.user_id),
+                        literal(datetime.now(timezone.utc)),
+                        *(document_table.c[name] for name in document_columns)
+                    ).join_from(document_table, mapping, document_table.c.id == mapping.c.old_id)
+                )
+            )
+            file_table = FileModel.__table__
+            file_columns = copied_columns(file_table, "id", "document_id")
+            copied_file = file_table.c.document_id == mapping.c.old_id
+            if failed:
+                copied_file = and_(
+                    copied_file,
+                    tuple_(file_table.c.document_id, file_table.c.name).not_in(list(failed))
+                )
+            await session.execute(
+                insert(FileModel).from_select(
+                    ["document_id", *file_columns],
+                    select(mapping.c.new_id, *(file_table.c[name] for name in file_columns))
+                    .join_from(file_table, mapping, copied_file)
+                )
+            )
+            # Copies have the same text, so their embeddings and signatures are copied rather than recomputed
+            for index_model in index_models:
+                index_table = index_model.__table__
+                index_columns = copied_columns(index_table, "id", "document_id", "workspace_id")
+                await session.execute(
+                    insert(index_model).from_select(
+                        ["document_id", "workspace_id", *index_columns],
+                        select(
+                            mapping.c.new_id,
+                            literal(target_workspace_id),
+                            *(index_table.c[name] for name in index_columns)
+                        ).join_from(index_table, mapping, index_table.c.document_id == mapping.c.old_id)
+                    )
                 )
-                session.add(new_doc)
-                session.flush()  # Flush to get the new document ID
-
-                # Copy associated files
-                for file in document.files:
-                    # Copy file in MinIO
-                    try:
-                        source_object = f"{document.id}/{file.name}"
-                        target_object = f"{new_doc.id}/{file.name}"
-                        
-                        # Copy the object in MinIO
-                        minio_client.client.copy_object(
-                            minio_client.bucket_name,
-                            target_object,
-                            f"{minio_client.bucket_name}/{source_object}"
-                        )
-                        
-                        # Create new file record
-                        new_file = FileModel(
-                            name=file.name,
-                            filetype=file.filetype,
-                            size=file.size,
-                            document_id=new_doc.id
-                        )
-                        session.add(new_file)
-                    except Exception as e:
-                        logging.error(f"Error copying file {file.name}: {e}")
-            else:
-                # Move the document
-                document.workspace_id = target_workspace_id
-                session.add(document)
-
-        session.commit()
-        return {"message": f"Documents {'copied' if copy else 'moved'} successfully"}
+            await session.commit()
+
+        skipped = [
+            document_id for document_id in requested
+            if document_id not in id_mapping and document_id not in duplicates
+        ]
+        return DocumentTransferResult(
+            message=f"Documents {'copied' if copy else 'moved'} successfully",
+            id_mapping=id_mapping,
+            skipped=skipped,
+            duplicates=duplicates,
+            failed_files=failed_files
+        )
     except Exception as e:
-        session.rollback()
+        await session.rollback()
         logging.error(f"Error transferring documents: {e}")
+        if copy and copied_objects:
+            # The copies have no rows pointing at them anymore
+            await run_in_threadpool(remove_stored_objects, copied_objects)
         raise HTTPException(
             status_code=500,
             detail=f"Failed to {'copy' if copy else 'move'} documents"
@@ -449,24 +968,25 @@ def transfer_documents(
 @router.post("/{document_id}/extract_pdf_content")
 async def extract_pdf_content(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
     document_id: int,
-    file_id: int
+    file_id: int,
+    background_tasks: BackgroundTasks
 ) -> Any:
     """Extract text content from a PDF file and update the document using PyMuPDF"""
     # Verify permissions
-    document = session.get(Document, document_id)
+    document = await session.get(Document, document_id)
     if (
         not document
         or document.workspace_id != workspace_id
-        or document.user_id != current_user.id
+        or document.user_id != access.user_id
     ):
         raise HTTPException(status_code=404, detail="Document not found")
 
     # Get the file
-    file = session.get(FileModel, file_id)
+    file = await session.get(FileModel, file_id)
     if not file or file.document_id != document_id:
         raise HTTPException(status_code=404, detail="File not found")
 
@@ -474,27 +994,14 @@ async def extract_pdf_content(
         raise HTTPException(status_code=400, detail="File is not a PDF")
 
     try:
-        # Get the PDF from MinIO
-        object = minio_client.client.get_object(
-            bucket_name=minio_client.bucket_name,
-            object_name=f"{document.id}/{file.name}",
-        )
-        pdf_data = object.read()
-        
-        # Extract text using PyMuPDF
-        with fitz.open(stream=pdf_data, filetype="pdf") as doc:
-            text_content = ""
-            for page in doc:
-                page_text = page.get_text()
-                # Clean the text by removing NULL bytes and other problematic characters
-                cleaned_text = page_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
-                text_content += cleaned_text + "\n"
+        extraction = await extract_stored_pdf(stored_object_name(document.id, file.name, file.sha256))
+        text_content = extraction.text_content
 
         # Update document
         document.text_content = text_content
         session.add(document)
-        session.commit()
-        session.refresh(document)
+        await session.commit()
+        background_tasks.add_task(index_documents, [document.id])
 
         return {"message": "PDF content extracted successfully", "text_content": text_content}
 
@@ -502,12 +1009,65 @@ async def extract_pdf_content(
         logging.error(f"Error extracting PDF content with PyMuPDF: {e}")
         raise HTTPException(status_code=500, detail="Failed to extract PDF content")
 
+@router.post("/extraction-jobs", response_model=PdfExtractionJobStatus, status_code=202)
+async def create_pdf_extraction_job(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    job_in: PdfExtractionJobCreate,
+    background_tasks: BackgroundTasks
+) -> PdfExtractionJobStatus:
+    """
+    Queue text extraction for many PDF files at once.
+    Results are written to each file's document, poll `/extraction-jobs/{job_id}` for progress.
+    """
+    statement = (
+        select(FileModel)
+        .join(Document, FileModel.document_id == Document.id)
+        .where(
+            FileModel.id.in_(job_in.file_ids),
+            Document.workspace_id == workspace_id,
+            Document.user_id == access.user_id
+        )
+    )
+    files = (await session.exec(statement)).all()
+    if len(files) != len(set(job_in.file_ids)):
+        raise HTTPException(status_code=404, detail="File not found")
+    if any(not (file.filetype or "").lower().endswith("pdf") for file in files):
+        raise HTTPException(status_code=400, detail="File is not a PDF")
+
+    return start_pdf_extraction_job(
+        background_tasks,
+        workspace_id,
+        [(file.document_id, stored_object_name(file.document_id, file.name, file.sha256)) for file in files],
+        autofill=job_in.autofill
+    )
+
+@router.get("/extraction-jobs/{job_id}", response_model=PdfExtractionJobStatus)
+async def get_pdf_extraction_job(
+    *,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
+    workspace_id: int,
+    job_id: str
+) -> PdfExtractionJobStatus:
+    """
+    Progress of an extraction job started on this worker.
+    """
+    status = pdf_extraction_jobs.get((workspace_id, job_id))
+    if not status:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return status
+
 @router.post("/bulk-upload", response_model=List[DocumentRead])
 async def bulk_upload_documents(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    access: WorkspaceDep,
     workspace_id: int,
+    response: Response,
+    background_tasks: BackgroundTasks,
     autofill: bool = Form(False),
     files: List[UploadFile] = File(...),
     content_type: str = Form("Document"),
@@ -516,127 +1076,86 @@ async def bulk_upload_documents(
     """
     Bulk upload multiple PDF documents with optional metadata autofill.
     
-    If autofill is True, the system will attempt to extract metadata from each PDF.
+    Files are stored and the documents returned right away. If autofill is True,
+    text, title and summary are extracted in a background job whose ID is sent
+    in the `X-Extraction-Job-Id` header, poll `/extraction-jobs/{job_id}` for progress.
+
+    Files already in the workspace are not added again, their existing documents are
+    returned and listed in the `X-Duplicate-Of` header.
     """
     logging.info(f"Bulk uploading {len(files)} documents to workspace {workspace_id}")
     
     try:
-        # Verify workspace exists and user has access
-        workspace = session.get(Workspace, workspace_id)
-        if not workspace or workspace.user_id_ownership != current_user.id:
-            raise HTTPException(status_code=404, detail="Workspace not found")
-        
-        created_documents = []
+        document_ids = []
+        created_ids = []
+        duplicate_ids = []
+        extraction_files = []
         
         for file in files:
             try:
-                # Default values
-                title = file.filename
-                text_content = None
-                summary = None
-                
-                # If autofill is enabled and file is PDF, extract metadata
-                if autofill and file.filename.lower().endswith('.pdf'):
-                    # Reset file position to beginning
-                    await file.seek(0)
-                    
-                    # Call the metadata extraction endpoint
-                    contents = await file.read()
-                    
-                    with fitz.open(stream=contents, filetype="pdf") as doc:
-                        # Extract metadata
-                        metadata = doc.metadata
-                        
-                        # Extract first page text for potential title extraction
-                        first_page_text = ""
-                        if doc.page_count > 0:
-                            first_page = doc[0]
-                            first_page_text = first_page.get_text()
-                        
-                        # Try to extract title from metadata or first page
-                        extracted_title = metadata.get("title", "")
-                        if not extracted_title and first_page_text:
-                            # If no title in metadata, try to extract from first page
-                            # Get first non-empty line that's not too long (likely a title)
-                            lines = [line.strip() for line in first_page_text.split('\n') if line.strip()]
-                            if lines and len(lines[0]) < 100:  # Assume title is not extremely long
-                                extracted_title = lines[0]
-                        
-                        if extracted_title:
-                            title = extracted_title
-                        
-                        # Extract text content from all pages
-                        text_content = ""
-                        for page in doc:
-                            page_text = page.get_text()
-                            # Clean the text by removing NULL bytes and other problematic characters
-                            cleaned_text = page_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
-                            text_content += cleaned_text + "\n"
-                        
-                        # Create a summary from the first few paragraphs
-                        paragraphs = [p for p in text_content.split('\n\n') if p.strip()]
-                        if paragraphs:
-                            # Use first paragraph or first 500 chars as summary
-                            summary_text = paragraphs[0][:500] + ("..." if len(paragraphs[0]) > 500 else "")
-                            # Clean the summary text
-                            summary = summary_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
-                    
-                    # Reset file position for later upload
-                    await file.seek(0)
-                
+                # Store the file under its content address first, the document row refers to it
+                sha256 = await run_in_threadpool(file_sha256, file.file)
+                await lock_blob(session, sha256)
+                object_name = await minio_client.store_file(file, sha256)
+
                 # Create document
                 document_data = {
-                    "title": title,
+                    "content_hash": document_content_hash(file_digests=[sha256]),
+                    "title": file.filename,
                     "content_type": content_type,
                     "source": source,
-                    "text_content": text_content,
-                    "summary": summary,
                     "insertion_date": datetime.now(timezone.utc),
                     "workspace_id": workspace_id,
-                    "user_id": current_user.id
+                    "user_id": access.user_id
                 }
                 
-                document = Document(**document_data)
-                session.add(document)
-                session.flush()  # Flush to get the document ID
+                document_id, created = await insert_document(session, document_data)
+                if document_id not in document_ids:
+                    document_ids.append(document_id)
+                if not created:
+                    logging.info(f"File {file.filename} duplicates document {document_id}, skipping.")
+                    duplicate_ids.append(document_id)
+                    continue
                 
-                # Upload file to MinIO
-                try:
-                    object_name = f"{document.id}/{file.filename}"
-                    minio_client = MinioClient()
-                    await minio_client.upload_file(file, object_name)
-                    
-                    # Create file record
-                    file_model = FileModel(
-                        name=file.filename, 
-                        filetype=file.content_type, 
-                        size=file.size, 
-                        document_id=document.id
-                    )
-                    session.add(file_model)
-                    
-                except Exception as e:
-                    logging.error(f"Error uploading file {file.filename}: {e}")
-                    # Continue with next file even if this one fails
+                # Create file record
+                file_model = FileModel(
+                    name=file.filename, 
+                    filetype=file.content_type, 
+                    size=file.size, 
+                    sha256=sha256,
+                    document_id=document_id
+                )
+                session.add(file_model)
                 
-                created_documents.append(document)
+                if autofill and file.filename.lower().endswith('.pdf'):
+                    extraction_files.append((document_id, object_name))
+                
+                created_ids.append(document_id)
                 
             except Exception as e:
                 logging.error(f"Error processing file {file.filename}: {e}")
                 # Continue with next file even if this one fails
         
         # Commit all successful documents
-        session.commit()
+        await session.commit()
         
-        # Refresh all documents to get their complete data
-        for doc in created_documents:
-            session.refresh(doc)
+        if extraction_files:
+            job = start_pdf_extraction_job(background_tasks, workspace_id, extraction_files, autofill=True)
+            response.headers["X-Extraction-Job-Id"] = job.job_id
+        else:
+            # Extraction jobs index their documents once the text is in
+            background_tasks.add_task(index_documents, created_ids)
+        if duplicate_ids:
+            response.headers["X-Duplicate-Of"] = ",".join(str(document_id) for document_id in duplicate_ids)
         
-        return created_documents
+        # Reload all documents with their files
+        return await load_document_reads(session, document_ids)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error in bulk upload: {e}")
-        session.rollback()
+        await session.rollback()
         raise HTTPException(status_code=400, detail=str(e))
     
 
@@ -644,63 +1163,19 @@ async def bulk_upload_documents(
 async def extract_document_metadata_from_pdf(
     *,
     file: UploadFile = File(...),
+    include_text: bool = True,
 ) -> Any:
     """
     Extract metadata from a PDF file to pre-fill document creation form.
     Returns title, text content, summary, etc. extracted from the PDF.
+    With `include_text=false` only the first page is read, enough for title and summary.
     """
     if not file.filename.lower().endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
     try:
-        contents = await file.read()
-        
-        with fitz.open(stream=contents, filetype="pdf") as doc:
-            # Extract metadata
-            metadata = doc.metadata
-            
-            # Extract first page text for potential title extraction
-            first_page_text = ""
-            if doc.page_count > 0:
-                first_page = doc[0]
-                first_page_text = first_page.get_text()
-            
-            # Try to extract title from metadata or first page
-            title = metadata.get("title", "")
-            if not title and first_page_text:
-                # If no title in metadata, try to extract from first page
-                # Get first non-empty line that's not too long (likely a title)
-                lines = [line.strip() for line in first_page_text.split('\n') if line.strip()]
-                if lines and len(lines[0]) < 100:  # Assume title is not extremely long
-                    title = lines[0]
-            
-            # Extract text content from all pages
-            text_content = ""
-            for page in doc:
-                page_text = page.get_text()
-                # Clean the text by removing NULL bytes and other problematic characters
-                cleaned_text = page_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
-                text_content += cleaned_text + "\n"
-            
-            # Create a summary from the first few paragraphs
-            summary = ""
-            paragraphs = [p for p in text_content.split('\n\n') if p.strip()]
-            if paragraphs:
-                # Use first paragraph or first 500 chars as summary
-                summary_text = paragraphs[0][:500] + ("..." if len(paragraphs[0]) > 500 else "")
-                # Clean the summary text
-                summary = summary_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
-            
-            return {
-                "title": title or file.filename.replace(".pdf", ""),
-                "author": metadata.get("author", ""),
-                "subject": metadata.get("subject", ""),
-                "keywords": metadata.get("keywords", ""),
-                "text_content": text_content,
-                "summary": summary,
-                "page_count": doc.page_count
-            }
-            
+        extraction = await extract_upload(file.file, max_pages=None if include_text else 1)
+        return extraction.as_metadata(file.filename)
     except Exception as e:
         logging.error(f"Error extracting PDF metadata: {e}")
         raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
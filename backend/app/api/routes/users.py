@@ -8,6 +8,7 @@ from app.api.deps import (
     CurrentUser,
     SessionDep,
     get_current_active_superuser,
+    invalidate_user_access,
 )
 from app.core.config import settings
 from app.core.security import get_password_hash, verify_password
@@ -190,6 +191,8 @@ def update_user(
             )
 
     db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    # Deactivation has to take effect before cached authorizations expire
+    invalidate_user_access(user_id)
     return db_user
 
 
@@ -216,4 +219,5 @@ def delete_user(
     session.exec(statement)  # type: ignore
     session.delete(user)
     session.commit()
+    invalidate_user_access(user_id)
     return Message(message="User deleted successfully")
@@ -1,6 +1,5 @@
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
 from pydantic.networks import EmailStr
-import fitz
 from io import BytesIO
 from typing import Dict, Any, Optional
 
@@ -8,6 +7,8 @@ from app.api.deps import get_current_active_superuser
 from app.models import Message
 from app.utils import generate_test_email, send_email
 from app.core.opol_config import opol 
+from app.core.pdf_extraction import extract_upload
+from app.core.security import password_hasher
 
 router = APIRouter(prefix="/utils", tags=["Utilities"])
 
@@ -30,6 +31,18 @@ def test_email(email_to: EmailStr) -> Message:
     return Message(message="Test email sent")
 
 
+@router.get(
+    "/password-hashing/stats",
+    dependencies=[Depends(get_current_active_superuser)],
+)
+def password_hashing_stats() -> Dict[str, Any]:
+    """
+    Password hashing threads of this worker: calls running and queued, completed and rejected.
+    A queue that stays non-empty means logins wait on bcrypt.
+    """
+    return password_hasher.stats()
+
+
 @router.get('/healthz')
 def healthz():
     return {"status": "ok"}, 200
@@ -51,68 +64,26 @@ async def extract_pdf_text(
         return {"error": "Only PDF files are supported"}
     
     try:
-        contents = await file.read()
-        text = ""
-        with fitz.open(stream=contents, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text() + "\n"
-        return {"text": text}
+        extraction = await extract_upload(file.file)
+        return {"text": extraction.text_content, "page_offsets": extraction.page_offsets}
     except Exception as e:
         return {"error": f"PDF processing failed: {str(e)}"}
 
 @router.post("/extract-pdf-metadata")
 async def extract_pdf_metadata(
     file: UploadFile = File(...),
+    include_text: bool = True,
 ):
-    """Extract metadata from PDF including title, author, etc."""
+    """
+    Extract metadata from PDF including title, author, etc.
+    With `include_text=false` only the first page is read, enough for title and summary.
+    """
     if not file.filename.lower().endswith(".pdf"):
         raise HTTPException(status_code=400, detail="Only PDF files are supported")
     
     try:
-        contents = await file.read()
-        with fitz.open(stream=contents, filetype="pdf") as doc:
-            # Extract metadata
-            metadata = doc.metadata
-            
-            # Extract first page text for potential title extraction
-            first_page_text = ""
-            if doc.page_count > 0:
-                first_page = doc[0]
-                first_page_text = first_page.get_text()
-            
-            # Try to extract title from metadata or first page
-            title = metadata.get("title", "")
-            if not title and first_page_text:
-                # If no title in metadata, try to extract from first page
-                # Get first non-empty line that's not too long (likely a title)
-                lines = [line.strip() for line in first_page_text.split('\n') if line.strip()]
-                if lines and len(lines[0]) < 100:  # Assume title is not extremely long
-                    title = lines[0]
-            
-            # Extract text content from all pages
-            text_content = ""
-            for page in doc:
-                text_content += page.get_text() + "\n"
-            
-            # Create a summary from the first few paragraphs
-            summary = ""
-            paragraphs = [p for p in text_content.split('\n\n') if p.strip()]
-            if paragraphs:
-                # Use first paragraph or first 500 chars as summary
-                summary = paragraphs[0][:500] + ("..." if len(paragraphs[0]) > 500 else "")
-            
-            return {
-                "title": title or file.filename.replace(".pdf", ""),
-                "author": metadata.get("author", ""),
-                "subject": metadata.get("subject", ""),
-                "keywords": metadata.get("keywords", ""),
-                "creator": metadata.get("creator", ""),
-                "producer": metadata.get("producer", ""),
-                "text_content": text_content,
-                "summary": summary,
-                "page_count": doc.page_count
-            }
-            
+        extraction = await extract_upload(file.file, max_pages=None if include_text else 1)
+        return extraction.as_metadata(file.filename)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"PDF processing failed: {str(e)}")
 
@@ -1,12 +1,14 @@
 from typing import Any, List, Optional
 from datetime import datetime, timezone
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
 from sqlmodel import Session, select
-from sqlalchemy import func
+from sqlalchemy import delete, func
 
-from app.api.deps import CurrentUser, SessionDep
+from app.api.deps import CurrentUser, SessionDep, invalidate_workspace_access
+from app.core.storage import remove_stored_files, stored_objects_statement
 from app.models import (
+    Document,
     Workspace,
     WorkspaceCreate,
     WorkspaceRead,
@@ -97,6 +99,7 @@ def update_workspace(
     session.add(workspace)
     session.commit()
     session.refresh(workspace)
+    invalidate_workspace_access(workspace_id)
     return workspace
 
 @router.delete("/{workspace_id}")
@@ -105,15 +108,20 @@ def delete_workspace(
     session: SessionDep,
     current_user: CurrentUser,
     workspace_id: int,
+    background_tasks: BackgroundTasks,
 ) -> Any:
     """
     Delete a workspace.
+    Documents, schemes and results cascade in the database, stored files are removed in the background.
     """
     workspace = session.get(Workspace, workspace_id)
     if not workspace or workspace.user_id_ownership != current_user.id:
         raise HTTPException(status_code=404, detail="Workspace not found")
-    session.delete(workspace)
+    stored = session.execute(stored_objects_statement(Document.workspace_id == workspace_id)).all()
+    session.execute(delete(Workspace).where(Workspace.uid == workspace_id))
     session.commit()
+    invalidate_workspace_access(workspace_id)
+    background_tasks.add_task(remove_stored_files, stored)
     return {"message": "Workspace deleted successfully"}
 
 @router.post("/ensure-default", response_model=WorkspaceRead)
@@ -4,7 +4,7 @@ from ..locations.services import update_leaders
 from ..locations.schemas import CountryRequest, CountryResponse, Law
 import logging
 import json
-import requests
+import httpx
 from pathlib import Path
 from typing import List
 from ..locations.country_services import legislation, economy
@@ -13,6 +13,9 @@ import tavily
 from enum import Enum
 from typing import Optional
 
+from app.core import http_client
+from app.core.config import settings
+
 BASE_DIR = Path(__file__).resolve().parent.parent.parent.parent
 
 logging.basicConfig(level=logging.INFO)
@@ -45,17 +48,20 @@ async def get_location_articles(
 
 @router.get("/geojson/")
 async def geojson_view():
-    request = requests.get("http://api.opol.io/geo-service/geojson", verify=False)
+    request = await http_client.get("http://api.opol.io/geo-service/geojson")
     return request.json()
 
 @router.get("/{entity_name}/articles", response_model=None)
 async def get_entity_articles(entity_name: str, skip: int = 0, limit: int = 50):
     try:
         logger.info(f"Fetching articles for entity: {entity_name}")
-        response = requests.get(f"http://api.opol.io/postgres-service/articles_by_entity/{entity_name}?skip={skip}&limit={limit}")
+        response = await http_client.get(
+            f"http://api.opol.io/postgres-service/articles_by_entity/{entity_name}",
+            params={"skip": skip, "limit": limit}
+        )
         response.raise_for_status()
         return JSONResponse(content=response.json(), status_code=200)
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching location entities: {str(e)}")
         return JSONResponse(content={'error': 'Failed to fetch location entities'}, status_code=500)
 
@@ -118,11 +124,11 @@ async def get_entity_score_over_time(
         
         logger.info(f"Sending request to postgres_service with payload: {payload}")
         
-        response = requests.post(
+        # A read despite the POST, so it is retried like one
+        response = await http_client.post(
             "http://api.opol.io/postgres-service/entity_score_over_time",
             json=payload,
-            headers={'Content-Type': 'application/json'},
-            verify=False
+            retries=settings.UPSTREAM_RETRIES
         )
         
         # Log the raw response
@@ -140,7 +146,7 @@ async def get_entity_score_over_time(
             
         return JSONResponse(content=data, status_code=200)
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching entity scores: {str(e)}")
         return JSONResponse(
             content={'error': f'Failed to fetch entity scores: {str(e)}'},
@@ -168,15 +174,14 @@ async def get_top_entities_by_score(
             "limit": limit
         }
         
-        response = requests.get(
+        response = await http_client.get(
             "http://api.opol.io/postgres-service/top_entities_by_score",
-            params=params,
-            verify=False
+            params=params
         )
         response.raise_for_status()
         return JSONResponse(content=response.json(), status_code=200)
         
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching top entities: {str(e)}")
         return JSONResponse(
             content={'error': 'Failed to fetch top entities'},
@@ -5,6 +5,8 @@ from typing import Optional, List, Dict, Any
 from enum import Enum
 from datetime import datetime, timedelta
 
+from app.core import http_client
+
 logger = logging.getLogger(__name__)
 
 class SearchType(str, Enum):
@@ -59,31 +61,30 @@ async def get_contents(
         else:
             raise HTTPException(status_code=400, detail="Invalid search type")
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            response = await client.get(endpoint, params=params)
-            response.raise_for_status()
-            
-            contents = response.json()
-            
-            # Add metadata and statistics
-            result = {
-                "location": location,
-                "total_results": len(contents),
-                "skip": skip,
-                "limit": limit,
-                "search_type": search_type,
-                "query_params": {
-                    "date_from": date_from,
-                    "date_to": date_to,
-                    "content_type": content_type,
-                    "min_relevance": min_relevance
-                },
-                "contents": contents,
-                "statistics": calculate_statistics(contents)
-            }
+        response = await http_client.get(endpoint, params=params)
+        response.raise_for_status()
+        
+        contents = response.json()
+        
+        # Add metadata and statistics
+        result = {
+            "location": location,
+            "total_results": len(contents),
+            "skip": skip,
+            "limit": limit,
+            "search_type": search_type,
+            "query_params": {
+                "date_from": date_from,
+                "date_to": date_to,
+                "content_type": content_type,
+                "min_relevance": min_relevance
+            },
+            "contents": contents,
+            "statistics": calculate_statistics(contents)
+        }
 
-            logger.info(f"Retrieved {len(contents)} articles for location '{location}'")
-            return result
+        logger.info(f"Retrieved {len(contents)} articles for location '{location}'")
+        return result
 
     except httpx.HTTPError as e:
         logger.error(f"HTTP error occurred while fetching contents: {e}")
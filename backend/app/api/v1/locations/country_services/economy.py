@@ -4,9 +4,10 @@ from typing import List
 import sdmx
 from fastapi import Query
 import logging
-import aiohttp
 from functools import lru_cache
 
+from app.core import http_client
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -97,39 +98,38 @@ async def get_econ_data(state: str, indicators: List[str] = Query(["B1GQ+B1GQ"])
     url = f'https://sdmx.oecd.org/public/rest/data/OECD.SDD.NAD,DSD_NAAG@DF_NAAG_I,1.0/A.{iso_code}.{indicators_query}..?startPeriod=2000&dimensionAtObservation=AllDimensions'
     logger.debug(f"Constructed URL: {url}")
     
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers={'Accept': 'application/vnd.sdmx.data+json; charset=utf-8; version=1.0'}) as response:
-            logger.info(f"API response status code: {response.status}")
-            
-            if response.status == 200:
-                data = await response.json()
-                logger.debug(f"Received data structure: {data.keys()}")
-                
-                observations = data['data']['dataSets'][0]['observations']
-                time_periods = data['data']['structure']['dimensions']['observation'][5]['values']
-                
-                logger.debug(f"Number of observations: {len(observations)}")
-                logger.debug(f"Number of time periods: {len(time_periods)}")
-                
-                formatted_data = []
-                for i, period in enumerate(time_periods):
-                    period_data = {'name': period['name']}
-                    for index, indicator in enumerate(indicators):
-                        sdmx_code = sdmx_indicators[index]
-                        key = f'0:0:{index}:{index}:0:{i}'
-                        value = observations.get(key, [None])[0]
-                        logger.debug(f"Period: {period['name']}, Indicator: {indicator}, Key: {key}, Value: {value}")
-                        if value is not None:
-                            period_data[indicator] = value
-                    formatted_data.append(period_data)
-                
-                logger.info(f"Formatted data length: {len(formatted_data)}")
-                return formatted_data
-            else:
-                error_text = await response.text()
-                logger.error(f"Failed to retrieve data: {response.status}")
-                logger.error(f"Response content: {error_text}")
-                return []
+    response = await http_client.get(url, headers={'Accept': 'application/vnd.sdmx.data+json; charset=utf-8; version=1.0'})
+    logger.info(f"API response status code: {response.status_code}")
+    
+    if response.status_code == 200:
+        data = response.json()
+        logger.debug(f"Received data structure: {data.keys()}")
+        
+        observations = data['data']['dataSets'][0]['observations']
+        time_periods = data['data']['structure']['dimensions']['observation'][5]['values']
+        
+        logger.debug(f"Number of observations: {len(observations)}")
+        logger.debug(f"Number of time periods: {len(time_periods)}")
+        
+        formatted_data = []
+        for i, period in enumerate(time_periods):
+            period_data = {'name': period['name']}
+            for index, indicator in enumerate(indicators):
+                sdmx_code = sdmx_indicators[index]
+                key = f'0:0:{index}:{index}:0:{i}'
+                value = observations.get(key, [None])[0]
+                logger.debug(f"Period: {period['name']}, Indicator: {indicator}, Key: {key}, Value: {value}")
+                if value is not None:
+                    period_data[indicator] = value
+            formatted_data.append(period_data)
+        
+        logger.info(f"Formatted data length: {len(formatted_data)}")
+        return formatted_data
+    else:
+        error_text = response.text
+        logger.error(f"Failed to retrieve data: {response.status_code}")
+        logger.error(f"Response content: {error_text}")
+        return []
 
 #  For future 
 #     url_cpi = f'https://sdmx.oecd.org/public/rest/data/OECD.SDD.TPS,DSD_PRICES@DF_PRICES_ALL,/.M.{iso_code}.CPI.PA._T.N.GY?startPeriod=2000&dimensionAtObservation=AllDimensions'
@@ -1,4 +1,5 @@
 from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from fastapi.responses import HTMLResponse
 from fastapi.responses import StreamingResponse
@@ -7,6 +8,7 @@ from .services import update_leaders
 from .schemas import CountryRequest, CountryResponse, Law
 import logging
 import json
+import httpx
 import requests
 from pathlib import Path
 from typing import List
@@ -22,6 +24,9 @@ from io import BytesIO
 from PIL import Image
 from opol import OPOL
 import os
+from app.core import http_client
+from app.core.geo_tiles import compact_feature
+from app.core.config import settings
 
 opol = OPOL(mode=os.getenv("OPOL_MODE"), api_key=os.getenv("OPOL_API_KEY"))
 
@@ -43,7 +48,8 @@ async def get_location_contents(
     Get articles related to a location with basic pagination.
     """
     try:
-        response = opol.articles.by_location(location, skip, limit)
+        # The OPOL client is blocking, keep it off the event loop
+        response = await run_in_threadpool(opol.articles.by_location, location, skip, limit)
         response.raise_for_status()
         
         return JSONResponse(content=response.json(), status_code=200)
@@ -68,7 +74,7 @@ async def get_location_entities_contents(
     Get articles related to a location with basic pagination.
     """
     try:
-        response = opol.articles.by_entity(location, skip, limit)
+        response = await run_in_threadpool(opol.articles.by_entity, location, skip, limit)
         
         return JSONResponse(content=response.json(), status_code=200)
         
@@ -86,17 +92,17 @@ async def get_location_entities_contents(
 async def location_from_query(query: str):
     try:
         # Get location from classification service
-        location_response = requests.get(
-            f"https://api.opol.io/classification-service/location_from_query?query={query}", 
-            verify=False
+        location_response = await http_client.get(
+            "https://api.opol.io/classification-service/location_from_query",
+            params={"query": query}
         )
         location_response.raise_for_status()
         location = location_response.json()
 
         # Get coordinates from geo service
-        geo_response = requests.get(
-            f"https://api.opol.io/geo-service/geocode_location?location={location}", 
-            verify=False
+        geo_response = await http_client.get(
+            "https://api.opol.io/geo-service/geocode_location",
+            params={"location": location}
         )
         geo_response.raise_for_status()
         data = geo_response.json()
@@ -111,7 +117,7 @@ async def location_from_query(query: str):
             "area": data.get('area'),
             "location_type": data.get('location_type', 'locality')  # Add location_type
         }
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Service request failed: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Service request failed: {str(e)}")
     except (KeyError, IndexError, json.JSONDecodeError) as e:
@@ -120,7 +126,7 @@ async def location_from_query(query: str):
 
 @router.get("/geojson/")
 async def geojson_view():
-    request = requests.get("https://api.opol.io/geo-service/geojson", verify=False)
+    request = await http_client.get("https://api.opol.io/geo-service/geojson")
     if request.status_code == 200:
         return request.json()
     else:
@@ -128,7 +134,7 @@ async def geojson_view():
 
 @router.get("/geojson_events")
 async def geojson_events_view(event_type: str = Query(...)):
-    request = requests.get(f"http://api.opol.io/geo-service/geojson_events/{event_type}", verify=False)
+    request = await http_client.get(f"http://api.opol.io/geo-service/geojson_events/{event_type}")
     if request.status_code == 200:
         return request.json()
     else:
@@ -138,14 +144,15 @@ async def geojson_events_view(event_type: str = Query(...)):
 async def dashboard_view():
     try:
         # Update the URL to point to the correct service name or IP address
-        request = requests.get("http://api.opol.io/core_app/", verify=False)
+        request = await http_client.get("http://api.opol.io/core_app/")
         request.raise_for_status()  # Raise an exception for HTTP errors
         
         # Return the raw HTML content
         return HTMLResponse(content=request.text, status_code=200)
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching dashboard data: {str(e)}")
-        raise HTTPException(status_code=request.status_code, detail="Unable to fetch dashboard data")
+        status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 502
+        raise HTTPException(status_code=status_code, detail="Unable to fetch dashboard data")
 
 @router.get("/{location_name}/entities", response_model=None)
 async def get_location_entities(
@@ -155,7 +162,7 @@ async def get_location_entities(
     min_relevance: float = 0.0  # Add minimum relevance threshold
 ):
     try:
-        response = requests.get(
+        response = await http_client.get(
             f"http://api.opol.io/postgres-service/location_entities/{location_name}",
             params={
                 "skip": skip,
@@ -180,7 +187,7 @@ async def get_location_entities(
         } for entity in entities]
         
         return JSONResponse(content=mapped_entities, status_code=200)
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error fetching location entities: {str(e)}")
         return JSONResponse(
             content={'error': 'Failed to fetch location entities'}, 
@@ -234,7 +241,7 @@ async def get_coordinates(location: str, language: str = "en"):
     Fetches the coordinates, bounding box, and location type for a given location.
     """
     try:
-        result = opol.geo.code(location)
+        result = await run_in_threadpool(opol.geo.code, location)
         print(result)
         return result
     except Exception as e:
@@ -242,7 +249,10 @@ async def get_coordinates(location: str, language: str = "en"):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.post("/get_geojson_for_article_ids")
-async def get_geojson_for_article_ids(article_ids: List[str]):
+async def get_geojson_for_article_ids(
+    article_ids: List[str],
+    compact: bool = Query(False, description="Replace each feature's embedded articles with their IDs and a count")
+):
     # Ensure article_ids are strings
     article_ids = [str(article_id) for article_id in article_ids]
     
@@ -250,15 +260,18 @@ async def get_geojson_for_article_ids(article_ids: List[str]):
     logger.debug(f"Sending article_ids: {article_ids}")
 
     # Send the request with the correct headers
-    geojson_data = requests.post(
+    # A read despite the POST, so it is retried like one
+    geojson_data = await http_client.post(
         "http://api.opol.io/geo-service/geojson_by_article_ids",
-        json=article_ids, 
-        headers={"Content-Type": "application/json"},
-        verify=False
+        json=article_ids,
+        retries=settings.UPSTREAM_RETRIES
     )
     
     if geojson_data.status_code == 200:
-        return JSONResponse(content=geojson_data.json(), status_code=200)
+        content = geojson_data.json()
+        if compact and isinstance(content, dict) and content.get("features"):
+            content = {**content, "features": [compact_feature(feature) for feature in content["features"]]}
+        return JSONResponse(content=content, status_code=200)
     else:
         logger.error(f"Failed to fetch GeoJSON data: {geojson_data.text}")
         raise HTTPException(status_code=geojson_data.status_code, detail="Unable to fetch GeoJSON data")
@@ -298,21 +311,24 @@ async def channel_route(service_name: str, path: str, request: Request):
         target_url = f"http://{service_name}/{path}"
         
         # Forward the request to the target service
-        response = requests.request(
-            method=request.method,
-            url=target_url,
+        response = await http_client.request(
+            request.method,
+            target_url,
             headers=request.headers,
             params=request.query_params,
-            data=await request.body(),
-            verify=False
+            content=await request.body()
         )
         
-        # Return the response from the target service
+        # Return the response from the target service. The body is already decoded and
+        # re-framed, so its encoding and length headers no longer apply.
         return Response(
             content=response.content,
             status_code=response.status_code,
-            headers=dict(response.headers)
+            headers={
+                name: value for name, value in response.headers.items()
+                if name.lower() not in ("content-encoding", "content-length", "transfer-encoding", "connection")
+            }
         )
-    except requests.RequestException as e:
+    except httpx.HTTPError as e:
         logger.error(f"Error forwarding request to {service_name}: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Error forwarding request: {str(e)}")
\ No newline at end of file
@@ -8,6 +8,8 @@ from pydantic import BaseModel
 import httpx
 import json
 
+from app.core import http_client
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
@@ -50,17 +52,16 @@ async def get_contents(
             "exclude_keywords": ",".join(exclude_keywords) if exclude_keywords else None,  # Convert list to comma-separated string
         }
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get("http://api.opol.io/postgres-service/contents", params=params)
-            response.raise_for_status()
-            data = response.json()
+        response = await http_client.get("http://api.opol.io/postgres-service/contents", params=params)
+        response.raise_for_status()
+        data = response.json()
+        
+        # Ensure the response data has the expected structure
+        if not isinstance(data, list):
+            logger.error(f"Unexpected response format: {data}")
+            raise HTTPException(status_code=500, detail="Invalid response format from database service")
             
-            # Ensure the response data has the expected structure
-            if not isinstance(data, list):
-                logger.error(f"Unexpected response format: {data}")
-                raise HTTPException(status_code=500, detail="Invalid response format from database service")
-                
-            return JSONResponse(content=data, status_code=200)
+        return JSONResponse(content=data, status_code=200)
             
     except httpx.HTTPError as e:
         logger.error(f"HTTP error occurred while fetching articles: {e}")
@@ -80,10 +81,9 @@ async def get_most_relevant_entities(
     request: MostRelevantEntitiesRequest,
 ):
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post("http://api.opol.io/postgres-service/most_relevant_entities", json=request.dict())
-            response.raise_for_status()
-            return response.json()
+        response = await http_client.post("http://api.opol.io/postgres-service/most_relevant_entities", json=request.dict())
+        response.raise_for_status()
+        return response.json()
     except httpx.HTTPError as e:
         logger.error(f"HTTP error occurred while fetching most relevant entities: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch most relevant entities")
@@ -1,17 +1,27 @@
 from fastapi import APIRouter, Query, Depends, HTTPException, Header
-from typing import Optional, List, Dict, Any, Type, Literal
+from typing import Optional, List, Dict, Any, Type, Literal, Tuple
 from pydantic import BaseModel, Field, create_model, conint, model_validator
 import os
+import time
+import asyncio
+import logging
 from datetime import datetime, timezone
 # from sqlalchemy.orm import Session #Unnecessary import
-from app.models import ClassificationScheme, Document, ClassificationResult, ClassificationResultRead, FieldType, ClassificationField
-from app.api.deps import SessionDep, CurrentUser
+from app.models import ClassificationScheme, Document, ClassificationResult, ClassificationResultRead, FieldType, ClassificationRunStatus
+from app.api.deps import AsyncSessionDep, SessionDep, CurrentUser
+from app.core.cache import LRUCache
+from app.core.classification_cache import cache_key, classification_cache
+from app.core.config import settings
 from app.core.db import engine  # Import the engine
 from sqlmodel import Session  # Import Session from sqlmodel
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
+from sqlmodel.ext.asyncio.session import AsyncSession
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.orm import selectinload
 from app.core.opol_config import opol, available_providers, get_fastclass
 
+logger = logging.getLogger(__name__)
+
 
 router = APIRouter()
 
@@ -151,11 +161,118 @@ def generate_pydantic_model(scheme: ClassificationScheme) -> Type[BaseModel]:
     
     return model
 
+## Compiled models are cached per scheme version. updated_at changes on every
+## scheme update, so a stale entry can never be served; invalidate_scheme_model
+## just frees the memory early.
+_model_cache = LRUCache(maxsize=settings.CLASSIFICATION_MODEL_CACHE_SIZE)
+
+
+def get_pydantic_model(scheme: ClassificationScheme) -> Type[BaseModel]:
+    key = (scheme.id, scheme.updated_at)
+    model = _model_cache.get(key)
+    if model is None:
+        model = generate_pydantic_model(scheme)
+        _model_cache.set(key, model)
+    return model
+
+
+def load_scheme_model(session: Session, scheme_id: int) -> Type[BaseModel]:
+    """
+    Compiled model for a scheme by ID. Looks up the scheme version first and
+    only loads the scheme and its fields when the model isn't cached yet.
+    """
+    updated_at = session.exec(
+        select(ClassificationScheme.updated_at).where(ClassificationScheme.id == scheme_id)
+    ).scalar_one_or_none()
+    if updated_at is None:
+        raise HTTPException(status_code=404, detail=f"Classification scheme with id {scheme_id} not found")
+
+    model = _model_cache.get((scheme_id, updated_at))
+    if model is None:
+        scheme = session.exec(
+            select(ClassificationScheme)
+            .where(ClassificationScheme.id == scheme_id)
+            .options(selectinload(ClassificationScheme.fields))
+        ).scalars().one()
+        model = generate_pydantic_model(scheme)
+        _model_cache.set((scheme_id, updated_at), model)
+    return model
+
+
+def invalidate_scheme_model(scheme_id: int) -> None:
+    _model_cache.pop_where(lambda key: key[0] == scheme_id)
+
+
+def resolve_provider(provider: str | None, model: str | None) -> Tuple[str, str]:
+    """
+    Provider and model that will actually serve a request, honouring LOCAL_LLM.
+    """
+    if os.environ.get("LOCAL_LLM") == "True":
+        return "ollama", os.environ.get("LOCAL_LLM_MODEL", "llama3.2:latest")
+    return provider or "Google", model or "gemini-2.0-flash-exp"
+
+
+def get_classifier(provider: str | None, model: str | None, api_key: str | None = None):
+    """
+    Get a fastclass instance, falling back to the local LLM when LOCAL_LLM is set.
+    """
+    provider, model = resolve_provider(provider, model)
+    if provider == "ollama":
+        return opol.classification(provider="ollama", model_name=model, llm_api_key="")
+    return get_fastclass(provider=provider, model_name=model, api_key=api_key)
+
+
+def cached_classify(
+    session: Session,
+    fastclass,
+    ModelClass: Type[BaseModel],
+    text: str,
+    provider: str,
+    model: str
+) -> Dict[str, Any]:
+    """
+    Classify `text`, reusing a stored output for the same text, scheme definition,
+    provider and model when there is one.
+    """
+    if not settings.CLASSIFICATION_CACHE_ENABLED:
+        return fastclass.classify(ModelClass, "", text).model_dump()
+
+    key = cache_key(text, ModelClass, provider, model)
+    value = classification_cache.get(session, key)
+    if value is None:
+        value = fastclass.classify(ModelClass, "", text).model_dump()
+        classification_cache.set(session, key, value, provider, model)
+    return value
+
+
+def classify_with_cache(
+    ModelClass: Type[BaseModel],
+    text: str,
+    provider: str,
+    model: str,
+    api_key: str | None = None
+) -> Dict[str, Any]:
+    """
+    Blocking classification with its own session, for use from async routes via run_in_threadpool.
+    """
+    fastclass = get_classifier(provider, model, api_key)
+    with Session(engine) as session:
+        return cached_classify(session, fastclass, ModelClass, text, provider, model)
+
+
+@router.get("/cache/stats")
+async def get_cache_stats(session: SessionDep, current_user: CurrentUser):
+    return {
+        "results": classification_cache.stats(session),
+        "models": _model_cache.stats()
+    }
+
+
 @router.post("/{scheme_id}/classify/{document_id}")
 async def classify_document(
     scheme_id: int,
     document_id: int,
-    session: SessionDep,
+    session: AsyncSessionDep,
     current_user: CurrentUser,
     x_api_key: str | None = Header(None, alias="X-API-Key"),
     provider: str | None = Query("Google"),
@@ -164,48 +281,38 @@ async def classify_document(
     run_name: str | None = None,
     run_description: str | None = None
 ) -> ClassificationResultRead:
-    scheme = session.get(ClassificationScheme, scheme_id)
-    document = session.get(Document, document_id)
+    scheme = await session.get(ClassificationScheme, scheme_id, options=[selectinload(ClassificationScheme.fields)])
+    document = await session.get(Document, document_id)
     
     # Check for existing result with the same run_id
     if run_id:
-        existing_result = session.exec(
+        existing_result = (await session.exec(
             select(ClassificationResult)
             .where(
                 ClassificationResult.document_id == document_id,
                 ClassificationResult.scheme_id == scheme_id,
                 ClassificationResult.run_id == run_id
             )
-        ).first()
+        )).scalars().first()
         
         if existing_result:
-            return ClassificationResultRead.model_validate(existing_result)
+            return await _load_result_read(session, existing_result.id)
     
     # Generate dynamic Pydantic model
-    ModelClass = generate_pydantic_model(scheme)
+    ModelClass = get_pydantic_model(scheme)
     
-    # Get fastclass instance with provided API key
-    if os.environ["LOCAL_LLM"] == "True":
-        fastclass = opol.classification(
-            provider="ollama", 
-            model_name=os.environ.get("LOCAL_LLM_MODEL", "llama3.2:latest"), 
-            llm_api_key=""
-        )
-    else:
-        fastclass = get_fastclass(
-            provider=provider,
-            model_name=model,
-            api_key=x_api_key
-        )
-
-    # Classify using OPOL
-    result = fastclass.classify(ModelClass, "", document.text_content)
+    # Classify using OPOL, or reuse a cached output for identical input.
+    # The LLM call blocks, so it runs in the threadpool.
+    provider, model = resolve_provider(provider, model)
+    value = await run_in_threadpool(
+        classify_with_cache, ModelClass, document.text_content, provider, model, x_api_key
+    )
     
     # Store result
     classification_result = ClassificationResult(
         document_id=document_id,
         scheme_id=scheme_id,
-        value=result.model_dump(),
+        value=value,
         timestamp=datetime.now(timezone.utc),
         run_id=run_id,
         run_name=run_name,
@@ -213,108 +320,35 @@ async def classify_document(
     )
     
     session.add(classification_result)
-    session.commit()
-    session.refresh(classification_result)
+    await session.commit()
     
-    return ClassificationResultRead.model_validate(classification_result)
+    return await _load_result_read(session, classification_result.id)
+
+
+async def _load_result_read(session: AsyncSession, result_id: int) -> ClassificationResultRead:
+    result = (await session.exec(
+        select(ClassificationResult)
+        .where(ClassificationResult.id == result_id)
+        .options(
+            selectinload(ClassificationResult.document).selectinload(Document.files),
+            selectinload(ClassificationResult.scheme).selectinload(ClassificationScheme.fields)
+        )
+        .execution_options(populate_existing=True)
+    )).scalars().one()
+    return ClassificationResultRead.model_validate(result)
 
 def classify_text(text: str, scheme_id: int, x_api_key: str | None = Header(None, alias="X-API-Key")) -> Dict:
     try:
         with Session(engine) as session:
-            # Get the classification scheme with its fields
-            statement = select(ClassificationScheme).where(
-                ClassificationScheme.id == scheme_id
-            ).options(
-                joinedload(ClassificationScheme.fields)
-            )
-            scheme = session.exec(statement).first()
-            
-            if not scheme:
-                raise HTTPException(status_code=404, detail=f"Classification scheme with id {scheme_id} not found")
-            
-            # Check if scheme has fields attribute before accessing it
-            has_fields = hasattr(scheme, 'fields') and scheme.fields is not None
-            
-            # If fields attribute is missing, try to load it explicitly
-            if not has_fields:
-                print(f"Fields attribute missing, trying to load fields explicitly for scheme {scheme_id}")
-                # Get fields directly
-                fields_statement = select(ClassificationField).where(
-                    ClassificationField.scheme_id == scheme_id
-                )
-                field_rows = session.exec(fields_statement).all()
-                
-                # Since we can't modify the scheme object directly (it's a SQLAlchemy Row),
-                # we'll create a new ClassificationScheme instance with the same data
-                # Use getattr with default values to handle missing attributes
-                scheme_data = {}
-                
-                # Try to access attributes safely
-                try:
-                    scheme_data["id"] = scheme_id  # Use the provided scheme_id instead of trying to access scheme.id
-                    scheme_data["name"] = getattr(scheme, 'name', f"Scheme {scheme_id}")
-                    scheme_data["description"] = getattr(scheme, 'description', f"Description for scheme {scheme_id}")
-                    scheme_data["model_instructions"] = getattr(scheme, 'model_instructions', None)
-                    scheme_data["validation_rules"] = getattr(scheme, 'validation_rules', None)
-                    scheme_data["workspace_id"] = getattr(scheme, 'workspace_id', 1)  # Default to workspace 1
-                    scheme_data["user_id"] = getattr(scheme, 'user_id', 1)  # Default to user 1
-                    scheme_data["created_at"] = getattr(scheme, 'created_at', datetime.now(timezone.utc))
-                    scheme_data["updated_at"] = getattr(scheme, 'updated_at', datetime.now(timezone.utc))
-                except Exception as attr_error:
-                    print(f"Error accessing scheme attributes: {attr_error}")
-                    # If we can't access attributes, create minimal data
-                    scheme_data = {
-                        "id": scheme_id,
-                        "name": f"Scheme {scheme_id}",
-                        "description": f"Description for scheme {scheme_id}",
-                        "workspace_id": 1,
-                        "user_id": 1,
-                        "created_at": datetime.now(timezone.utc),
-                        "updated_at": datetime.now(timezone.utc)
-                    }
-                
-                # Create a new scheme instance
-                scheme = ClassificationScheme(**scheme_data)
-                
-                # Create proper ClassificationField instances from the raw data
-                fields = []
-                for field_row in field_rows:
-                    try:
-                        field_data = {
-                            "id": getattr(field_row, 'id', None),
-                            "scheme_id": scheme_id,
-                            "name": getattr(field_row, 'name', 'default_field'),
-                            "description": getattr(field_row, 'description', ''),
-                            "type": getattr(field_row, 'type', FieldType.STR),
-                            "scale_min": getattr(field_row, 'scale_min', None),
-                            "scale_max": getattr(field_row, 'scale_max', None),
-                            "is_set_of_labels": getattr(field_row, 'is_set_of_labels', None),
-                            "labels": getattr(field_row, 'labels', None),
-                            "dict_keys": getattr(field_row, 'dict_keys', None),
-                        }
-                        fields.append(ClassificationField(**field_data))
-                    except Exception as field_error:
-                        print(f"Error creating field from row: {field_error}")
-                
-                # Set the fields on the scheme
-                scheme.fields = fields
-                has_fields = len(fields) > 0
-            
-            # Check if scheme has fields, but don't raise an error - we'll create a default model if needed
-            if not has_fields or len(scheme.fields) == 0:
-                print(f"Warning: Classification scheme with id {scheme_id} has no fields defined. Using default model.")
-            
-            # Generate dynamic Pydantic model
-            ModelClass = generate_pydantic_model(scheme)
+            # Compiled model for the scheme, only hits the fields table on a cache miss
+            ModelClass = load_scheme_model(session, scheme_id)
             
             # Get fastclass instance with provided API key
-            fastclass = get_fastclass(x_api_key)
-            
-            # Classify using OPOL
-            result = fastclass.classify(ModelClass, "", text)
+            provider, model = resolve_provider(None, None)
+            fastclass = get_classifier(provider, model, x_api_key)
             
-            # Return the raw model dump to preserve structure
-            return result.model_dump()
+            # Classify using OPOL, returning the raw model dump to preserve structure
+            return cached_classify(session, fastclass, ModelClass, text, provider, model)
     except HTTPException:
         # Re-raise HTTP exceptions
         raise
@@ -326,3 +360,224 @@ def classify_text(text: str, scheme_id: int, x_api_key: str | None = Header(None
 @router.post("/classify")
 async def classify(text: str, scheme_id: int, x_api_key: str | None = Header(None, alias="X-API-Key")):
     return classify_text(text, scheme_id, x_api_key)
+
+
+### Batched classification runs
+## A run classifies a set of documents against one or more schemes in the background.
+## LLM calls go through a bounded pool (CLASSIFICATION_MAX_CONCURRENCY) and a
+## per-provider rate limiter, results are bulk-inserted chunk by chunk.
+
+class ProviderRateLimiter:
+    """
+    Spaces out calls so that at most `per_minute` calls start per minute.
+    A limit of 0 disables throttling.
+    """
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+_rate_limiters: Dict[str, ProviderRateLimiter] = {}
+
+# Runs started on this worker, keyed by (workspace_id, run_id)
+classification_runs = LRUCache(maxsize=1024)
+
+MAX_RUN_ERRORS = 100
+
+
+def get_rate_limiter(provider: str) -> ProviderRateLimiter:
+    # Shared across runs so concurrent runs respect the same provider limit
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        limiter = ProviderRateLimiter(settings.CLASSIFICATION_RATE_LIMITS.get(provider, 0))
+        _rate_limiters[provider] = limiter
+    return limiter
+
+
+def _load_scheme_models(scheme_ids: List[int]) -> Dict[int, Type[BaseModel]]:
+    with Session(engine) as session:
+        schemes = session.exec(
+            select(ClassificationScheme)
+            .where(ClassificationScheme.id.in_(scheme_ids))
+            .options(selectinload(ClassificationScheme.fields))
+        ).scalars().all()
+        return {scheme.id: get_pydantic_model(scheme) for scheme in schemes}
+
+
+def _load_run_chunk(
+    run_id: int, document_ids: List[int], scheme_ids: List[int], sibling_ids: List[int] = ()
+) -> Tuple[List[Tuple[int, str]], set]:
+    """
+    Texts for a chunk of documents and the (document_id, scheme_id) pairs of
+    these documents and their `sibling_ids` that already have a result for this run.
+    """
+    with Session(engine) as session:
+        texts = session.exec(
+            select(Document.id, Document.text_content, Document.title)
+            .where(Document.id.in_(document_ids))
+        ).all()
+        existing = session.exec(
+            select(ClassificationResult.document_id, ClassificationResult.scheme_id)
+            .where(
+                ClassificationResult.run_id == run_id,
+                ClassificationResult.document_id.in_([*document_ids, *sibling_ids]),
+                ClassificationResult.scheme_id.in_(scheme_ids)
+            )
+        ).all()
+    return [(doc_id, text or title) for doc_id, text, title in texts], set(existing)
+
+
+def _lookup_cached_results(keys: List[str]) -> Dict[str, Dict[str, Any]]:
+    with Session(engine) as session:
+        return classification_cache.get_many(session, keys)
+
+
+def _bulk_insert_results(rows: List[Dict[str, Any]], cache_entries: List[Dict[str, Any]]) -> None:
+    with Session(engine) as session:
+        session.execute(insert(ClassificationResult), rows)
+        session.commit()
+        if cache_entries:
+            classification_cache.set_many(session, cache_entries)
+
+
+async def run_classification_batch(
+    status: ClassificationRunStatus,
+    scheme_ids: List[int],
+    document_ids: List[int],
+    run_name: str | None = None,
+    run_description: str | None = None,
+    api_key: str | None = None,
+    siblings: Dict[int, List[int]] | None = None,
+) -> ClassificationRunStatus:
+    """
+    Classify every document in `document_ids` against every scheme in `scheme_ids`.
+    `siblings` maps a document to near duplicates that get a copy of its results
+    instead of being classified themselves. Siblings of a document that already has a
+    result in this run are left alone.
+    Progress is reported on `status`; per-document failures are recorded, not raised.
+    """
+    siblings = siblings or {}
+    status.status = "running"
+    status.started_at = datetime.now(timezone.utc)
+    status.total = (len(document_ids) + sum(len(ids) for ids in siblings.values())) * len(scheme_ids)
+
+    semaphore = asyncio.Semaphore(settings.CLASSIFICATION_MAX_CONCURRENCY)
+    limiter = get_rate_limiter(status.provider)
+
+    def record_error(message: str) -> None:
+        logger.error(f"Classification run {status.run_id}: {message}")
+        if len(status.errors) < MAX_RUN_ERRORS:
+            status.errors.append(message)
+
+    def make_row(document_id: int, scheme_id: int, value: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "document_id": document_id,
+            "scheme_id": scheme_id,
+            "value": value,
+            "timestamp": datetime.now(timezone.utc),
+            "run_id": status.run_id,
+            "run_name": run_name,
+            "run_description": run_description,
+        }
+
+    def copy_to_siblings(row: Dict[str, Any], existing: set) -> List[Dict[str, Any]]:
+        copies = []
+        for sibling_id in siblings.get(row["document_id"], ()):
+            if (sibling_id, row["scheme_id"]) in existing:
+                status.skipped += 1
+                continue
+            status.completed += 1
+            status.copied += 1
+            copies.append(make_row(sibling_id, row["scheme_id"], row["value"]))
+        return copies
+
+    async def classify_one(fastclass, ModelClass, document_id: int, scheme_id: int, text: str):
+        async with semaphore:
+            await limiter.acquire()
+            try:
+                result = await asyncio.to_thread(fastclass.classify, ModelClass, "", text)
+            except Exception as e:
+                status.failed += 1
+                record_error(f"document {document_id}, scheme {scheme_id}: {e}")
+                return None
+        status.completed += 1
+        return make_row(document_id, scheme_id, result.model_dump())
+
+    try:
+        fastclass = get_classifier(status.provider, status.model, api_key)
+        use_cache = settings.CLASSIFICATION_CACHE_ENABLED
+        # Build each scheme's model once for the whole run
+        models = await asyncio.to_thread(_load_scheme_models, scheme_ids)
+        for scheme_id in scheme_ids:
+            if scheme_id not in models:
+                record_error(f"scheme {scheme_id}: not found, its results are counted as failed")
+
+        batch_size = settings.CLASSIFICATION_BATCH_SIZE
+        for start in range(0, len(document_ids), batch_size):
+            chunk_ids = document_ids[start:start + batch_size]
+            sibling_ids = [sibling_id for document_id in chunk_ids for sibling_id in siblings.get(document_id, ())]
+            texts, existing = await asyncio.to_thread(
+                _load_run_chunk, status.run_id, chunk_ids, scheme_ids, sibling_ids
+            )
+
+            pending = []
+            for document_id, text in texts:
+                for scheme_id in scheme_ids:
+                    if (document_id, scheme_id) in existing:
+                        status.skipped += 1 + len(siblings.get(document_id, ()))
+                        continue
+                    ModelClass = models.get(scheme_id)
+                    if ModelClass is None:
+                        # Scheme deleted since the run was queued, fail its items and carry on
+                        status.failed += 1 + len(siblings.get(document_id, ()))
+                        continue
+                    key = cache_key(text, ModelClass, status.provider, status.model) if use_cache else None
+                    pending.append((document_id, scheme_id, ModelClass, text, key))
+
+            cached = {}
+            if use_cache:
+                cached = await asyncio.to_thread(_lookup_cached_results, [key for *_, key in pending])
+
+            rows = []
+            tasks = []
+            task_keys = []
+            for document_id, scheme_id, ModelClass, text, key in pending:
+                if key in cached:
+                    status.completed += 1
+                    rows.append(make_row(document_id, scheme_id, cached[key]))
+                    rows.extend(copy_to_siblings(rows[-1], existing))
+                else:
+                    tasks.append(classify_one(fastclass, ModelClass, document_id, scheme_id, text))
+                    task_keys.append((key, document_id))
+
+            cache_entries = {}
+            for (key, document_id), row in zip(task_keys, await asyncio.gather(*tasks)):
+                if row is None:
+                    # The siblings would have copied this result
+                    status.failed += len(siblings.get(document_id, ()))
+                    continue
+                rows.append(row)
+                rows.extend(copy_to_siblings(row, existing))
+                if key is not None:
+                    cache_entries[key] = {"key": key, "value": row["value"], "provider": status.provider, "model": status.model}
+
+            if rows:
+                await asyncio.to_thread(_bulk_insert_results, rows, list(cache_entries.values()))
+
+        status.status = "completed"
+    except Exception as e:
+        status.status = "failed"
+        record_error(str(e))
+    finally:
+        status.finished_at = datetime.now(timezone.utc)
+
+    return status
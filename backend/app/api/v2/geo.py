@@ -1,9 +1,17 @@
 from opol import OPOL
 import os
-from fastapi import APIRouter, HTTPException, Query
-import requests
+import json
+from fastapi import APIRouter, HTTPException, Path, Query, Response
+from fastapi.concurrency import run_in_threadpool
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.api.deps import CurrentUser
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.geo_tiles import MAX_TILE_ZOOM, ClusterIndex
+from app.core.response_cache import ResponseCache
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +20,57 @@ router = APIRouter()
 opol = OPOL(mode=os.getenv("OPOL_MODE"), api_key=os.getenv("OPOL_API_KEY"))
 # opol = OPOL(mode="container", api_key=os.getenv("OPOL_API_KEY"))
 
+geojson_cache = ResponseCache(
+    maxsize=settings.GEO_CACHE_SIZE,
+    ttl=settings.GEO_CACHE_TTL_SECONDS,
+    stale_ttl=settings.GEO_CACHE_STALE_SECONDS,
+)
+# Cluster indexes by the same keys, rebuilt when the cached response they were built from is replaced
+cluster_indexes = LRUCache(maxsize=settings.GEO_CACHE_SIZE)
+
+
+def normalize_date(value: Optional[str], name: str) -> Optional[str]:
+    """ISO date as UTC, so equivalent spellings share a cache entry. Dates without an offset are taken as UTC."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} format")
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def fetch_geojson_events(event_type: str, start_date: Optional[str], end_date: Optional[str], limit: int):
+    logger.info(f"Fetching GeoJSON data for event_type: {event_type}, start_date: {start_date}, end_date: {end_date}, limit: {limit}")
+
+    geojson_data = opol.geo.json_by_event(
+        event_type=event_type,
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit
+    )
+
+    # Log all dates of all articles retrieved
+    if geojson_data and 'features' in geojson_data:
+        for feature in geojson_data['features']:
+            if 'properties' in feature and 'contents' in feature['properties']:
+                contents = feature['properties']['contents']
+                if isinstance(contents, str):
+                    try:
+                        contents = json.loads(contents)
+                    except Exception as e:
+                        logger.error(f"Error parsing contents JSON: {e}")
+                        contents = []
+
+                if isinstance(contents, list):
+                    for article in contents:
+                        if 'insertion_date' in article:
+                            logger.debug(f"Article date: {article['insertion_date']} - Title: {article.get('title', 'No title')}")
+    return geojson_data
+
+
 @router.get("/geojson_events")
 async def geojson_events_view(
     event_type: str = Query(...),
@@ -19,57 +78,47 @@ async def geojson_events_view(
     end_date: str = Query(None, description="ISO formatted end date (e.g. 2023-12-31T23:59:59+00:00)"),
     limit: int = Query(100, description="Maximum number of locations to return")
 ):
-    # Validate date formats
-    if start_date:
-        try:
-            datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid start_date format")
-    
-    if end_date:
-        try:
-            datetime.fromisoformat(end_date.replace('Z', '+00:00'))
-        except ValueError:
-            raise HTTPException(status_code=400, detail="Invalid end_date format")
+    event_type = event_type.strip()
+    start_date = normalize_date(start_date, "start_date")
+    end_date = normalize_date(end_date, "end_date")
 
     try:
-        logger.info(f"Fetching GeoJSON data for event_type: {event_type}, start_date: {start_date}, end_date: {end_date}, limit: {limit}")
-        
-        geojson_data = opol.geo.json_by_event(
-            event_type=event_type,
-            start_date=start_date,
-            end_date=end_date,
-            limit=limit
-        )
-
-        # Log all dates of all articles retrieved
-        if geojson_data and 'features' in geojson_data:
-            for feature in geojson_data['features']:
-                if 'properties' in feature and 'contents' in feature['properties']:
-                    contents = feature['properties']['contents']
-                    if isinstance(contents, str):
-                        try:
-                            import json
-                            contents = json.loads(contents)
-                        except Exception as e:
-                            logger.error(f"Error parsing contents JSON: {e}")
-                            contents = []
-                    
-                    if isinstance(contents, list):
-                        for article in contents:
-                            if 'insertion_date' in article:
-                                logger.info(f"Article date: {article['insertion_date']} - Title: {article.get('title', 'No title')}")
-
-        if not geojson_data:
-            logger.warning(f"No GeoJSON data returned for event_type: {event_type} in specified date range")
-            raise HTTPException(status_code=404, detail="No GeoJSON data found for the specified parameters.")
-        
-        # Optionally, validate the GeoJSON structure here
-        return geojson_data
+        geojson_data = await cached_geojson(event_type, start_date, end_date, limit)
     except Exception as e:
         logger.error(f"Error fetching GeoJSON data for event type '{event_type}' with date range: {e}")
         raise HTTPException(status_code=500, detail="Internal server error while fetching GeoJSON data.")
 
+    if not geojson_data:
+        logger.warning(f"No GeoJSON data returned for event_type: {event_type} in specified date range")
+        raise HTTPException(status_code=404, detail="No GeoJSON data found for the specified parameters.")
+
+    # Optionally, validate the GeoJSON structure here
+    return geojson_data
+
+
+def fetch_geojson(start_date: Optional[str], end_date: Optional[str], limit: int):
+    logger.info(f"Fetching raw GeoJSON data for start_date: {start_date}, end_date: {end_date}, limit: {limit}")
+    return opol.geo.json(
+        start_date=start_date,
+        end_date=end_date,
+        limit=limit
+    )
+
+
+def geojson_key(event_type: Optional[str], start_date: Optional[str], end_date: Optional[str], limit: int) -> tuple:
+    if event_type is None:
+        return ("all", start_date, end_date, limit)
+    return ("events", event_type, start_date, end_date, limit)
+
+
+async def cached_geojson(event_type: Optional[str], start_date: Optional[str], end_date: Optional[str], limit: int):
+    """FeatureCollection of one event type, or of all events when `event_type` is None, from the cache."""
+    if event_type is None:
+        loader = lambda: run_in_threadpool(fetch_geojson, start_date, end_date, limit)
+    else:
+        loader = lambda: run_in_threadpool(fetch_geojson_events, event_type, start_date, end_date, limit)
+    return await geojson_cache.get(geojson_key(event_type, start_date, end_date, limit), loader)
+
 
 # Get all events in a specific timeframe
 @router.get("/geojson")
@@ -78,19 +127,54 @@ async def geojson_raw_view(
     end_date: str = Query(None, description="ISO formatted end date (e.g. 2023-12-31T23:59:59+00:00)"),
     limit: int = Query(100, description="Maximum number of locations to return")
 ):
+    start_date = normalize_date(start_date, "start_date")
+    end_date = normalize_date(end_date, "end_date")
+
     try:
-        logger.info(f"Fetching raw GeoJSON data for start_date: {start_date}, end_date: {end_date}, limit: {limit}")
-
-        geojson_data = opol.geo.json(
-            start_date=start_date,
-            end_date=end_date,
-            limit=limit
-        )
-        
-        return geojson_data
-     
+        return await cached_geojson(None, start_date, end_date, limit)
     except Exception as e:
         logger.error(f"Error fetching Baseline GeoJSON data: {e}")
         raise HTTPException(status_code=500, detail="Internal server error while fetching GeoJSON data.")
 
-        
\ No newline at end of file
+
+@router.get("/tiles/{z}/{x}/{y}")
+async def geojson_tile_view(
+    response: Response,
+    z: int = Path(..., ge=0, le=MAX_TILE_ZOOM),
+    x: int = Path(..., ge=0),
+    y: int = Path(..., ge=0),
+    event_type: str = Query(None, description="Event type to map, all events when omitted"),
+    start_date: str = Query(None, description="ISO formatted start date (e.g. 2023-01-01T00:00:00+00:00)"),
+    end_date: str = Query(None, description="ISO formatted end date (e.g. 2023-12-31T23:59:59+00:00)"),
+    limit: int = Query(100, description="Maximum number of locations to return")
+):
+    """
+    Clustered GeoJSON for map tile z/x/y. Clusters carry point and article counts, single
+    locations their article IDs instead of the embedded articles.
+    """
+    if x >= 2 ** z or y >= 2 ** z:
+        raise HTTPException(status_code=400, detail=f"Tile {z}/{x}/{y} is outside the map")
+    event_type = event_type.strip() if event_type else None
+    start_date = normalize_date(start_date, "start_date")
+    end_date = normalize_date(end_date, "end_date")
+
+    try:
+        geojson_data = await cached_geojson(event_type, start_date, end_date, limit)
+    except Exception as e:
+        logger.error(f"Error fetching GeoJSON data for tile {z}/{x}/{y}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error while fetching GeoJSON data.")
+
+    key = geojson_key(event_type, start_date, end_date, limit)
+    index = cluster_indexes.get(key)
+    if index is None or index.source is not geojson_data:
+        index = await run_in_threadpool(ClusterIndex, geojson_data)
+        cluster_indexes.set(key, index)
+
+    # Browsers keep tiles as long as the server would, panning back doesn't refetch them
+    response.headers["Cache-Control"] = f"public, max-age={settings.GEO_CACHE_TTL_SECONDS}"
+    return await run_in_threadpool(index.tile, z, x, y)
+
+
+@router.get("/cache/stats")
+async def get_geojson_cache_stats(current_user: CurrentUser):
+    return {**geojson_cache.stats(), "cluster_indexes": cluster_indexes.stats()}
@@ -0,0 +1,43 @@
+import re
+from typing import Optional
+
+from fastapi import HTTPException
+
+_RANGE_SPEC = re.compile(r"^\s*(\d*)\s*-\s*(\d*)\s*$")
+
+
+def parse_range_header(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None for headers we don't serve partially (other units, multiple ranges, malformed specs),
+    in which case the whole object is sent. Raises 416 for unsatisfiable ranges.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    match = _RANGE_SPEC.match(spec)
+    if not match or not any(match.groups()):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = int(last) if last else size - 1
+        if last and end < start:
+            return None
+    else:
+        # Suffix range, the last N bytes
+        start = max(size - int(last), 0)
+        end = size - 1 if int(last) else -1
+    if start > end or start >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return start, min(end, size - 1)
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of `etag` against an If-None-Match list, as conditional GETs use it."""
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag.removeprefix("W/") in candidates
@@ -0,0 +1,143 @@
+import hashlib
+import json
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Type
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import ClassificationCacheEntry
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=1024)
+def scheme_fingerprint(model_class: Type[BaseModel]) -> str:
+    """
+    Canonical JSON of the compiled model, i.e. exactly what the LLM is asked to fill.
+    Model classes are cached per scheme version, so this runs once per version.
+    """
+    schema = model_class.model_json_schema()
+    schema["description"] = model_class.__doc__
+    return json.dumps(schema, sort_keys=True, default=str)
+
+
+def cache_key(text: str, model_class: Type[BaseModel], provider: str, model: str) -> str:
+    digest = hashlib.sha256()
+    for part in (text or "", scheme_fingerprint(model_class), provider, model):
+        digest.update(part.encode("utf-8", errors="ignore"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+class ClassificationResultCache:
+    """
+    Persistent cache of classification outputs in the classificationcacheentry table.
+    Entries older than the TTL are ignored on read and pruned periodically,
+    together with the oldest entries beyond the size bound.
+    """
+
+    def __init__(self, ttl_seconds: int, max_entries: int, prune_every: int):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.max_entries = max_entries
+        self.prune_every = prune_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _count(self, hits: int = 0, misses: int = 0) -> None:
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def get_many(self, session: Session, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list(set(keys))
+        if not keys:
+            return {}
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        rows = session.exec(
+            select(ClassificationCacheEntry.key, ClassificationCacheEntry.value).where(
+                ClassificationCacheEntry.key.in_(keys),
+                ClassificationCacheEntry.created_at >= cutoff,
+            )
+        ).all()
+        found = {key: value for key, value in rows}
+        self._count(hits=len(found), misses=len(keys) - len(found))
+        return found
+
+    def get(self, session: Session, key: str) -> Optional[Dict[str, Any]]:
+        return self.get_many(session, [key]).get(key)
+
+    def set_many(self, session: Session, entries: Iterable[Dict[str, Any]]) -> None:
+        """
+        Store entries of the form {"key", "value", "provider", "model"} and commit.
+        """
+        rows = [{**entry, "created_at": datetime.now(timezone.utc)} for entry in entries]
+        if not rows:
+            return
+        stmt = insert(ClassificationCacheEntry).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ClassificationCacheEntry.key],
+            set_={"value": stmt.excluded.value, "created_at": stmt.excluded.created_at},
+        )
+        session.execute(stmt)
+        session.commit()
+
+        with self._lock:
+            self._writes += len(rows)
+            should_prune = self._writes >= self.prune_every
+            if should_prune:
+                self._writes = 0
+        if should_prune:
+            self.prune(session)
+
+    def set(self, session: Session, key: str, value: Dict[str, Any], provider: str, model: str) -> None:
+        self.set_many(session, [{"key": key, "value": value, "provider": provider, "model": model}])
+
+    def prune(self, session: Session) -> int:
+        cutoff = datetime.now(timezone.utc) - self.ttl
+        removed = session.execute(
+            delete(ClassificationCacheEntry).where(ClassificationCacheEntry.created_at < cutoff)
+        ).rowcount
+        overflow = (
+            select(ClassificationCacheEntry.key)
+            .order_by(ClassificationCacheEntry.created_at.desc())
+            .offset(self.max_entries)
+        )
+        removed += session.execute(
+            delete(ClassificationCacheEntry).where(ClassificationCacheEntry.key.in_(overflow))
+        ).rowcount
+        session.commit()
+        if removed:
+            logger.info(f"Pruned {removed} classification cache entries")
+        return removed
+
+    def stats(self, session: Session | None = None) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        stats: Dict[str, Any] = {
+            "enabled": settings.CLASSIFICATION_CACHE_ENABLED,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "ttl_seconds": int(self.ttl.total_seconds()),
+            "max_entries": self.max_entries,
+        }
+        if session is not None:
+            stats["entries"] = session.exec(
+                select(func.count()).select_from(ClassificationCacheEntry)
+            ).scalar_one()
+        return stats
+
+
+classification_cache = ClassificationResultCache(
+    ttl_seconds=settings.CLASSIFICATION_CACHE_TTL_SECONDS,
+    max_entries=settings.CLASSIFICATION_CACHE_MAX_ENTRIES,
+    prune_every=settings.CLASSIFICATION_CACHE_PRUNE_EVERY,
+)
@@ -35,6 +35,17 @@ class Settings(BaseSettings):
     SECRET_KEY: str = secrets.token_urlsafe(32)
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Authorized (user, workspace) pairs are remembered per worker for this long. Deactivation
+    # and workspace changes clear them on the worker that handles the change, other workers
+    # notice within the TTL.
+    AUTH_CACHE_TTL_SECONDS: int = 30
+    AUTH_CACHE_SIZE: int = 10_000
+    # bcrypt cost factor for new hashes. Stored hashes with another cost are replaced on the next login.
+    BCRYPT_ROUNDS: int = 12
+    # Threads per server worker that hash and check passwords (bcrypt releases the GIL), and how
+    # many more calls may wait for them before logins are answered with 503
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
     DOMAIN: str = "localhost"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
     OPOL_DEV_MODE: bool = os.environ.get("OPOL_DEV_MODE", "False") == "True"
@@ -44,6 +55,30 @@ class Settings(BaseSettings):
     if OPOL_DEV_MODE:
         os.environ["PYTHONPATH"] = "/app/opol:/app"
 
+    # Outgoing HTTP to OPOL and other upstreams, one pooled client per worker
+    UPSTREAM_TIMEOUT_SECONDS: float = 30.0
+    UPSTREAM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    UPSTREAM_MAX_CONNECTIONS: int = 100
+    # Requests in flight to any one host, so a slow upstream can't take every connection
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST: int = 20
+    UPSTREAM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    # Retries of idempotent requests after connection errors, timeouts and 502/503/504,
+    # waiting about BACKOFF * 2^attempt in between
+    UPSTREAM_RETRIES: int = 2
+    UPSTREAM_RETRY_BACKOFF_SECONDS: float = 0.25
+    # Hosts called without TLS verification, as the OPOL proxies always have been
+    UPSTREAM_INSECURE_HOSTS: list[str] = ["api.opol.io"]
+    # OPOL GeoJSON responses per parameter set, fresh for TTL and then served for up to STALE
+    # more seconds while a single background call refreshes them
+    GEO_CACHE_TTL_SECONDS: int = 60
+    GEO_CACHE_STALE_SECONDS: int = 300
+    GEO_CACHE_SIZE: int = 512
+    # Map tiles: points within RADIUS pixels of one another are clustered up to MAX_ZOOM,
+    # and up to TILE_CACHE_SIZE cut tiles are kept per clustered dataset
+    GEO_CLUSTER_RADIUS: int = 60
+    GEO_CLUSTER_MAX_ZOOM: int = 16
+    GEO_TILE_CACHE_SIZE: int = 2048
+
     @computed_field  # type: ignore[misc]
     @property
     def server_host(self) -> str:
@@ -76,6 +111,13 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Connection pool, shared by the sync and async engines
+    POSTGRES_POOL_SIZE: int = 10
+    POSTGRES_MAX_OVERFLOW: int = 20
+    POSTGRES_POOL_TIMEOUT: int = 30
+    # Per-statement timeout for request-path (async) connections, 0 disables it
+    POSTGRES_STATEMENT_TIMEOUT_MS: int = 60_000
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -112,6 +154,69 @@ class Settings(BaseSettings):
     MINIO_ROOT_PASSWORD: str = os.environ.get("MINIO_ROOT_PASSWORD", "app_user_password")
     MINIO_BUCKET_NAME: str = os.environ.get("MINIO_BUCKET_NAME", "webapp-dev-user-documents")
     MINIO_SECURE: bool = os.environ.get("MINIO_SECURE", "False").lower() == "true"
+    # Multipart upload part size, MinIO requires at least 5 MiB
+    MINIO_UPLOAD_PART_SIZE: int = 16 * 1024 * 1024
+    MINIO_DOWNLOAD_CHUNK_SIZE: int = 1024 * 1024
+    MINIO_PRESIGNED_URL_EXPIRE_SECONDS: int = 300
+    # Server-side object copies in flight when copying documents
+    MINIO_COPY_CONCURRENCY: int = 16
+    # Keys per DeleteObjects request, S3 accepts at most 1000
+    MINIO_DELETE_BATCH_SIZE: int = 1000
+
+    # Classification runs
+    # Upper bound on LLM calls in flight for a single run
+    CLASSIFICATION_MAX_CONCURRENCY: int = 8
+    # Requests per minute per provider, providers not listed are not throttled
+    CLASSIFICATION_RATE_LIMITS: dict[str, int] = {"Google": 600, "ollama": 0}
+    # Number of documents loaded, classified and inserted per chunk
+    CLASSIFICATION_BATCH_SIZE: int = 200
+    # Compiled Pydantic models kept per (scheme_id, updated_at)
+    CLASSIFICATION_MODEL_CACHE_SIZE: int = 256
+    # Persistent cache of LLM outputs for identical (text, scheme, provider, model)
+    CLASSIFICATION_CACHE_ENABLED: bool = True
+    CLASSIFICATION_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30
+    CLASSIFICATION_CACHE_MAX_ENTRIES: int = 1_000_000
+    # Expired and overflowing entries are pruned once every N writes
+    CLASSIFICATION_CACHE_PRUNE_EVERY: int = 1000
+
+    # PDF text extraction
+    # Worker processes shared by all extraction jobs
+    PDF_EXTRACTION_WORKERS: int = max(1, (os.cpu_count() or 2) - 1)
+    # Pages handled by one worker task, larger PDFs are split across workers
+    PDF_EXTRACTION_PAGES_PER_TASK: int = 50
+    # Files downloaded and extracted concurrently within one job
+    PDF_EXTRACTION_MAX_FILES: int = 4
+
+    # Document embeddings for semantic search
+    # "hashing" (lexical, no model) or a sentence-transformers model name. Models need the
+    # embeddings extra and are only loaded from the local cache, see scripts/download_embedding_model.py
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    # Must match the documentchunk.embedding column, changing it needs a migration
+    EMBEDDING_DIMENSIONS: int = 384
+    # Chunk length and overlap in characters
+    EMBEDDING_CHUNK_SIZE: int = 1000
+    EMBEDDING_CHUNK_OVERLAP: int = 200
+    # Documents embedded and written per transaction
+    EMBEDDING_BATCH_SIZE: int = 64
+    # HNSW candidate list size, higher is more accurate and slower
+    EMBEDDING_SEARCH_EF: int = 100
+
+    # Near-duplicate detection (MinHash + LSH)
+    # Words per shingle
+    NEAR_DUPLICATE_SHINGLE_SIZE: int = 5
+    # Permutations per signature, split into bands of NUM_PERM / BANDS rows.
+    # 128 / 16 puts the LSH candidate threshold around a Jaccard similarity of 0.7.
+    # Changing either needs the workspace signatures rebuilt.
+    NEAR_DUPLICATE_NUM_PERM: int = 128
+    NEAR_DUPLICATE_BANDS: int = 16
+    # Estimated Jaccard similarity at which candidates count as near duplicates
+    NEAR_DUPLICATE_THRESHOLD: float = 0.8
+    # Only the start of long documents is shingled
+    NEAR_DUPLICATE_MAX_CHARS: int = 100_000
+
+    # Classification results fetched from the cursor and written per Arrow record batch
+    # (one Parquet row group) when exporting
+    EXPORT_BATCH_SIZE: int = 10_000
 
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
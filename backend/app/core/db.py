@@ -1,3 +1,4 @@
+from sqlalchemy.ext.asyncio import create_async_engine
 from sqlmodel import Session, create_engine, select, text
 
 from app import crud
@@ -20,7 +21,25 @@ import logging
 
 logger = logging.getLogger(__name__)
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+pool_options = {
+    "pool_size": settings.POSTGRES_POOL_SIZE,
+    "max_overflow": settings.POSTGRES_MAX_OVERFLOW,
+    "pool_timeout": settings.POSTGRES_POOL_TIMEOUT,
+    "pool_pre_ping": True,
+}
+
+engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI), **pool_options)
+
+# Async engine for request handlers; psycopg 3 serves both from the same URL
+async_engine = create_async_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    connect_args=(
+        {"options": f"-c statement_timeout={settings.POSTGRES_STATEMENT_TIMEOUT_MS}"}
+        if settings.POSTGRES_STATEMENT_TIMEOUT_MS
+        else {}
+    ),
+    **pool_options,
+)
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -33,7 +52,15 @@ def init_db(session: Session) -> None:
     # But if you don't want to use migrations, create
     # the tables un-commenting the next lines
 
-    SQLModel.metadata.create_all(engine)
+    # create_all may run before the migrations, so migrations that add tables, columns or
+    # indexes skip those that already exist.
+    # Tables of optional extensions (pgvector for semantic search) are only created once the
+    # extension is installed, creating extensions is left to the migrations
+    installed = set(session.exec(text("SELECT extname FROM pg_extension")).scalars())
+    SQLModel.metadata.create_all(engine, tables=[
+        table for table in SQLModel.metadata.sorted_tables
+        if table.info.get("requires_extension") in (None, *installed)
+    ])
 
     if os.environ.get("WIPE_DB") == "True":
         logger.info("Wiping DB")
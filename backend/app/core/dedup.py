@@ -0,0 +1,67 @@
+import hashlib
+import re
+import unicodedata
+from typing import BinaryIO, Iterable, Optional
+
+_whitespace_pattern = re.compile(r"\s+")
+
+# Read size when hashing spooled uploads
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def normalize_text(text: str) -> str:
+    """Unicode-normalized, case-folded text with whitespace runs collapsed, so reformatted copies hash alike."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return _whitespace_pattern.sub(" ", text).strip()
+
+
+def normalize_url(url: str) -> str:
+    url = url.strip()
+    scheme, separator, rest = url.partition("://")
+    if not separator:
+        return url.rstrip("/")
+    host, slash, path = rest.partition("/")
+    return f"{scheme.lower()}://{host.lower()}{slash}{path}".rstrip("/")
+
+
+def sha256_hex(data: str) -> str:
+    return hashlib.sha256(data.encode("utf-8", errors="ignore")).hexdigest()
+
+
+def file_sha256(file: BinaryIO) -> str:
+    """sha256 of a file object read from the start in chunks, the position is reset afterwards."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def document_content_hash(
+    text_content: Optional[str] = None,
+    url: Optional[str] = None,
+    file_digests: Iterable[str] = (),
+) -> Optional[str]:
+    """
+    Identity of an ingested document: its files if it has any, else its normalized text,
+    else its URL. Documents with none of these (a bare title) are not deduplicated.
+    """
+    file_digests = sorted(file_digests)
+    if file_digests:
+        return sha256_hex("files:" + ",".join(file_digests))
+    if text_content and text_content.strip():
+        return sha256_hex("text:" + normalize_text(text_content))
+    if url and url.strip():
+        return sha256_hex("url:" + normalize_url(url))
+    return None
+
+
+def blob_object_name(sha256: str) -> str:
+    """Content-addressed object name, the two-character prefix spreads keys over the listing."""
+    return f"blobs/{sha256[:2]}/{sha256}"
+
+
+def stored_object_name(document_id: int, name: str, sha256: Optional[str]) -> str:
+    """Object of a stored file, files uploaded before content addressing live under their document ID."""
+    return blob_object_name(sha256) if sha256 else f"{document_id}/{name}"
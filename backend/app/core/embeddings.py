@@ -0,0 +1,262 @@
+import asyncio
+import hashlib
+import logging
+import math
+import re
+import threading
+from typing import Dict, List, Optional, Protocol
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import delete, insert, select, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import Document, DocumentChunk
+
+logger = logging.getLogger(__name__)
+
+_token_pattern = re.compile(r"\w+")
+_whitespace_pattern = re.compile(r"\s+")
+
+
+class EmbedderUnavailable(RuntimeError):
+    """The configured embedding model can't be loaded on this server."""
+
+
+class Embedder(Protocol):
+    name: str
+    dimensions: int
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """Unit-length vectors, one per text."""
+        ...
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(component * component for component in vector))
+    return [component / norm for component in vector] if norm else vector
+
+
+class HashingEmbedder:
+    """
+    Signed feature hashing of lowercased words and word bigrams.
+    Deterministic and dependency free, meant for tests and setups without a model.
+    It matches on shared words, not on meaning.
+    """
+
+    def __init__(self, dimensions: int):
+        self.name = f"hashing-{dimensions}"
+        self.dimensions = dimensions
+
+    def _embed_one(self, text: str) -> List[float]:
+        vector = [0.0] * self.dimensions
+        tokens = _token_pattern.findall(text.lower())
+        features = tokens + [f"{first} {second}" for first, second in zip(tokens, tokens[1:])]
+        for feature in features:
+            digest = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[digest % self.dimensions] += 1.0 if digest >> 63 else -1.0
+        return _normalize(vector)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed_one(text) for text in texts]
+
+
+class SentenceTransformerEmbedder:
+    """
+    Local sentence-transformers model on the CPU, loaded on first use. Needs the `embeddings`
+    extra, and the model has to be in the local cache already (scripts/download_embedding_model.py):
+    the API never downloads it. A model that fails to load isn't retried until restart.
+    """
+
+    def __init__(self, model_name: str, dimensions: int):
+        self.name = model_name
+        self.dimensions = dimensions
+        self._model = None
+        self._error: Optional[EmbedderUnavailable] = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._model is None:
+                try:
+                    self._model = self._load_model()
+                except EmbedderUnavailable as e:
+                    logger.warning(f"Semantic search is disabled: {e}")
+                    self._error = e
+                    raise
+            return self._model
+
+    def _load_model(self):
+        try:
+            from sentence_transformers import SentenceTransformer
+        except ImportError:
+            raise EmbedderUnavailable("sentence-transformers is not installed, install the backend with the embeddings extra")
+        try:
+            model = SentenceTransformer(self.name, device="cpu", local_files_only=True)
+        except OSError as e:
+            raise EmbedderUnavailable(
+                f"{self.name} is not in the local model cache, run scripts/download_embedding_model.py ({e})"
+            )
+        if model.get_sentence_embedding_dimension() != self.dimensions:
+            raise EmbedderUnavailable(
+                f"{self.name} produces {model.get_sentence_embedding_dimension()}-dimensional "
+                f"vectors, EMBEDDING_DIMENSIONS is {self.dimensions}"
+            )
+        return model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors = self._load().encode(texts, batch_size=32, normalize_embeddings=True)
+        return [vector.tolist() for vector in vectors]
+
+
+_embedders: Dict[str, Embedder] = {}
+_embedders_lock = threading.Lock()
+
+
+def get_embedder(model_name: Optional[str] = None) -> Embedder:
+    """The embedder for `model_name`, settings.EMBEDDING_MODEL by default."""
+    model_name = model_name or settings.EMBEDDING_MODEL
+    with _embedders_lock:
+        if model_name not in _embedders:
+            if model_name == "hashing":
+                _embedders[model_name] = HashingEmbedder(settings.EMBEDDING_DIMENSIONS)
+            else:
+                _embedders[model_name] = SentenceTransformerEmbedder(model_name, settings.EMBEDDING_DIMENSIONS)
+        return _embedders[model_name]
+
+
+_vector_index_available: Optional[bool] = None
+
+
+async def vector_index_available(session: AsyncSession) -> bool:
+    """
+    Whether the documentchunk table exists, which needs the pgvector extension.
+    Checked once per worker, installing pgvector takes effect after a restart.
+    """
+    global _vector_index_available
+    if _vector_index_available is None:
+        _vector_index_available = (
+            await session.execute(text("SELECT to_regclass('documentchunk') IS NOT NULL"))
+        ).scalar_one()
+        if not _vector_index_available:
+            logger.warning("documentchunk table is missing (pgvector not installed), semantic search is disabled")
+    return _vector_index_available
+
+
+def document_text(title: Optional[str], summary: Optional[str], text_content: Optional[str]) -> str:
+    return "\n\n".join(part for part in (title, summary, text_content) if part and part.strip())
+
+
+def chunk_text(text: str, size: Optional[int] = None, overlap: Optional[int] = None) -> List[str]:
+    """
+    Split text into pieces of at most `size` characters overlapping by about `overlap`.
+    Cuts are moved back to the last whitespace so words stay whole.
+    """
+    size = size or settings.EMBEDDING_CHUNK_SIZE
+    overlap = settings.EMBEDDING_CHUNK_OVERLAP if overlap is None else overlap
+    overlap = min(overlap, size // 2)
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            cut = max(text.rfind(" ", start + size // 2, end), text.rfind("\n", start + size // 2, end))
+            if cut != -1:
+                end = cut
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+        if not text[start - 1].isspace():
+            boundary = _whitespace_pattern.search(text, start, end)
+            if boundary:
+                start = boundary.end()
+    return chunks
+
+
+def content_hash(text: str, embedder: Embedder) -> str:
+    digest = hashlib.sha256()
+    digest.update(embedder.name.encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update(text.encode("utf-8", errors="ignore"))
+    return digest.hexdigest()
+
+
+# One embedding batch at a time per worker, the model already uses every core
+_embedding_lock = asyncio.Lock()
+
+
+async def embed_batch(session: AsyncSession, document_ids: List[int], embedder: Embedder) -> int:
+    """
+    (Re)embed the given documents whose text changed since they were last embedded.
+    Returns the number of documents embedded.
+    """
+    documents = (await session.execute(
+        select(Document.id, Document.workspace_id, Document.title, Document.summary, Document.text_content)
+        .where(Document.id.in_(document_ids))
+    )).all()
+    stored = dict((await session.execute(
+        select(DocumentChunk.document_id, DocumentChunk.content_hash)
+        .where(DocumentChunk.document_id.in_(document_ids), DocumentChunk.chunk_index == 0)
+    )).all())
+
+    stale, rows = [], []
+    for document_id, workspace_id, title, summary, text_content in documents:
+        text = document_text(title, summary, text_content)
+        digest = content_hash(text, embedder)
+        if stored.get(document_id) == digest:
+            continue
+        stale.append(document_id)
+        rows.extend(
+            {
+                "document_id": document_id,
+                "workspace_id": workspace_id,
+                "chunk_index": index,
+                "text": chunk,
+                "content_hash": digest,
+            }
+            for index, chunk in enumerate(chunk_text(text))
+        )
+    if not stale:
+        return 0
+
+    vectors = await run_in_threadpool(embedder.embed, [row["text"] for row in rows]) if rows else []
+    for row, vector in zip(rows, vectors):
+        row["embedding"] = vector
+
+    await session.execute(delete(DocumentChunk).where(DocumentChunk.document_id.in_(stale)))
+    if rows:
+        await session.execute(insert(DocumentChunk), rows)
+    await session.commit()
+    return len(stale)
+
+
+async def embed_documents(document_ids: List[int]) -> None:
+    """
+    Background task: embed documents in batches of settings.EMBEDDING_BATCH_SIZE.
+    Documents whose text and model are unchanged are skipped, so this is cheap to call after any write.
+    """
+    if not document_ids:
+        return
+    embedder = get_embedder()
+    embedded = 0
+    async with _embedding_lock:
+        for start in range(0, len(document_ids), settings.EMBEDDING_BATCH_SIZE):
+            batch = document_ids[start:start + settings.EMBEDDING_BATCH_SIZE]
+            try:
+                async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                    if not await vector_index_available(session):
+                        return
+                    embedded += await embed_batch(session, batch, embedder)
+            except EmbedderUnavailable:
+                # Logged once when the model failed to load
+                return
+            except Exception as e:
+                logger.error(f"Error embedding documents {batch[0]}..{batch[-1]}: {e}")
+    if embedded:
+        logger.info(f"Embedded {embedded} of {len(document_ids)} documents with {embedder.name}")
@@ -0,0 +1,192 @@
+import json
+import logging
+import math
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Tile size in pixels the cluster radius is measured against, as in Mapbox GL
+TILE_EXTENT = 512
+MAX_TILE_ZOOM = 22
+
+
+def project(lng: float, lat: float) -> tuple[float, float]:
+    """Longitude and latitude as Web Mercator coordinates in [0, 1], y growing southwards."""
+    sin = math.sin(math.radians(max(min(lat, 85.0511), -85.0511)))
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return lng / 360 + 0.5, min(max(y, 0.0), 1.0)
+
+
+def unproject(x: float, y: float) -> tuple[float, float]:
+    lat = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y))))
+    return (x - 0.5) * 360, lat
+
+
+def article_refs(contents: Any) -> List[Any]:
+    """IDs of a feature's embedded articles (their URL where they have none), `contents` may be JSON text."""
+    if isinstance(contents, str):
+        try:
+            contents = json.loads(contents)
+        except ValueError:
+            return []
+    if not isinstance(contents, list):
+        return []
+    return [
+        article.get("id") or article.get("url")
+        for article in contents
+        if isinstance(article, dict) and (article.get("id") or article.get("url"))
+    ]
+
+
+def compact_feature(feature: Dict[str, Any]) -> Dict[str, Any]:
+    """The feature with its `contents` articles replaced by their IDs and a count."""
+    properties = dict(feature.get("properties") or {})
+    article_ids = article_refs(properties.pop("contents", None))
+    properties["article_ids"] = article_ids
+    properties["content_count"] = len(article_ids)
+    return {**feature, "properties": properties}
+
+
+def abbreviate(count: int) -> str:
+    if count >= 10_000:
+        return f"{round(count / 1000)}k"
+    if count >= 1000:
+        return f"{count / 1000:.1f}k"
+    return str(count)
+
+
+@dataclass
+class _Node:
+    """A point, or a cluster of points, on one zoom level of the index."""
+    x: float
+    y: float
+    point_count: int = 1
+    content_count: int = 0
+    feature: Optional[Dict[str, Any]] = None
+    # Level the cluster was formed on, it splits up one level further in
+    zoom: Optional[int] = None
+
+
+class ClusterIndex:
+    """
+    Point clusters of a FeatureCollection for every zoom level, in the manner of supercluster:
+    starting from the single points above `max_zoom`, each level greedily merges the previous
+    level's nodes lying within `radius` pixels of one another into their weighted centre.
+    Tiles cut from it are cached until the index is replaced.
+    """
+
+    def __init__(
+        self,
+        feature_collection: Optional[Dict[str, Any]],
+        radius: Optional[int] = None,
+        max_zoom: Optional[int] = None,
+        min_zoom: int = 0,
+    ):
+        self.radius = radius or settings.GEO_CLUSTER_RADIUS
+        self.max_zoom = settings.GEO_CLUSTER_MAX_ZOOM if max_zoom is None else max_zoom
+        self.min_zoom = min_zoom
+        self.source = feature_collection
+        self.tiles = LRUCache(maxsize=settings.GEO_TILE_CACHE_SIZE)
+
+        points = []
+        skipped = 0
+        for feature in (feature_collection or {}).get("features") or []:
+            geometry = feature.get("geometry") or {}
+            coordinates = geometry.get("coordinates")
+            if geometry.get("type") != "Point" or not coordinates or len(coordinates) < 2:
+                skipped += 1
+                continue
+            compact = compact_feature(feature)
+            points.append(_Node(
+                *project(float(coordinates[0]), float(coordinates[1])),
+                content_count=compact["properties"]["content_count"],
+                feature=compact,
+            ))
+        if skipped:
+            logger.info(f"Skipped {skipped} features without point geometry while clustering")
+
+        self.levels: Dict[int, List[_Node]] = {self.max_zoom + 1: points}
+        for zoom in range(self.max_zoom, self.min_zoom - 1, -1):
+            self.levels[zoom] = self._cluster(self.levels[zoom + 1], zoom)
+
+    def _cluster(self, nodes: List[_Node], zoom: int) -> List[_Node]:
+        r = self.radius / (TILE_EXTENT * 2 ** zoom)
+        # Grid of radius-sized cells, neighbours within r lie in the surrounding 3x3 cells
+        grid: Dict[tuple[int, int], List[int]] = defaultdict(list)
+        for index, node in enumerate(nodes):
+            grid[(int(node.x / r), int(node.y / r))].append(index)
+
+        merged = [False] * len(nodes)
+        clusters = []
+        for index, node in enumerate(nodes):
+            if merged[index]:
+                continue
+            merged[index] = True
+            cx, cy = int(node.x / r), int(node.y / r)
+            neighbours = [
+                other
+                for gx in (cx - 1, cx, cx + 1)
+                for gy in (cy - 1, cy, cy + 1)
+                for other in grid.get((gx, gy), ())
+                if not merged[other] and (nodes[other].x - node.x) ** 2 + (nodes[other].y - node.y) ** 2 <= r * r
+            ]
+            if not neighbours:
+                clusters.append(node)
+                continue
+            members = [node] + [nodes[other] for other in neighbours]
+            for other in neighbours:
+                merged[other] = True
+            point_count = sum(member.point_count for member in members)
+            clusters.append(_Node(
+                x=sum(member.x * member.point_count for member in members) / point_count,
+                y=sum(member.y * member.point_count for member in members) / point_count,
+                point_count=point_count,
+                content_count=sum(member.content_count for member in members),
+                zoom=zoom,
+            ))
+        return clusters
+
+    def _feature(self, node: _Node) -> Dict[str, Any]:
+        if node.feature is not None:
+            return node.feature
+        lng, lat = unproject(node.x, node.y)
+        return {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [round(lng, 6), round(lat, 6)]},
+            "properties": {
+                "cluster": True,
+                "point_count": node.point_count,
+                "point_count_abbreviated": abbreviate(node.point_count),
+                "content_count": node.content_count,
+                "expansion_zoom": node.zoom + 1,
+            },
+        }
+
+    def _cut(self, z: int, x: int, y: int) -> Dict[str, Any]:
+        zoom = max(min(z, self.max_zoom + 1), self.min_zoom)
+        tiles = 2 ** z
+        # Points just outside the tile are included so symbols on its edges aren't cut off
+        buffer = self.radius / TILE_EXTENT
+        left, right = (x - buffer) / tiles, (x + 1 + buffer) / tiles
+        top, bottom = (y - buffer) / tiles, (y + 1 + buffer) / tiles
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                self._feature(node)
+                for node in self.levels[zoom]
+                if left <= node.x <= right and top <= node.y <= bottom
+            ],
+        }
+
+    def tile(self, z: int, x: int, y: int) -> Dict[str, Any]:
+        """GeoJSON FeatureCollection of the clusters and points in tile z/x/y."""
+        tile = self.tiles.get((z, x, y))
+        if tile is None:
+            tile = self._cut(z, x, y)
+            self.tiles.set((z, x, y), tile)
+        return tile
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+import random
+from collections import defaultdict
+from typing import Any, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+RETRY_STATUSES = {502, 503, 504}
+
+_client: Optional[httpx.AsyncClient] = None
+_host_slots: Dict[str, asyncio.Semaphore] = defaultdict(
+    lambda: asyncio.Semaphore(settings.UPSTREAM_MAX_CONNECTIONS_PER_HOST)
+)
+
+
+def create_http_client() -> httpx.AsyncClient:
+    """
+    Pooled HTTP/2 client with keep-alive. Hosts in UPSTREAM_INSECURE_HOSTS get their own
+    transport without TLS verification, everything else is verified.
+    """
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.UPSTREAM_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    insecure = {
+        f"all://{host}": httpx.AsyncHTTPTransport(http2=True, limits=limits, verify=False)
+        for host in settings.UPSTREAM_INSECURE_HOSTS
+    }
+    return httpx.AsyncClient(
+        http2=True,
+        limits=limits,
+        mounts=insecure,
+        timeout=httpx.Timeout(
+            settings.UPSTREAM_TIMEOUT_SECONDS, connect=settings.UPSTREAM_CONNECT_TIMEOUT_SECONDS
+        ),
+    )
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """The worker's client, opened by the app lifespan or on first use outside of it."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = create_http_client()
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    # Semaphores belong to the event loop they were first awaited on
+    _host_slots.clear()
+
+
+async def request(method: str, url: str, *, retries: Optional[int] = None, **kwargs: Any) -> httpx.Response:
+    """
+    Send a request with the shared client, waiting for a slot when the host already has
+    UPSTREAM_MAX_CONNECTIONS_PER_HOST requests in flight. Retries wait for a slot again. Idempotent requests are retried
+    with jittered exponential backoff after transport errors and 502/503/504, others only
+    when `retries` is given. The last response is returned whatever its status.
+    """
+    method = method.upper()
+    if retries is None:
+        retries = settings.UPSTREAM_RETRIES if method in IDEMPOTENT_METHODS else 0
+    client = get_http_client()
+    host = httpx.URL(url).host
+    attempt = 0
+    while True:
+        try:
+            # The slot is only held while the request is in flight, not during backoff
+            async with _host_slots[host]:
+                response = await client.request(method, url, **kwargs)
+        except httpx.TransportError as e:
+            if attempt >= retries:
+                raise
+            logger.warning(f"{method} {url} failed ({e!r}), retrying")
+        else:
+            if response.status_code not in RETRY_STATUSES or attempt >= retries:
+                return response
+            await response.aclose()
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+        await asyncio.sleep(settings.UPSTREAM_RETRY_BACKOFF_SECONDS * 2 ** attempt * (0.5 + random.random()))
+        attempt += 1
+
+
+async def get(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("GET", url, **kwargs)
+
+
+async def post(url: str, **kwargs: Any) -> httpx.Response:
+    return await request("POST", url, **kwargs)
@@ -0,0 +1,191 @@
+import hashlib
+import logging
+import random
+from typing import Dict, Iterable, List, Optional, Sequence
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, any_, delete, insert, select
+from sqlalchemy.orm import aliased
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.core.dedup import normalize_text, sha256_hex
+from app.core.queries import id_array
+from app.models import Document, DocumentMinHash
+
+logger = logging.getLogger(__name__)
+
+# Documents read, hashed and written per transaction
+BATCH_SIZE = 200
+
+# Mersenne prime for the universal hash family (a * x + b) mod P
+_PRIME = (1 << 61) - 1
+# Fixed seed: stored signatures are only comparable when computed with the same permutations
+_random = random.Random(2025)
+_PERMUTATIONS = [
+    (_random.randrange(1, _PRIME), _random.randrange(0, _PRIME))
+    for _ in range(settings.NEAR_DUPLICATE_NUM_PERM)
+]
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "little")
+
+
+def shingles(text: str, size: Optional[int] = None) -> set:
+    """64-bit hashes of the overlapping `size`-word shingles of normalized text."""
+    size = size or settings.NEAR_DUPLICATE_SHINGLE_SIZE
+    words = normalize_text(text[:settings.NEAR_DUPLICATE_MAX_CHARS]).split()
+    if len(words) <= size:
+        return {_hash64(" ".join(words).encode("utf-8"))} if words else set()
+    return {
+        _hash64(" ".join(words[start:start + size]).encode("utf-8"))
+        for start in range(len(words) - size + 1)
+    }
+
+
+def minhash_signature(shingle_hashes: Iterable[int]) -> List[int]:
+    """Minimum of each permutation over the shingles, all values fit a signed BIGINT."""
+    values = list(shingle_hashes)
+    if not values:
+        return []
+    return [min([(a * x + b) % _PRIME for x in values]) for a, b in _PERMUTATIONS]
+
+
+def band_hashes(signature: Sequence[int], bands: Optional[int] = None) -> List[int]:
+    """
+    One hash per band of consecutive signature rows, salted with the band number
+    so equal rows in different bands don't collide. Returned as signed 64-bit ints.
+    """
+    bands = bands or settings.NEAR_DUPLICATE_BANDS
+    rows = len(signature) // bands
+    hashes = []
+    for band in range(bands):
+        data = f"{band}:" + ",".join(str(value) for value in signature[band * rows:(band + 1) * rows])
+        value = _hash64(data.encode("ascii"))
+        hashes.append(value - (1 << 64) if value >= (1 << 63) else value)
+    return hashes
+
+
+def estimated_similarity(first: Sequence[int], second: Sequence[int]) -> float:
+    """Fraction of agreeing signature rows, an unbiased estimate of the Jaccard similarity."""
+    if not first or len(first) != len(second):
+        return 0.0
+    return sum(1 for a, b in zip(first, second) if a == b) / len(first)
+
+
+def cluster_pairs(pairs: Iterable[tuple[int, int]]) -> List[List[int]]:
+    """Connected components of the given ID pairs, each sorted, ordered by their first ID."""
+    parent: Dict[int, int] = {}
+
+    def find(item: int) -> int:
+        parent.setdefault(item, item)
+        while parent[item] != item:
+            parent[item] = parent[parent[item]]
+            item = parent[item]
+        return item
+
+    for first, second in pairs:
+        root_first, root_second = find(first), find(second)
+        if root_first != root_second:
+            parent[max(root_first, root_second)] = min(root_first, root_second)
+
+    clusters: Dict[int, List[int]] = {}
+    for item in parent:
+        clusters.setdefault(find(item), []).append(item)
+    return sorted((sorted(members) for members in clusters.values()), key=lambda members: members[0])
+
+
+def _compute(texts: List[tuple[int, int, str]]) -> List[Dict]:
+    rows = []
+    for document_id, workspace_id, text in texts:
+        signature = minhash_signature(shingles(text))
+        if signature:
+            rows.append({
+                "document_id": document_id,
+                "workspace_id": workspace_id,
+                "text_hash": sha256_hex(normalize_text(text)),
+                "signature": signature,
+                "bands": band_hashes(signature),
+            })
+    return rows
+
+
+async def update_minhash_batch(session: AsyncSession, document_ids: List[int]) -> int:
+    """Recompute signatures of the given documents whose text changed. Returns how many were updated."""
+    documents = (await session.execute(
+        select(Document.id, Document.workspace_id, Document.text_content)
+        .where(Document.id.in_(document_ids))
+    )).all()
+    stored = dict((await session.execute(
+        select(DocumentMinHash.document_id, DocumentMinHash.text_hash)
+        .where(DocumentMinHash.document_id.in_(document_ids))
+    )).all())
+
+    changed = [
+        (document_id, workspace_id, text or "")
+        for document_id, workspace_id, text in documents
+        if stored.get(document_id) != sha256_hex(normalize_text(text or ""))
+    ]
+    if not changed:
+        return 0
+
+    rows = await run_in_threadpool(_compute, changed)
+    await session.execute(
+        delete(DocumentMinHash).where(DocumentMinHash.document_id.in_([document_id for document_id, *_ in changed]))
+    )
+    if rows:
+        await session.execute(insert(DocumentMinHash), rows)
+    await session.commit()
+    return len(changed)
+
+
+async def update_minhashes(document_ids: List[int]) -> None:
+    """Background task: keep near-duplicate signatures current after documents are written."""
+    updated = 0
+    for start in range(0, len(document_ids), BATCH_SIZE):
+        batch = document_ids[start:start + BATCH_SIZE]
+        try:
+            async with AsyncSession(async_engine, expire_on_commit=False) as session:
+                updated += await update_minhash_batch(session, batch)
+        except Exception as e:
+            logger.error(f"Error computing MinHash signatures for documents {batch[0]}..{batch[-1]}: {e}")
+    if updated:
+        logger.info(f"Updated MinHash signatures of {updated} of {len(document_ids)} documents")
+
+
+async def near_duplicate_clusters(
+    session: AsyncSession,
+    workspace_id: int,
+    document_ids: Optional[List[int]] = None,
+    threshold: Optional[float] = None,
+) -> List[List[int]]:
+    """
+    Clusters of two or more near-duplicate documents in a workspace, optionally among `document_ids` only.
+    Candidates are pairs sharing an LSH band (GIN index on `bands`), kept when their estimated
+    similarity reaches `threshold`. Clusters are the connected components of the kept pairs,
+    so two members of a cluster may be less similar than `threshold` to each other.
+    """
+    threshold = settings.NEAR_DUPLICATE_THRESHOLD if threshold is None else threshold
+    first, second = aliased(DocumentMinHash), aliased(DocumentMinHash)
+    statement = (
+        select(first.document_id, second.document_id, first.signature, second.signature)
+        .join(second, and_(
+            second.workspace_id == first.workspace_id,
+            second.document_id > first.document_id,
+            second.bands.op("&&")(first.bands)
+        ))
+        .where(first.workspace_id == workspace_id)
+    )
+    if document_ids is not None:
+        statement = statement.where(
+            first.document_id == any_(id_array(document_ids)),
+            second.document_id == any_(id_array(document_ids))
+        )
+    candidates = (await session.execute(statement)).all()
+    return cluster_pairs(
+        (first_id, second_id)
+        for first_id, second_id, first_signature, second_signature in candidates
+        if estimated_similarity(first_signature, second_signature) >= threshold
+    )
@@ -0,0 +1,41 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List
+
+from fastapi import HTTPException
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(*values: Any) -> str:
+    """Opaque cursor for the sort key of the last row of a page."""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    """Sort key values from `encode_cursor`, datetimes come back as ISO strings."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(values, list):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+
+async def estimate_count(session: AsyncSession, statement: Select) -> int:
+    """
+    Row estimate from the planner, avoids counting every matching row.
+    Good enough for scrollbars on large tables, use count(*) where it has to be exact.
+    """
+    compiled = statement.compile(
+        dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+    )
+    plan = (await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))).scalar_one()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cached_property
+from typing import Any, BinaryIO, Dict, List, Optional, Union
+
+import fitz  # PyMuPDF
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """
+    Process pool for CPU-bound PDF work, created on first use.
+    Workers are spawned rather than forked so they don't inherit the server's threads and connections.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=settings.PDF_EXTRACTION_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _pool
+
+
+def shutdown_process_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def clean_text(text: str) -> str:
+    """
+    Remove NULL bytes (rejected by Postgres text columns) and anything that doesn't survive
+    a UTF-8 round trip. Clean text, the common case, is returned unchanged.
+    """
+    if '\x00' in text:
+        text = text.replace('\x00', '')
+    try:
+        text.encode('utf-8')
+    except UnicodeEncodeError:
+        text = text.encode('utf-8', errors='ignore').decode('utf-8')
+    return text
+
+
+def guess_title(metadata: Dict[str, Any], first_page_text: str) -> str:
+    """Title from the PDF metadata, else the first short non-empty line of page 1."""
+    title = metadata.get("title") or ""
+    if not title and first_page_text:
+        for line in first_page_text.split('\n'):
+            line = line.strip()
+            if line:
+                if len(line) < 100:  # Assume title is not extremely long
+                    title = line
+                break
+    return title
+
+
+def summarize(text_content: str, max_length: int = 500) -> str:
+    """First non-blank paragraph of the text, cut to `max_length` characters."""
+    start = 0
+    while start < len(text_content):
+        end = text_content.find('\n\n', start)
+        if end == -1:
+            end = len(text_content)
+        paragraph = text_content[start:end]
+        if paragraph.strip():
+            return paragraph[:max_length] + ("..." if len(paragraph) > max_length else "")
+        start = end + 2
+    return ""
+
+
+@dataclass
+class PdfExtraction:
+    """
+    Text of a PDF, one cleaned string per page.
+    `text_content` joins the pages with a newline after each, `page_offsets[i]`
+    is where page i starts in it.
+    """
+    page_count: int
+    metadata: Dict[str, Any]
+    pages: List[str] = field(default_factory=list)
+
+    @cached_property
+    def text_content(self) -> str:
+        return "\n".join(self.pages) + "\n" if self.pages else ""
+
+    @cached_property
+    def page_offsets(self) -> List[int]:
+        offsets, position = [], 0
+        for page in self.pages:
+            offsets.append(position)
+            position += len(page) + 1
+        return offsets
+
+    @property
+    def truncated(self) -> bool:
+        return len(self.pages) < self.page_count
+
+    @property
+    def title(self) -> str:
+        return guess_title(self.metadata, self.pages[0] if self.pages else "")
+
+    @property
+    def summary(self) -> str:
+        return summarize(self.text_content)
+
+    def as_metadata(self, filename: str) -> Dict[str, Any]:
+        """Response shape of the extract-pdf-metadata endpoints."""
+        return {
+            "title": self.title or filename.replace(".pdf", ""),
+            "author": self.metadata.get("author", ""),
+            "subject": self.metadata.get("subject", ""),
+            "keywords": self.metadata.get("keywords", ""),
+            "creator": self.metadata.get("creator", ""),
+            "producer": self.metadata.get("producer", ""),
+            "text_content": self.text_content,
+            "summary": self.summary,
+            "page_count": self.page_count,
+            "page_offsets": self.page_offsets,
+        }
+
+
+def extract_text(doc: fitz.Document, max_pages: Optional[int] = None) -> PdfExtraction:
+    """
+    Extract an open document. With `max_pages` only the first pages are read,
+    which is all title and summary detection needs.
+    """
+    stop = doc.page_count if max_pages is None else min(max_pages, doc.page_count)
+    return PdfExtraction(
+        page_count=doc.page_count,
+        metadata=dict(doc.metadata or {}),
+        pages=[clean_text(doc[number].get_text()) for number in range(stop)],
+    )
+
+
+def read_pdf(source: Union[str, bytes], max_pages: Optional[int] = None) -> PdfExtraction:
+    """Extract a PDF given as a path or as bytes."""
+    if isinstance(source, str):
+        with fitz.open(source) as doc:
+            return extract_text(doc, max_pages)
+    with fitz.open(stream=source, filetype="pdf") as doc:
+        return extract_text(doc, max_pages)
+
+
+# Worker functions, these run in the pool and only take picklable arguments
+
+def _read_info(path: str) -> tuple[int, Dict[str, Any]]:
+    with fitz.open(path) as doc:
+        return doc.page_count, dict(doc.metadata or {})
+
+
+def _extract_pages(path: str, start: int, stop: int) -> List[str]:
+    with fitz.open(path) as doc:
+        return [clean_text(doc[number].get_text()) for number in range(start, stop)]
+
+
+async def extract_pdf(path: str, max_pages: Optional[int] = None) -> PdfExtraction:
+    """
+    Extract the text of the PDF at `path` in the process pool.
+    Large documents are split into page ranges that are extracted in parallel.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_process_pool()
+    page_count, metadata = await loop.run_in_executor(pool, _read_info, path)
+
+    stop = page_count if max_pages is None else min(max_pages, page_count)
+    step = max(1, settings.PDF_EXTRACTION_PAGES_PER_TASK)
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(pool, _extract_pages, path, start, min(start + step, stop))
+        for start in range(0, stop, step)
+    ))
+    return PdfExtraction(
+        page_count=page_count,
+        metadata=metadata,
+        pages=[page for chunk in chunks for page in chunk],
+    )
+
+
+def _copy_spool(spool: BinaryIO, path: str) -> None:
+    spool.seek(0)
+    with open(path, "wb") as target:
+        shutil.copyfileobj(spool, target, length=1024 * 1024)
+    spool.seek(0)
+
+
+async def extract_upload(spool: BinaryIO, max_pages: Optional[int] = None) -> PdfExtraction:
+    """
+    Extract an uploaded PDF in the process pool. Pool workers need a path, so the upload's
+    spool is copied to a temporary file in chunks rather than read into memory.
+    """
+    with tempfile.TemporaryDirectory() as tmpdir:
+        path = os.path.join(tmpdir, "upload.pdf")
+        await run_in_threadpool(_copy_spool, spool, path)
+        return await extract_pdf(path, max_pages)
@@ -0,0 +1,33 @@
+from typing import Any, Iterable, Literal
+
+from sqlalchemy import ARRAY, Integer, bindparam, inspect
+from sqlalchemy.orm import defer
+from sqlalchemy.orm.attributes import set_committed_value
+
+from app.models import Document
+
+# "summary" leaves out Document.text_content, which can be megabytes for extracted PDFs.
+# Document.summary itself stays, it is the short blurb list views show in place of the text.
+DocumentView = Literal["full", "summary"]
+
+
+def document_view_options(view: DocumentView) -> list[Any]:
+    """Loader options for Document rows, apply them to the statement or relationship loading documents."""
+    if view == "summary":
+        return [defer(Document.text_content)]
+    return []
+
+
+def omit_deferred_text(documents: Iterable[Document]) -> None:
+    """
+    Mark deferred text_content as None so serializing the document doesn't trigger a load,
+    which would fetch the column after all (and fail outright on async sessions).
+    """
+    for document in documents:
+        if "text_content" in inspect(document).unloaded:
+            set_committed_value(document, "text_content", None)
+
+
+def id_array(ids: list[int]):
+    """Bind a list of IDs as one array parameter, `IN` would need a parameter per ID."""
+    return bindparam(None, ids, type_=ARRAY(Integer))
@@ -0,0 +1,92 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any
+
+from app.core.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+class ResponseCache:
+    """
+    Cache for slow upstream responses, shared by the requests of one worker's event loop.
+
+    Entries are fresh for `ttl` seconds and may then be served stale for `stale_ttl` more
+    while one background call refreshes them. Concurrent misses for the same key wait on a
+    single upstream call instead of each making their own. Failed calls are not cached, a
+    failed refresh keeps the stale entry until it expires.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, stale_ttl: float = 0):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        # Values are (fetched_at, response), the LRU drops them once they are too old to serve stale
+        self._entries = LRUCache(maxsize=maxsize, ttl=ttl + stale_ttl)
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self.stale_hits = 0
+        self.coalesced = 0
+        self.refreshes = 0
+        self.errors = 0
+
+    def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is not None:
+            self.coalesced += 1
+            return task
+
+        async def load() -> Any:
+            try:
+                value = await loader()
+            except Exception as e:
+                self.errors += 1
+                logger.warning(f"Loading response {key!r} failed: {e!r}")
+                raise
+            else:
+                self._entries.set(key, (time.monotonic(), value))
+                return value
+            finally:
+                self._inflight.pop(key, None)
+
+        task = asyncio.create_task(load())
+        # Refreshes and abandoned loads have nobody awaiting them, their failure is logged above
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._inflight[key] = task
+        return task
+
+    def _refresh(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+        self.refreshes += 1
+        self._load(key, loader)
+
+    async def get(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """The cached response for `key`, calling `loader` when there is none to serve."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            fetched_at, value = entry
+            if time.monotonic() - fetched_at > self.ttl:
+                self.stale_hits += 1
+                self._refresh(key, loader)
+            return value
+        # Shielded so a client disconnecting doesn't cancel the call others are waiting on
+        return await asyncio.shield(self._load(key, loader))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self._entries.stats(),
+            "ttl": self.ttl,
+            "stale_ttl": self.stale_ttl,
+            "stale_hits": self.stale_hits,
+            "coalesced": self.coalesced,
+            "refreshes": self.refreshes,
+            "inflight": len(self._inflight),
+            "errors": self.errors,
+        }
@@ -0,0 +1,200 @@
+import math
+from typing import List, Literal, Optional, Tuple
+
+from sqlalchemy import Float, and_, case, distinct, func, select, true
+from sqlalchemy.dialects.postgresql import ARRAY, array
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import Select
+
+from app.core.result_filters import compile_filters
+from app.models import ClassificationResult, Document
+
+TimeInterval = Literal["day", "week", "month", "year"]
+
+PERCENTILES = (0.25, 0.5, 0.75, 0.9)
+# Scales spanning up to this many integers get one histogram bin per value
+MAX_VALUE_BINS = 100
+
+
+def result_criteria(
+    result,
+    workspace_id: int,
+    scheme_id: int,
+    run_id: Optional[int] = None,
+    filters: Optional[List[str]] = None,
+) -> list:
+    """
+    Results of a scheme on documents of the workspace, joined to Document by the caller.
+    The document join matters: moved documents keep their results under the old workspace's schemes.
+    """
+    criteria = [
+        result.scheme_id == scheme_id,
+        result.document_id == Document.id,
+        Document.workspace_id == workspace_id,
+    ]
+    if run_id is not None:
+        criteria.append(result.run_id == run_id)
+    criteria.extend(compile_filters(result.value, filters))
+    return criteria
+
+
+def field_labels(result, field: str, name: str = "labels"):
+    """
+    Lateral set of a field's values as text, one row per element for arrays and one row for scalars.
+    Missing and null values yield a NULL label.
+    """
+    element = result.value[field]
+    as_array = case(
+        (func.jsonb_typeof(element) == "array", element),
+        else_=func.jsonb_build_array(element),
+    )
+    return func.jsonb_array_elements_text(as_array).table_valued("label").lateral(name)
+
+
+def field_number(result, field: str):
+    """The field as a float where it holds a JSON number, else NULL (which aggregates skip)."""
+    element = result.value[field]
+    return case((func.jsonb_typeof(element) == "number", element.astext.cast(Float)))
+
+
+def label_frequency_statement(criteria: list, field: str, limit: int) -> Select:
+    labels = field_labels(ClassificationResult, field)
+    count = func.count().label("count")
+    return (
+        select(labels.c.label, count)
+        .select_from(ClassificationResult)
+        .join(labels, true())
+        .where(*criteria, labels.c.label.isnot(None))
+        .group_by(labels.c.label)
+        .order_by(count.desc(), labels.c.label)
+        .limit(limit)
+    )
+
+
+def field_count_statement(criteria: list, field: str) -> Select:
+    """Number of results with a non-null value for the field."""
+    element = ClassificationResult.value[field]
+    return (
+        select(func.count())
+        .select_from(ClassificationResult)
+        .where(*criteria, func.jsonb_typeof(element) != "null")
+    )
+
+
+def numeric_summary_statement(criteria: list, field: str) -> Select:
+    number = field_number(ClassificationResult, field)
+    return (
+        select(
+            func.count(number),
+            func.avg(number),
+            func.min(number),
+            func.max(number),
+            # One sort for all percentiles
+            func.percentile_cont(array(PERCENTILES, type_=Float)).within_group(number).cast(ARRAY(Float)),
+        )
+        .select_from(ClassificationResult)
+        .where(*criteria)
+    )
+
+
+def histogram_bounds(
+    minimum: float,
+    maximum: float,
+    scale_min: Optional[int],
+    scale_max: Optional[int],
+    bins: int,
+) -> Tuple[float, float, int]:
+    """
+    (lower, upper, bins) covering the declared scale, widened to the observed range when
+    values fall outside it. Narrow integer ranges get one bin per value, [value, value + 1).
+    """
+    lower = min(minimum, scale_min if scale_min is not None else minimum)
+    upper = max(maximum, scale_max if scale_max is not None else maximum)
+    if upper - lower <= MAX_VALUE_BINS:
+        lower = math.floor(lower)
+        bins = math.floor(upper) - lower + 1
+        return float(lower), float(lower + bins), bins
+    return float(lower), float(upper), bins
+
+
+def bucket_histogram_statement(criteria: list, field: str, lower: float, upper: float, bins: int) -> Select:
+    """Count per equal-width bucket 1..bins between `lower` and `upper`, the maximum falls in the last bucket."""
+    number = field_number(ClassificationResult, field)
+    bucket = func.least(func.width_bucket(number, lower, upper, bins), bins).label("bucket")
+    return (
+        select(bucket, func.count())
+        .select_from(ClassificationResult)
+        .where(*criteria, number.isnot(None))
+        .group_by(bucket)
+    )
+
+
+def time_series_statement(
+    criteria: list,
+    interval: TimeInterval,
+    field: Optional[str] = None,
+    numeric: bool = False,
+) -> Select:
+    """
+    Results per insertion_date bucket of their documents. With a numeric field the bucket's mean
+    is included, with a label field the counts are split by label.
+    """
+    bucket = func.date_trunc(interval, Document.insertion_date).label("bucket")
+    if field is None:
+        return (
+            select(bucket, func.count())
+            .select_from(ClassificationResult)
+            .where(*criteria)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+    if numeric:
+        number = field_number(ClassificationResult, field)
+        return (
+            select(bucket, func.count(number), func.avg(number))
+            .select_from(ClassificationResult)
+            .where(*criteria, number.isnot(None))
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+    labels = field_labels(ClassificationResult, field)
+    return (
+        select(bucket, labels.c.label, func.count())
+        .select_from(ClassificationResult)
+        .join(labels, true())
+        .where(*criteria, labels.c.label.isnot(None))
+        .group_by(bucket, labels.c.label)
+        .order_by(bucket, labels.c.label)
+    )
+
+
+def crosstab_statement(
+    criteria: list,
+    field: str,
+    other_scheme_id: int,
+    other_field: str,
+    run_id: Optional[int],
+    limit: int,
+) -> Select:
+    """
+    Number of documents per pair of the field's labels and another scheme's field labels.
+    Without `run_id` results of different runs are paired too, a document is still counted once per pair.
+    """
+    other = aliased(ClassificationResult)
+    rows = field_labels(ClassificationResult, field, "row_labels")
+    columns = field_labels(other, other_field, "column_labels")
+    other_on = [other.document_id == ClassificationResult.document_id, other.scheme_id == other_scheme_id]
+    if run_id is not None:
+        other_on.append(other.run_id == run_id)
+    count = func.count(distinct(ClassificationResult.document_id)).label("count")
+    return (
+        select(rows.c.label, columns.c.label, count)
+        .select_from(ClassificationResult)
+        .join(other, and_(*other_on))
+        .join(rows, true())
+        .join(columns, true())
+        .where(*criteria, rows.c.label.isnot(None), columns.c.label.isnot(None))
+        .group_by(rows.c.label, columns.c.label)
+        .order_by(count.desc(), rows.c.label, columns.c.label)
+        .limit(limit)
+    )
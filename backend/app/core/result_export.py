@@ -0,0 +1,215 @@
+import json
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, List, Literal, Optional, Sequence
+
+import pyarrow as pa
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import ClassificationResult, ClassificationScheme, Document, FieldType
+
+logger = logging.getLogger(__name__)
+
+ExportFormat = Literal["arrow", "parquet"]
+
+MEDIA_TYPES = {
+    "arrow": "application/vnd.apache.arrow.stream",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Columns every export starts with, the scheme's fields follow
+BASE_COLUMNS = [
+    pa.field("result_id", pa.int64(), nullable=False),
+    pa.field("document_id", pa.int64(), nullable=False),
+    pa.field("document_title", pa.string()),
+    pa.field("scheme_id", pa.int64(), nullable=False),
+    pa.field("run_id", pa.int64()),
+    pa.field("run_name", pa.string()),
+    pa.field("timestamp", pa.timestamp("us", tz="UTC")),
+]
+
+# List of dicts fields have no fixed shape across results and are exported as JSON text
+FIELD_TYPES = {
+    FieldType.INT: pa.int64(),
+    FieldType.STR: pa.string(),
+    FieldType.LIST_STR: pa.list_(pa.string()),
+    FieldType.LIST_DICT: pa.string(),
+}
+
+
+@dataclass
+class FieldColumn:
+    scheme_id: int
+    field: str
+    name: str
+    type: FieldType
+
+
+def field_columns(schemes: Sequence[ClassificationScheme]) -> List[FieldColumn]:
+    """
+    One column per field of the exported schemes, named after the field for a single scheme
+    and `scheme name.field` otherwise (`scheme id.field` where scheme names repeat).
+    """
+    names = [scheme.name for scheme in schemes]
+    columns = []
+    for scheme in schemes:
+        prefix = "" if len(schemes) == 1 else f"{scheme.name if names.count(scheme.name) == 1 else scheme.id}."
+        for field in scheme.fields:
+            columns.append(FieldColumn(scheme.id, field.name, f"{prefix}{field.name}", field.type))
+    return columns
+
+
+def export_schema(columns: Sequence[FieldColumn]) -> pa.Schema:
+    return pa.schema(BASE_COLUMNS + [pa.field(column.name, FIELD_TYPES[column.type]) for column in columns])
+
+
+def coerce_value(value: Any, field_type: FieldType) -> Any:
+    """A stored value as its column's type, values that don't fit export as null."""
+    if value is None:
+        return None
+    if field_type == FieldType.INT:
+        if isinstance(value, bool):
+            return None
+        if isinstance(value, int):
+            return value
+        try:
+            number = float(value)
+        except (TypeError, ValueError):
+            return None
+        return int(number) if number.is_integer() else None
+    if field_type == FieldType.STR:
+        return value if isinstance(value, str) else json.dumps(value)
+    if field_type == FieldType.LIST_STR:
+        values = value if isinstance(value, list) else [value]
+        return [item if isinstance(item, str) else json.dumps(item) for item in values if item is not None]
+    return json.dumps(value)
+
+
+def record_batch(rows: Sequence[Sequence[Any]], columns: Sequence[FieldColumn], schema: pa.Schema) -> pa.RecordBatch:
+    """Rows of (id, document_id, title, scheme_id, run_id, run_name, timestamp, value) as a record batch."""
+    data: List[List[Any]] = [[row[index] for row in rows] for index in range(len(BASE_COLUMNS))]
+    for column in columns:
+        data.append([
+            coerce_value(value.get(column.field), column.type)
+            if scheme_id == column.scheme_id and isinstance(value, dict) else None
+            for _, _, _, scheme_id, _, _, _, value in rows
+        ])
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(data, schema)],
+        schema=schema
+    )
+
+
+class ChunkSink:
+    """
+    Write-only file that hands out what was written since the last drain.
+    It keeps counting positions across drains, Parquet footers record absolute offsets.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        chunk = bytes(data)
+        self._chunks.append(chunk)
+        self._position += len(chunk)
+        return len(chunk)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class BatchWriter:
+    """Arrow IPC stream or Parquet writer over a ChunkSink, each batch becomes one row group in Parquet."""
+
+    def __init__(self, export_format: ExportFormat, schema: pa.Schema):
+        self.sink = ChunkSink()
+        self._file = pa.PythonFile(self.sink, mode="w")
+        if export_format == "parquet":
+            self._writer = pq.ParquetWriter(self._file, schema, compression="zstd")
+        else:
+            self._writer = ipc.new_stream(self._file, schema)
+
+    def write(self, batch: pa.RecordBatch) -> bytes:
+        self._writer.write_batch(batch)
+        return self.sink.drain()
+
+    def close(self) -> bytes:
+        self._writer.close()
+        return self.sink.drain()
+
+
+def export_statement(
+    workspace_id: int,
+    scheme_ids: Sequence[int],
+    run_id: Optional[int] = None,
+    document_ids: Optional[Sequence[int]] = None,
+):
+    statement = (
+        select(
+            ClassificationResult.id,
+            ClassificationResult.document_id,
+            Document.title,
+            ClassificationResult.scheme_id,
+            ClassificationResult.run_id,
+            ClassificationResult.run_name,
+            ClassificationResult.timestamp,
+            ClassificationResult.value,
+        )
+        .join(Document, Document.id == ClassificationResult.document_id)
+        .where(Document.workspace_id == workspace_id, ClassificationResult.scheme_id.in_(scheme_ids))
+        .order_by(ClassificationResult.id)
+    )
+    if run_id is not None:
+        statement = statement.where(ClassificationResult.run_id == run_id)
+    if document_ids is not None:
+        statement = statement.where(ClassificationResult.document_id.in_(document_ids))
+    return statement
+
+
+async def stream_export(
+    statement,
+    columns: Sequence[FieldColumn],
+    export_format: ExportFormat,
+    batch_size: Optional[int] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Results of `statement` encoded as they are read from a server-side cursor, `batch_size`
+    rows at a time, so memory stays flat however large the run. Uses its own session because
+    the request's session is closed before a streaming response body is sent.
+    """
+    batch_size = batch_size or settings.EXPORT_BATCH_SIZE
+    schema = export_schema(columns)
+    writer = BatchWriter(export_format, schema)
+    exported = 0
+    async with AsyncSession(async_engine) as session:
+        result = await session.stream(statement.execution_options(yield_per=batch_size))
+        async for rows in result.partitions(batch_size):
+            batch = await run_in_threadpool(record_batch, rows, columns, schema)
+            yield await run_in_threadpool(writer.write, batch)
+            exported += len(rows)
+    yield writer.close()
+    logger.info(f"Exported {exported} classification results as {export_format}")
+
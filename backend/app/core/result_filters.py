@@ -0,0 +1,82 @@
+import json
+import math
+from dataclasses import dataclass
+from typing import Any, Dict, List
+
+from fastapi import HTTPException
+from sqlalchemy import cast, not_
+from sqlalchemy.dialects.postgresql import JSONPATH
+from sqlalchemy.sql import ColumnElement
+
+# Operators of the filter DSL, `field:op:value`
+COMPARISONS = {"gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+OPERATORS = {"eq", "ne", "contains", "exists", *COMPARISONS}
+
+
+@dataclass
+class ResultFilter:
+    """
+    One condition on a classification result's value, parsed from `field:op:value`.
+    `field` may be a dotted path into nested objects, `value` is read as JSON when it
+    parses (7, true, "7") and as a plain string otherwise.
+
+        categories:contains:Healthcare
+        score:gte:7
+        summary.sentiment:eq:negative
+        location:exists
+    """
+    path: List[str]
+    op: str
+    value: Any = None
+
+    @classmethod
+    def parse(cls, spec: str) -> "ResultFilter":
+        field, _, rest = spec.partition(":")
+        op, _, raw = rest.partition(":")
+        path = field.split(".") if field else []
+        if not path or not all(path) or op not in OPERATORS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid filter '{spec}', expected field:op:value with op one of {', '.join(sorted(OPERATORS))}"
+            )
+        if op == "exists":
+            return cls(path, op)
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = raw
+        if op in COMPARISONS and (
+            not isinstance(value, (int, float, str)) or isinstance(value, bool)
+            or (isinstance(value, float) and not math.isfinite(value))
+        ):
+            raise HTTPException(status_code=400, detail=f"Invalid filter '{spec}', {op} needs a number or a string")
+        return cls(path, op, value)
+
+    def _nest(self, leaf: Any) -> Dict[str, Any]:
+        for key in reversed(self.path):
+            leaf = {key: leaf}
+        return leaf
+
+    def _jsonpath(self) -> str:
+        # Keys are quoted and literals JSON-encoded, so input can't change the path's structure
+        path = "$" + "".join(f".{json.dumps(key)}" for key in self.path)
+        if self.op == "exists":
+            return path
+        return f"{path} ? (@ {COMPARISONS[self.op]} {json.dumps(self.value)})"
+
+    def compile(self, column) -> ColumnElement:
+        """
+        Predicate on a JSONB column. Operators compile to `@>` or `@?`, which a GIN
+        jsonb_path_ops index can answer, `ne` to a negated `@>` which it can't.
+        """
+        if self.op == "eq":
+            return column.op("@>", is_comparison=True)(self._nest(self.value))
+        if self.op == "ne":
+            return not_(column.op("@>", is_comparison=True)(self._nest(self.value)))
+        if self.op == "contains":
+            return column.op("@>", is_comparison=True)(self._nest([self.value]))
+        return column.op("@?", is_comparison=True)(cast(self._jsonpath(), JSONPATH))
+
+
+def compile_filters(column, specs: List[str]) -> List[ColumnElement]:
+    return [ResultFilter.parse(spec).compile(column) for spec in specs or []]
@@ -0,0 +1,151 @@
+import logging
+from typing import List, Optional
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from minio import Minio
+from minio.deleteobjects import DeleteObject
+from minio.error import S3Error
+from sqlalchemy import ARRAY, Text, bindparam, func
+from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.db import engine
+from app.core.dedup import blob_object_name
+from app.models import Document, File as FileModel
+
+# Content-addressed blobs are shared by every File row with their sha256 and uploaded once.
+# Writers that make a row refer to a blob (uploads, copies) hold a shared advisory lock on its
+# digest until their transaction commits. remove_stored_files only removes a blob after taking
+# the lock exclusively and finding no row that refers to it, and skips blobs it can't lock.
+
+
+def blob_lock_key(sha256):
+    """Advisory lock key of a blob, `sha256` is a digest or a SQL expression giving one."""
+    return func.hashtextextended(sha256, 0)
+
+
+async def lock_blob(session: AsyncSession, sha256: str) -> None:
+    """Keep the blob from being removed until the session's transaction ends."""
+    await session.execute(select(func.pg_advisory_xact_lock_shared(blob_lock_key(sha256))))
+
+
+class MinioClient:
+    def __init__(self):
+        self.client = Minio(
+            endpoint=settings.MINIO_ENDPOINT,
+            access_key=settings.MINIO_ROOT_USER,
+            secret_key=settings.MINIO_ROOT_PASSWORD,
+            secure=settings.MINIO_SECURE,
+        )
+        self.bucket_name = settings.MINIO_BUCKET_NAME
+        self._ensure_bucket_exists()
+
+    def _ensure_bucket_exists(self):
+        try:
+            if not self.client.bucket_exists(self.bucket_name):
+                self.client.make_bucket(self.bucket_name)
+                logging.info(f"Bucket '{self.bucket_name}' created.")
+        except S3Error as e:
+            logging.error(f"Error creating bucket: {e}")
+            raise HTTPException(
+                status_code=500, detail="Failed to create bucket."
+            )
+
+    async def upload_file(self, file: UploadFile, object_name: str):
+        """
+        Stream the upload's spool into MinIO in fixed-size parts.
+        Only one part is held in memory at a time, whatever the file size.
+        """
+        try:
+            await file.seek(0)
+            await run_in_threadpool(
+                self.client.put_object,
+                bucket_name=self.bucket_name,
+                object_name=object_name,
+                data=file.file,
+                length=file.size if file.size is not None else -1,
+                part_size=settings.MINIO_UPLOAD_PART_SIZE,
+                content_type=file.content_type or "application/octet-stream",
+            )
+            logging.info(f"File '{file.filename}' uploaded successfully to '{object_name}'.")
+        except S3Error as e:
+            logging.error(f"Error uploading file: {e}")
+            raise HTTPException(
+                status_code=500, detail="Failed to upload file."
+            )
+        except Exception as e:
+            logging.error(f"Unexpected error during file upload: {e}")
+            raise HTTPException(
+                status_code=500, detail="Unexpected error during file upload."
+            )
+
+    async def store_file(self, file: UploadFile, sha256: str) -> str:
+        """
+        Store an upload under its content address, unless that blob already exists.
+        Returns the object name.
+        """
+        object_name = blob_object_name(sha256)
+        try:
+            await run_in_threadpool(self.client.stat_object, self.bucket_name, object_name)
+            logging.info(f"File '{file.filename}' already stored as '{object_name}'.")
+            return object_name
+        except S3Error as e:
+            if e.code != "NoSuchKey":
+                raise
+        await self.upload_file(file, object_name)
+        return object_name
+
+
+minio_client = MinioClient()
+
+
+def stored_objects_statement(*criteria):
+    """(document_id, name, sha256) of the stored files of documents matching `criteria`."""
+    return (
+        select(FileModel.document_id, FileModel.name, FileModel.sha256)
+        .join(Document, FileModel.document_id == Document.id)
+        .where(*criteria)
+    )
+
+
+def remove_stored_objects(object_names: List[str]) -> None:
+    """
+    Delete objects in batches of MINIO_DELETE_BATCH_SIZE, one DeleteObjects request each.
+    Meant to run as a background task once the rows are gone, so errors are logged rather than raised.
+    """
+    batch_size = settings.MINIO_DELETE_BATCH_SIZE
+    for start in range(0, len(object_names), batch_size):
+        batch = object_names[start:start + batch_size]
+        errors = minio_client.client.remove_objects(
+            minio_client.bucket_name, [DeleteObject(name) for name in batch]
+        )
+        # remove_objects is lazy, errors have to be consumed for the deletes to run
+        for error in errors:
+            logging.error(f"Error removing object {error.name}: {error}")
+    if object_names:
+        logging.info(f"Removed {len(object_names)} stored objects")
+
+
+def remove_stored_files(stored: List[tuple[int, str, Optional[str]]]) -> None:
+    """
+    Remove the objects of deleted (document_id, name, sha256) file rows.
+    Content-addressed blobs are shared, so only those no file refers to are removed, see blob_lock_key.
+    """
+    object_names = [f"{document_id}/{name}" for document_id, name, sha256 in stored if not sha256]
+    digests = sorted({sha256 for _, _, sha256 in stored if sha256})
+    with Session(engine) as session:
+        if digests:
+            candidates = func.unnest(bindparam(None, digests, type_=ARRAY(Text))).column_valued("sha256")
+            # Blobs being uploaded or copied right now are locked and kept
+            locked = session.execute(
+                select(candidates).where(func.pg_try_advisory_xact_lock(blob_lock_key(candidates)))
+            ).scalars().all()
+            # Checked after locking, rows committed before the lock was taken are seen
+            referenced = set(session.execute(
+                select(FileModel.sha256).where(FileModel.sha256.in_(locked)).distinct()
+            ).scalars().all())
+            object_names += [blob_object_name(sha256) for sha256 in locked if sha256 not in referenced]
+        # Removed while the locks are held, an upload waiting on one finds the blob gone and stores it again
+        remove_stored_objects(object_names)
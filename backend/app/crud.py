@@ -1,8 +1,15 @@
 from typing import Any
 
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.core.security import get_password_hash, verify_password
+from app.core.security import (
+    get_password_hash,
+    get_password_hash_async,
+    password_needs_rehash,
+    verify_password,
+    verify_password_async,
+)
 from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
 
 
@@ -42,6 +49,28 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
         return None
     if not verify_password(password, db_user.hashed_password):
         return None
+    if password_needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = get_password_hash(password)
+        session.add(db_user)
+        session.commit()
+    return db_user
+
+
+async def authenticate_async(*, session: AsyncSession, email: str, password: str) -> User | None:
+    """
+    authenticate for async routes, bcrypt waits on the password hashing threads without
+    holding a request thread. Hashes made with an outdated BCRYPT_ROUNDS are replaced
+    while the plain password is at hand.
+    """
+    db_user = (await session.exec(select(User).where(User.email == email))).first()
+    if not db_user:
+        return None
+    if not await verify_password_async(password, db_user.hashed_password):
+        return None
+    if password_needs_rehash(db_user.hashed_password):
+        db_user.hashed_password = await get_password_hash_async(password)
+        session.add(db_user)
+        await session.commit()
     return db_user
 
 
@@ -51,3 +80,4 @@ def create_item(*, session: Session, item_in: ItemCreate, owner_id: int) -> Item
     session.commit()
     session.refresh(db_item)
     return db_item
+
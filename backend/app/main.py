@@ -1,3 +1,5 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.routing import APIRoute
@@ -6,14 +8,25 @@ from starlette.middleware.cors import CORSMiddleware
 from app.api.main import api_router_v1
 from app.api.main import api_router_v2
 from app.core.config import settings
+from app.core.http_client import close_http_client, get_http_client
+from app.core.pdf_extraction import shutdown_process_pool
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    get_http_client()
+    yield
+    await close_http_client()
+    shutdown_process_pool()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
     redirect_slashes=False
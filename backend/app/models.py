@@ -1,10 +1,17 @@
 from sqlmodel import Field, Relationship, SQLModel
 from typing import List, Optional, Dict, Any, Union, Literal
 from datetime import datetime, timezone
-from sqlalchemy import Column, ARRAY, Text, JSON, Integer, UniqueConstraint, String, Enum, DateTime
+from sqlalchemy import Column, ARRAY, BigInteger, Text, text, JSON, Integer, UniqueConstraint, String, Enum, DateTime, Index, ForeignKey, Float
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.types import UserDefinedType
 from pydantic import BaseModel, model_validator
 import enum
 
+from app.core.config import settings
+
+# Relationships to children whose foreign key is ON DELETE CASCADE set passive_deletes,
+# the database removes the children and the ORM doesn't load them first.
+
 # Shared properties
 # TODO replace email str with EmailStr when sqlmodel supports it
 class UserBase(SQLModel):
@@ -176,13 +183,13 @@ class ClassificationSchemeBase(SQLModel):
     name: str
     description: str
     model_instructions: Optional[str] = None
-    validation_rules: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSON))
+    validation_rules: Optional[Dict[str, Any]] = Field(default=None, sa_column=Column(JSONB))
 
 
 # Add this after the FieldType enum definition
 class ClassificationField(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    scheme_id: int = Field(foreign_key="classificationscheme.id")
+    scheme_id: int = Field(sa_column=Column(Integer, ForeignKey("classificationscheme.id", ondelete="CASCADE"), nullable=False, index=True))
     name: str
     description: str
     type: FieldType = Field(sa_column=Column(Enum(FieldType)))
@@ -196,14 +203,18 @@ class ClassificationField(SQLModel, table=True):
 
 # Database table model
 class ClassificationScheme(ClassificationSchemeBase, table=True):
+    __table_args__ = (
+        Index("ix_classificationscheme_validation_rules", "validation_rules", postgresql_using="gin", postgresql_ops={"validation_rules": "jsonb_path_ops"}),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
-    workspace_id: int = Field(foreign_key="workspace.uid")
+    workspace_id: int = Field(sa_column=Column(Integer, ForeignKey("workspace.uid", ondelete="CASCADE"), nullable=False, index=True))
     user_id: int = Field(foreign_key="user.id")
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    fields: List[ClassificationField] = Relationship(back_populates="scheme")
+    fields: List[ClassificationField] = Relationship(back_populates="scheme", sa_relationship_kwargs={"passive_deletes": True})
     workspace: Optional["Workspace"] = Relationship(back_populates="classification_schemes")
-    classification_results: List["ClassificationResult"] = Relationship(back_populates="scheme")
+    classification_results: List["ClassificationResult"] = Relationship(back_populates="scheme", sa_relationship_kwargs={"passive_deletes": True})
 
 
 # API models
@@ -241,12 +252,18 @@ class FileBase(SQLModel):
 
 class File(FileBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
-    document_id: Optional[int] = Field(default=None, foreign_key="document.id")
+    document_id: Optional[int] = Field(
+        default=None,
+        sa_column=Column(Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=True, index=True)
+    )
+    # Content-addressed uploads are stored once per digest, see app.core.dedup
+    sha256: Optional[str] = Field(default=None, max_length=64, index=True)
     document: Optional["Document"] = Relationship(back_populates="files")
 
 
 class FileRead(FileBase):
     id: int
+    sha256: Optional[str] = None
     document_id: int
 
 
@@ -269,15 +286,30 @@ class DocumentBase(SQLModel):
 
 
 class Document(DocumentBase, table=True):
+    # Serves keyset pagination of a workspace's documents by (insertion_date, id)
+    __table_args__ = (
+        Index("ix_document_workspace_insertion_id", "workspace_id", "insertion_date", "id"),
+        # At most one document per content in a workspace
+        Index(
+            "uq_document_workspace_content_hash",
+            "workspace_id",
+            "content_hash",
+            unique=True,
+            postgresql_where=text("content_hash IS NOT NULL"),
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
+    # Set on ingest from the files, text or URL (app.core.dedup.document_content_hash), not on edits
+    content_hash: Optional[str] = Field(default=None, max_length=64)
     insertion_date: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
-    workspace_id: int = Field(foreign_key="workspace.uid")
+    workspace_id: int = Field(sa_column=Column(Integer, ForeignKey("workspace.uid", ondelete="CASCADE"), nullable=False))
     user_id: int = Field(foreign_key="user.id")
 
     workspace: Optional["Workspace"] = Relationship(back_populates="documents")
     user: Optional["User"] = Relationship(back_populates="documents")
-    files: List["File"] = Relationship(back_populates="document", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
-    classification_results: List["ClassificationResult"] = Relationship(back_populates="document", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+    files: List["File"] = Relationship(back_populates="document", sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True})
+    classification_results: List["ClassificationResult"] = Relationship(back_populates="document", sa_relationship_kwargs={"cascade": "all, delete-orphan", "passive_deletes": True})
 
 
 class DocumentCreate(DocumentBase):
@@ -290,6 +322,7 @@ class DocumentRead(DocumentBase):
     insertion_date: datetime
     workspace_id: int
     user_id: int
+    content_hash: Optional[str] = None
     files: List["FileRead"] = []
 
 
@@ -299,7 +332,127 @@ class DocumentUpdate(DocumentBase):
 
 class DocumentsOut(SQLModel):
     data: List[DocumentRead]
-    count: int
+    # Only filled when requested, may be an estimate
+    count: Optional[int] = None
+    # Pass back as `cursor` to fetch the next page, None on the last page
+    next_cursor: Optional[str] = None
+
+
+class Vector(UserDefinedType):
+    """pgvector `vector(n)` column, values are lists of floats."""
+    cache_ok = True
+    render_bind_cast = True
+
+    def __init__(self, dimensions: int):
+        self.dimensions = dimensions
+
+    def get_col_spec(self, **kw) -> str:
+        return f"vector({self.dimensions})"
+
+    def bind_processor(self, dialect):
+        def process(value):
+            if value is None:
+                return None
+            return "[" + ",".join(str(float(component)) for component in value) + "]"
+        return process
+
+    def result_processor(self, dialect, coltype):
+        def process(value):
+            if value is None or isinstance(value, list):
+                return value
+            return [float(component) for component in value.strip("[]").split(",") if component]
+        return process
+
+    class comparator_factory(UserDefinedType.Comparator):
+        def cosine_distance(self, other):
+            return self.op("<=>", return_type=Float)(other)
+
+
+class DocumentChunk(SQLModel, table=True):
+    """
+    Embedded piece of a document for semantic search.
+    `content_hash` covers the document text and the embedding model, so
+    unchanged documents are skipped when they are embedded again.
+    """
+    __table_args__ = (
+        Index(
+            "ix_documentchunk_embedding",
+            "embedding",
+            postgresql_using="hnsw",
+            postgresql_ops={"embedding": "vector_cosine_ops"},
+        ),
+        # init_db leaves the table out while the extension isn't installed
+        {"info": {"requires_extension": "vector"}},
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    document_id: int = Field(sa_column=Column(Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False, index=True))
+    # Copied from the document so searches can filter without a join
+    workspace_id: int = Field(sa_column=Column(Integer, ForeignKey("workspace.uid", ondelete="CASCADE"), nullable=False, index=True))
+    chunk_index: int
+    text: str = Field(sa_column=Column(Text, nullable=False))
+    content_hash: str = Field(max_length=64)
+    embedding: List[float] = Field(sa_column=Column(Vector(settings.EMBEDDING_DIMENSIONS), nullable=False))
+
+
+class DocumentMinHash(SQLModel, table=True):
+    """
+    MinHash signature of a document's shingled text and its LSH band hashes.
+    Documents sharing a band hash are near-duplicate candidates.
+    """
+    __table_args__ = (
+        Index("ix_documentminhash_bands", "bands", postgresql_using="gin"),
+    )
+
+    document_id: int = Field(sa_column=Column(Integer, ForeignKey("document.id", ondelete="CASCADE"), primary_key=True))
+    workspace_id: int = Field(sa_column=Column(Integer, ForeignKey("workspace.uid", ondelete="CASCADE"), nullable=False, index=True))
+    # sha256 of the normalized text the signature was computed from
+    text_hash: str = Field(max_length=64)
+    signature: List[int] = Field(sa_column=Column(ARRAY(BigInteger), nullable=False))
+    bands: List[int] = Field(sa_column=Column(ARRAY(BigInteger), nullable=False))
+
+
+class NearDuplicateCluster(SQLModel):
+    # Oldest document of the cluster, the one classified for all of them
+    representative_id: int
+    document_ids: List[int]
+
+
+class NearDuplicateClustersOut(SQLModel):
+    data: List[NearDuplicateCluster]
+    threshold: float
+
+
+class DocumentSearchType(str, enum.Enum):
+    # Same values as SearchType of the OPOL search proxy
+    TEXT = "text"
+    SEMANTIC = "semantic"
+
+
+class DocumentSearchHit(SQLModel):
+    document: DocumentRead
+    # ts_rank_cd for text search, cosine similarity of the best chunk for semantic search
+    rank: float
+    # Text search: matching fragments with the query terms wrapped in <mark></mark>.
+    # Semantic search: the start of the closest chunk.
+    headline: str
+
+
+class DocumentSearchOut(SQLModel):
+    data: List[DocumentSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class DocumentTransferResult(SQLModel):
+    message: str
+    # Source document ID -> ID in the target workspace, the same ID for moves
+    id_mapping: Dict[int, int] = {}
+    # Requested documents that aren't in the source workspace
+    skipped: List[int] = []
+    # Source document ID -> target document with the same content, these are not transferred
+    duplicates: Dict[int, int] = {}
+    # Files whose storage copy failed, they are left out of the copied document
+    failed_files: List[Dict[str, Any]] = []
 
 
 class WorkspaceBase(SQLModel):
@@ -315,8 +468,8 @@ class Workspace(WorkspaceBase, table=True):
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     owner: Optional[User] = Relationship(back_populates="workspaces")
-    classification_schemes: List["ClassificationScheme"] = Relationship(back_populates="workspace")
-    documents: List["Document"] = Relationship(back_populates="workspace")
+    classification_schemes: List["ClassificationScheme"] = Relationship(back_populates="workspace", sa_relationship_kwargs={"passive_deletes": True})
+    documents: List["Document"] = Relationship(back_populates="workspace", sa_relationship_kwargs={"passive_deletes": True})
 
 
 class WorkspaceCreate(WorkspaceBase):
@@ -342,19 +495,24 @@ class ClassificationResultBase(SQLModel):
     run_id: int
     document_id: int = Field(foreign_key="document.id")
     scheme_id: int = Field(foreign_key="classificationscheme.id")
-    value: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    value: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSONB))
     timestamp: datetime
     run_name: Optional[str] = None
     run_description: Optional[str] = None
 
 
 class ClassificationResult(ClassificationResultBase, table=True):
+    # Serves the @> / @? filters of app.core.result_filters
+    __table_args__ = (
+        Index("ix_classificationresult_value", "value", postgresql_using="gin", postgresql_ops={"value": "jsonb_path_ops"}),
+    )
+
     id: int = Field(default=None, primary_key=True)
     document: Document = Relationship(back_populates="classification_results")
     scheme: ClassificationScheme = Relationship(back_populates="classification_results")
     run_id: int
-    document_id: int = Field(foreign_key="document.id")
-    scheme_id: int = Field(foreign_key="classificationscheme.id")
+    document_id: int = Field(sa_column=Column(Integer, ForeignKey("document.id", ondelete="CASCADE"), nullable=False, index=True))
+    scheme_id: int = Field(sa_column=Column(Integer, ForeignKey("classificationscheme.id", ondelete="CASCADE"), nullable=False, index=True))
 
 
 class ClassificationResultRead(ClassificationResultBase):
@@ -373,6 +531,67 @@ class ClassificationResultCreate(SQLModel):
     run_description: Optional[str] = None
 
 
+# Content-addressed store of raw LLM outputs, keyed by
+# sha256(text, compiled scheme definition, provider, model)
+class ClassificationCacheEntry(SQLModel, table=True):
+    key: str = Field(primary_key=True, max_length=64)
+    value: Dict[str, Any] = Field(default_factory=dict, sa_column=Column(JSON))
+    provider: str
+    model: str
+    created_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_column=Column(DateTime(timezone=True), index=True, nullable=False)
+    )
+
+
+class ClassificationRunCreate(SQLModel):
+    run_id: int
+    scheme_ids: List[int]
+    # Document set: explicit IDs, a saved result set, or (if neither) the whole workspace
+    document_ids: Optional[List[int]] = None
+    saved_result_set_id: Optional[int] = None
+    # Classify one representative per near-duplicate cluster and copy its results to the others
+    representatives_only: bool = False
+    run_name: Optional[str] = None
+    run_description: Optional[str] = None
+
+
+class ClassificationRunStatus(SQLModel):
+    run_id: int
+    workspace_id: int
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    provider: str
+    model: str
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    # Results copied from a cluster representative instead of classified
+    copied: int = 0
+    errors: List[str] = []
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class PdfExtractionJobCreate(SQLModel):
+    file_ids: List[int]
+    # Also fill title and summary from the PDF metadata and first page
+    autofill: bool = False
+
+
+class PdfExtractionJobStatus(SQLModel):
+    job_id: str
+    workspace_id: int
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    total: int = 0
+    completed: int = 0
+    failed: int = 0
+    document_ids: List[int] = []
+    errors: List[str] = []
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
 class SavedResultSetBase(SQLModel):
     name: str
     document_ids: List[int] = Field(default=[], sa_column=Column(ARRAY(Integer)))
@@ -381,7 +600,7 @@ class SavedResultSetBase(SQLModel):
 
 class SavedResultSet(SavedResultSetBase, table=True):
     id: int = Field(default=None, primary_key=True)
-    workspace_id: int = Field(foreign_key="workspace.uid")
+    workspace_id: int = Field(sa_column=Column(Integer, ForeignKey("workspace.uid", ondelete="CASCADE"), nullable=False, index=True))
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
@@ -398,16 +617,120 @@ class SavedResultSetRead(SavedResultSetBase):
     results: List["ClassificationResultRead"] = Field(default_factory=list)
 
 
+# Aggregates over one field of a scheme's results, computed in SQL
+
+class LabelCount(SQLModel):
+    label: str
+    count: int
+
+
+class LabelFrequencyOut(SQLModel):
+    scheme_id: int
+    field: str
+    # Results with a value for the field, a result can carry several labels
+    results: int
+    data: List[LabelCount]
+
+
+class HistogramBin(SQLModel):
+    # Inclusive lower bound, exclusive upper bound except for the last bin
+    lower: float
+    upper: float
+    count: int
+
+
+class NumericSummaryOut(SQLModel):
+    scheme_id: int
+    field: str
+    count: int
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    # "p25", "p50", "p75", "p90"
+    percentiles: Dict[str, float] = {}
+    histogram: List[HistogramBin] = []
+
+
+class TimeSeriesPoint(SQLModel):
+    bucket: datetime
+    count: int
+    # Numeric fields: mean of the bucket. Label fields: one point per (bucket, label).
+    mean: Optional[float] = None
+    label: Optional[str] = None
+
+
+class TimeSeriesOut(SQLModel):
+    scheme_id: int
+    field: Optional[str] = None
+    interval: str
+    data: List[TimeSeriesPoint]
+
+
+class CrossTabCell(SQLModel):
+    row: str
+    column: str
+    count: int
+
+
+class CrossTabOut(SQLModel):
+    scheme_id: int
+    field: str
+    other_scheme_id: int
+    other_field: str
+    data: List[CrossTabCell]
+
+
 class ClassificationResultQuery(SQLModel):
     document_ids: List[int] = Field(default=[])
 
 
+def scheme_display_rules(scheme: Any) -> Dict[str, Any]:
+    """
+    The parts of a scheme that display_value depends on.
+    Listings compute these once per scheme and reuse them for every result.
+    """
+    fields = getattr(scheme, 'fields', None) or []
+    first = fields[0] if fields else None
+    return {
+        'field_names': [field.name for field in fields],
+        'binary': getattr(first, 'scale_min', None) == 0 and getattr(first, 'scale_max', None) == 1,
+    }
+
+
+def compute_display_value(value: Any, rules: Dict[str, Any]) -> Union[float, str, Dict[str, Any], List[Any], None]:
+    # Handle different value types
+    if isinstance(value, str):
+        # Special case for "N/A"
+        return "N/A" if value.lower() == "n/a" else value
+        
+    # Handle numeric values, binary scales (0-1) are shown as True/False
+    if isinstance(value, (int, float)):
+        if rules['binary']:
+            return 'True' if value > 0.5 else 'False'
+        return value
+        
+    # Handle object values
+    if isinstance(value, dict) and value:
+        # If we have fields defined, try to extract values based on field names
+        extracted_values = {name: value[name] for name in rules['field_names'] if name in value}
+        # If no fields match or no fields defined, use the whole object
+        return extracted_values or value
+        
+    # Handle array values
+    if isinstance(value, list):
+        return value
+        
+    # Default case
+    return str(value) if value is not None else None
+
+
 class EnhancedClassificationResultRead(ClassificationResultRead):
     display_value: Union[float, str, Dict[str, Any], None] = Field(default=None)
     
     @model_validator(mode='before')
     def convert_value(cls, data: Any):
-        if not isinstance(data, dict):
+        # Callers may pass a precomputed display_value, see scheme_display_rules
+        if not isinstance(data, dict) or 'display_value' in data:
             return data
             
         scheme = data.get('scheme')
@@ -416,55 +739,5 @@ class EnhancedClassificationResultRead(ClassificationResultRead):
         if scheme is None or value is None:
             return data
         
-        # Handle different value types
-        if isinstance(value, str):
-            # Special case for "N/A"
-            if value.lower() == "n/a":
-                data['display_value'] = "N/A"
-                return data
-            
-            # For simple string values
-            data['display_value'] = value
-            return data
-            
-        # Handle numeric values
-        if isinstance(value, (int, float)):
-            # Check if we have fields to determine if this is binary
-            if hasattr(scheme, 'fields') and scheme.fields and len(scheme.fields) > 0:
-                field = scheme.fields[0]
-                if hasattr(field, 'scale_min') and hasattr(field, 'scale_max'):
-                    if field.scale_min == 0 and field.scale_max == 1:
-                        data['display_value'] = 'True' if value > 0.5 else 'False'
-                        return data
-            
-            # Regular numeric value
-            data['display_value'] = value
-            return data
-            
-        # Handle object values
-        if isinstance(value, dict) and value:
-            # If we have fields defined, try to extract values based on field names
-            if hasattr(scheme, 'fields') and scheme.fields:
-                field_names = [field.name for field in scheme.fields]
-                extracted_values = {}
-                
-                for field_name in field_names:
-                    if field_name in value:
-                        extracted_values[field_name] = value[field_name]
-                
-                if extracted_values:
-                    data['display_value'] = extracted_values
-                    return data
-            
-            # If no fields match or no fields defined, use the whole object
-            data['display_value'] = value
-            return data
-            
-        # Handle array values
-        if isinstance(value, list):
-            data['display_value'] = value
-            return data
-            
-        # Default case
-        data['display_value'] = str(value) if value is not None else None
+        data['display_value'] = compute_display_value(value, scheme_display_rules(scheme))
         return data
@@ -0,0 +1,140 @@
+from datetime import datetime, timezone
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, delete, select
+
+from app import crud
+from app.api.routes import classification_results
+from app.core.config import settings
+from app.core.db import async_engine
+from app.models import (
+    ClassificationField,
+    ClassificationResult,
+    ClassificationScheme,
+    Document,
+    FieldType,
+    Workspace,
+)
+from app.tests.utils.utils import random_lower_string
+
+
+def create_workspace_with_results(db: Session, n_documents: int) -> Workspace:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user is not None
+    workspace = Workspace(name=random_lower_string(), user_id_ownership=user.id)
+    db.add(workspace)
+    db.flush()
+
+    schemes = []
+    for name in ("binary", "labels"):
+        scheme = ClassificationScheme(
+            name=name, description=name, workspace_id=workspace.uid, user_id=user.id
+        )
+        db.add(scheme)
+        db.flush()
+        db.add(ClassificationField(
+            scheme_id=scheme.id, name="answer", description=name, type=FieldType.INT,
+            scale_min=0, scale_max=1
+        ))
+        schemes.append(scheme)
+
+    for i in range(n_documents):
+        document = Document(title=f"doc {i}", workspace_id=workspace.uid, user_id=user.id)
+        db.add(document)
+        db.flush()
+        for scheme in schemes:
+            db.add(ClassificationResult(
+                run_id=1, document_id=document.id, scheme_id=scheme.id,
+                value={"answer": 1}, timestamp=datetime.now(timezone.utc)
+            ))
+    db.commit()
+    return workspace
+
+
+def delete_workspace(db: Session, workspace: Workspace) -> None:
+    # Documents, schemes, fields and results cascade in the database
+    db.execute(delete(Workspace).where(Workspace.uid == workspace.uid))
+    db.commit()
+
+
+def count_list_queries(client: TestClient, headers: dict[str, str], workspace_id: int) -> int:
+    statements: list[str] = []
+
+    def before_cursor_execute(conn, cursor, statement, *args) -> None:
+        statements.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        response = client.get(
+            f"{settings.API_V1_STR}/workspaces/{workspace_id}/classification_results",
+            headers=headers,
+            params={"limit": 1000},
+        )
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    assert response.status_code == 200
+    assert all(result["display_value"] == {"answer": 1} for result in response.json())
+    return len(statements)
+
+
+def test_list_classification_results_query_count_is_constant(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    small = create_workspace_with_results(db, n_documents=2)
+    large = create_workspace_with_results(db, n_documents=25)
+    try:
+        small_count = count_list_queries(client, normal_user_token_headers, small.uid)
+        large_count = count_list_queries(client, normal_user_token_headers, large.uid)
+    finally:
+        delete_workspace(db, small)
+        delete_workspace(db, large)
+
+    # Authorization, results, documents, files, schemes, fields
+    assert large_count == small_count
+    assert large_count <= 6
+
+
+def test_workspace_authorization_is_cached(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    workspace = create_workspace_with_results(db, n_documents=2)
+    try:
+        first = count_list_queries(client, normal_user_token_headers, workspace.uid)
+        second = count_list_queries(client, normal_user_token_headers, workspace.uid)
+    finally:
+        delete_workspace(db, workspace)
+
+    assert second == first - 1
+
+
+def test_classification_run_status(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, monkeypatch
+) -> None:
+    started = []
+
+    async def fake_run(status, **kwargs):
+        started.append((status.run_id, sorted(kwargs["document_ids"])))
+
+    monkeypatch.setattr(classification_results, "run_classification_batch", fake_run)
+    workspace = create_workspace_with_results(db, n_documents=2)
+    try:
+        url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/classification_results/runs"
+        scheme_ids = db.exec(
+            select(ClassificationScheme.id).where(ClassificationScheme.workspace_id == workspace.uid)
+        ).all()
+        document_ids = db.exec(select(Document.id).where(Document.workspace_id == workspace.uid)).all()
+
+        response = client.post(url, headers=normal_user_token_headers, json={"run_id": 42, "scheme_ids": scheme_ids})
+        assert response.status_code == 202
+        assert response.json()["total"] == 4
+        assert started == [(42, sorted(document_ids))]
+
+        response = client.get(f"{url}/42", headers=normal_user_token_headers)
+        assert response.status_code == 200
+        assert response.json()["run_id"] == 42
+
+        response = client.get(f"{url}/999999", headers=normal_user_token_headers)
+        assert response.status_code == 404
+    finally:
+        delete_workspace(db, workspace)
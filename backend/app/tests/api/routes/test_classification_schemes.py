@@ -0,0 +1,37 @@
+from fastapi.testclient import TestClient
+from sqlmodel import Session, func, select
+
+from app.core.config import settings
+from app.models import ClassificationField, ClassificationResult, ClassificationScheme
+from app.tests.api.routes.test_classification_results import (
+    create_workspace_with_results,
+    delete_workspace,
+)
+
+
+def count_rows(db: Session, model, scheme_id: int) -> int:
+    return db.exec(select(func.count()).select_from(model).where(model.scheme_id == scheme_id)).one()
+
+
+def test_delete_scheme_with_results(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    workspace = create_workspace_with_results(db, n_documents=3)
+    try:
+        scheme_ids = db.exec(
+            select(ClassificationScheme.id).where(ClassificationScheme.workspace_id == workspace.uid)
+        ).all()
+        deleted, kept = scheme_ids
+        url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/classification_schemes"
+
+        response = client.delete(f"{url}/{deleted}", headers=normal_user_token_headers)
+        assert response.status_code == 200
+        assert db.get(ClassificationScheme, deleted, populate_existing=True) is None
+        assert count_rows(db, ClassificationResult, deleted) == 0
+        assert count_rows(db, ClassificationField, deleted) == 0
+        assert count_rows(db, ClassificationResult, kept) == 3
+
+        response = client.delete(f"{url}/{deleted}", headers=normal_user_token_headers)
+        assert response.status_code == 404
+    finally:
+        delete_workspace(db, workspace)
@@ -0,0 +1,279 @@
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, delete, func, select
+from starlette.datastructures import UploadFile
+
+from app import crud
+from app.api.routes import documents
+from app.core import storage
+from app.core.config import settings
+from app.core.db import engine
+from app.core.dedup import blob_object_name
+from app.core.pdf_extraction import PdfExtraction
+from app.models import Document, File, Workspace
+from app.tests.core.test_pdf_extraction import make_pdf
+from app.tests.utils.minio import FakeMinio
+from app.tests.utils.utils import random_lower_string
+
+
+@pytest.fixture
+def workspace(db: Session) -> Generator[Workspace, None, None]:
+    user = crud.get_user_by_email(session=db, email=settings.EMAIL_TEST_USER)
+    assert user is not None
+    workspace = Workspace(name=random_lower_string(), user_id_ownership=user.id)
+    db.add(workspace)
+    db.commit()
+    db.refresh(workspace)
+    yield workspace
+    # Documents and their children cascade in the database
+    db.execute(delete(Workspace).where(Workspace.uid == workspace.uid))
+    db.commit()
+
+
+def add_documents(db: Session, workspace: Workspace, texts: list[str]) -> list[int]:
+    documents = [
+        Document(title=f"doc {i}", text_content=text, workspace_id=workspace.uid, user_id=workspace.user_id_ownership)
+        for i, text in enumerate(texts)
+    ]
+    db.add_all(documents)
+    db.commit()
+    return [document.id for document in documents]
+
+
+def test_text_search_pages_through_tied_ranks(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace
+) -> None:
+    # Identical texts rank the same, the pages must still cover every hit once
+    document_ids = add_documents(db, workspace, ["solar panels on the town hall roof"] * 5)
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents/search"
+
+    seen: list[int] = []
+    cursor = None
+    while True:
+        params = {"q": "solar", "limit": 2, **({"cursor": cursor} if cursor else {})}
+        response = client.get(url, headers=normal_user_token_headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen += [hit["document"]["id"] for hit in page["data"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+
+    assert len(set(seen)) == len(seen)
+    assert sorted(seen) == sorted(document_ids)
+
+
+def add_pdf_files(db: Session, document_ids: list[int]) -> list[int]:
+    files = [
+        File(name=f"{document_id}.pdf", filetype="application/pdf", document_id=document_id)
+        for document_id in document_ids
+    ]
+    db.add_all(files)
+    db.commit()
+    return [file.id for file in files]
+
+
+@pytest.fixture
+def fake_extraction(monkeypatch) -> dict[str, Exception]:
+    """Extracts "text of <object name>" instead of reading MinIO, objects listed in the dict raise."""
+    failures: dict[str, Exception] = {}
+
+    async def extract_stored_pdf(object_name: str) -> PdfExtraction:
+        if object_name in failures:
+            raise failures[object_name]
+        return PdfExtraction(page_count=1, metadata={"title": "Extracted"}, pages=[f"text of {object_name}"])
+
+    async def index_documents(document_ids: list[int]) -> None:
+        pass
+
+    monkeypatch.setattr(documents, "extract_stored_pdf", extract_stored_pdf)
+    monkeypatch.setattr(documents, "index_documents", index_documents)
+    return failures
+
+
+def test_extraction_job_lifecycle(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace, fake_extraction
+) -> None:
+    document_ids = add_documents(db, workspace, ["", ""])
+    file_ids = add_pdf_files(db, document_ids)
+    fake_extraction[f"{document_ids[1]}/{document_ids[1]}.pdf"] = ValueError("broken PDF")
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents/extraction-jobs"
+
+    response = client.post(url, headers=normal_user_token_headers, json={"file_ids": file_ids, "autofill": True})
+    assert response.status_code == 202
+    job = response.json()
+    # The response is sent before the background task runs
+    assert job["status"] == "queued"
+    assert (job["total"], job["completed"], job["failed"]) == (2, 0, 0)
+
+    response = client.get(f"{url}/{job['job_id']}", headers=normal_user_token_headers)
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "completed"
+    assert (job["total"], job["completed"], job["failed"]) == (2, 1, 1)
+    assert "broken PDF" in job["errors"][0]
+    assert job["started_at"] is not None and job["finished_at"] is not None
+
+    extracted = db.get(Document, document_ids[0], populate_existing=True)
+    assert extracted.text_content.startswith("text of ")
+    assert extracted.title == "Extracted"
+    assert db.get(Document, document_ids[1], populate_existing=True).text_content == ""
+
+
+def test_extraction_job_fails_when_indexing_fails(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace,
+    fake_extraction, monkeypatch
+) -> None:
+    async def index_documents(document_ids: list[int]) -> None:
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(documents, "index_documents", index_documents)
+    file_ids = add_pdf_files(db, add_documents(db, workspace, [""]))
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents/extraction-jobs"
+
+    job = client.post(url, headers=normal_user_token_headers, json={"file_ids": file_ids}).json()
+    job = client.get(f"{url}/{job['job_id']}", headers=normal_user_token_headers).json()
+    assert job["status"] == "failed"
+    assert job["completed"] == 1
+    assert "index unavailable" in job["errors"][-1]
+
+
+def test_unknown_extraction_job(
+    client: TestClient, normal_user_token_headers: dict[str, str], workspace: Workspace
+) -> None:
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents/extraction-jobs/unknown"
+    assert client.get(url, headers=normal_user_token_headers).status_code == 404
+
+
+@pytest.fixture
+def fake_minio(monkeypatch) -> FakeMinio:
+    fake = FakeMinio()
+    monkeypatch.setattr(documents.minio_client, "client", fake)
+    return fake
+
+
+def test_download_ranges_and_conditional_requests(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace,
+    fake_minio: FakeMinio
+) -> None:
+    data = bytes(range(256)) * 8
+    (document_id,) = add_documents(db, workspace, [""])
+    (file_id,) = add_pdf_files(db, [document_id])
+    fake_minio.objects[f"{document_id}/{document_id}.pdf"] = (data, "application/pdf")
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents/files/{file_id}/download"
+
+    response = client.get(url, headers=normal_user_token_headers)
+    assert response.status_code == 200
+    assert response.content == data
+    assert response.headers["Accept-Ranges"] == "bytes"
+    etag = response.headers["ETag"]
+
+    response = client.get(url, headers={**normal_user_token_headers, "Range": "bytes=-500"})
+    assert response.status_code == 206
+    assert response.content == data[-500:]
+    assert response.headers["Content-Range"] == f"bytes {len(data) - 500}-{len(data) - 1}/{len(data)}"
+    assert response.headers["Content-Length"] == "500"
+
+    response = client.get(url, headers={**normal_user_token_headers, "Range": f"bytes={len(data)}-"})
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == f"bytes */{len(data)}"
+
+    response = client.get(url, headers={**normal_user_token_headers, "If-None-Match": f"W/{etag}"})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+    assert all(object_response.released for object_response in fake_minio.responses)
+
+
+def test_uploads_stream_to_storage_and_extraction_reads_the_spool(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace,
+    fake_minio: FakeMinio, monkeypatch
+) -> None:
+    async def read(self, size: int = -1) -> bytes:
+        raise AssertionError("uploads must not be read into memory")
+
+    async def index_documents(document_ids: list[int]) -> None:
+        pass
+
+    part_size = 4096
+    monkeypatch.setattr(UploadFile, "read", read)
+    monkeypatch.setattr(documents, "index_documents", index_documents)
+    monkeypatch.setattr(settings, "MINIO_UPLOAD_PART_SIZE", part_size)
+    data = make_pdf([f"Quarterly Report\n\npage {number} " + random_lower_string() * 20 for number in range(40)])
+    assert len(data) > 2 * part_size
+    url = f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents"
+
+    response = client.post(
+        f"{url}/bulk-upload",
+        headers=normal_user_token_headers,
+        files=[("files", ("report.pdf", data, "application/pdf"))],
+        data={"autofill": "true"},
+    )
+    assert response.status_code == 200
+    (document,) = response.json()
+    [(stored, _)] = list(fake_minio.objects.values())
+    assert stored == data
+    assert fake_minio.largest_read == part_size
+
+    # Autofill extracts what was stored, the metadata endpoint the request's own spool
+    job_id = response.headers["X-Extraction-Job-Id"]
+    job = client.get(f"{url}/extraction-jobs/{job_id}", headers=normal_user_token_headers).json()
+    assert (job["status"], job["completed"]) == ("completed", 1)
+    text_content = db.exec(select(Document.text_content).where(Document.id == document["id"])).one()
+
+    response = client.post(
+        f"{url}/extract-pdf-metadata",
+        headers=normal_user_token_headers,
+        files={"file": ("report.pdf", data, "application/pdf")},
+    )
+    assert response.status_code == 200
+    metadata = response.json()
+    assert metadata["page_count"] == 40
+    assert metadata["title"] == "Quarterly Report"
+    assert metadata["text_content"] == text_content
+
+
+def test_removing_files_keeps_blobs_in_use(db: Session, workspace: Workspace, fake_minio: FakeMinio) -> None:
+    referenced, uploading, unused = (f"{digit}" * 64 for digit in "abc")
+    for sha256 in (referenced, uploading, unused):
+        fake_minio.objects[blob_object_name(sha256)] = (b"pdf", "application/pdf")
+    (document_id,) = add_documents(db, workspace, [""])
+    db.add(File(name="kept.pdf", sha256=referenced, document_id=document_id))
+    db.commit()
+
+    # An upload of the second blob holds its lock until the upload's File row is committed
+    with Session(engine) as upload:
+        upload.execute(select(func.pg_advisory_xact_lock_shared(storage.blob_lock_key(uploading))))
+        storage.remove_stored_files([(1, "a.pdf", referenced), (2, "b.pdf", uploading), (3, "c.pdf", unused)])
+
+    assert set(fake_minio.objects) == {blob_object_name(referenced), blob_object_name(uploading)}
+
+
+def test_failed_file_upload_leaves_content_hash_unset(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session, workspace: Workspace,
+    fake_minio: FakeMinio, monkeypatch
+) -> None:
+    store_file = storage.minio_client.store_file
+
+    async def failing_store_file(file, sha256: str) -> str:
+        if file.filename == "broken.pdf":
+            raise RuntimeError("storage unavailable")
+        return await store_file(file, sha256)
+
+    monkeypatch.setattr(storage.minio_client, "store_file", failing_store_file)
+    response = client.post(
+        f"{settings.API_V1_STR}/workspaces/{workspace.uid}/documents",
+        headers=normal_user_token_headers,
+        files=[
+            ("files", ("kept.pdf", b"kept", "application/pdf")),
+            ("files", ("broken.pdf", b"broken", "application/pdf")),
+        ],
+        data={"title": "partly stored"},
+    )
+    assert response.status_code == 200
+    document = response.json()
+    assert [file["name"] for file in document["files"]] == ["kept.pdf"]
+    assert document["content_hash"] is None
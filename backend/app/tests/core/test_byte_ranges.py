@@ -0,0 +1,54 @@
+import pytest
+from fastapi import HTTPException
+
+from app.core.byte_ranges import etag_matches, parse_range_header
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-500", (500, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    ("BYTES = 10 - 19", (10, 19)),
+])
+def test_parse_range_header(header: str, expected: tuple[int, int]) -> None:
+    assert parse_range_header(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [
+    "bytes=0-99,200-299",  # multiple ranges are served whole
+    "items=0-99",
+    "bytes=",
+    "bytes=-",
+    "bytes=5",
+    "bytes=a-b",
+    "bytes=--5",
+    "bytes=20-10",
+])
+def test_unserved_ranges_send_the_whole_object(header: str) -> None:
+    assert parse_range_header(header, 1000) is None
+
+
+@pytest.mark.parametrize("header, size", [
+    ("bytes=1000-", 1000),
+    ("bytes=1000-2000", 1000),
+    ("bytes=-0", 1000),
+    ("bytes=-10", 0),
+])
+def test_unsatisfiable_range(header: str, size: int) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        parse_range_header(header, size)
+    assert exc_info.value.status_code == 416
+    assert exc_info.value.headers == {"Content-Range": f"bytes */{size}"}
+
+
+def test_etag_matches() -> None:
+    etag = '"abc"'
+    assert etag_matches('"abc"', etag)
+    assert etag_matches('W/"abc"', etag)
+    assert etag_matches('"xyz", W/"abc"', etag)
+    assert etag_matches("*", etag)
+    assert etag_matches('"abc"', 'W/"abc"')
+    assert not etag_matches('"xyz"', etag)
+    assert not etag_matches('"xyz", "abcd"', etag)
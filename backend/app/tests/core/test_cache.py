@@ -0,0 +1,37 @@
+import time
+
+from app.core.cache import LRUCache
+
+
+def test_lru_eviction() -> None:
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "a" is now most recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_expiry() -> None:
+    cache = LRUCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_pop_where_and_stats() -> None:
+    cache = LRUCache(maxsize=10)
+    cache.set((1, "v1"), "model-1")
+    cache.set((1, "v2"), "model-2")
+    cache.set((2, "v1"), "model-3")
+    assert cache.pop_where(lambda key: key[0] == 1) == 2
+    assert cache.get((1, "v2")) is None
+    assert cache.get((2, "v1")) == "model-3"
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["size"] == 1
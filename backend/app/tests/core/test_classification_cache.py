@@ -0,0 +1,26 @@
+from pydantic import BaseModel, Field, create_model
+
+from app.core.classification_cache import cache_key
+
+
+def _model(description: str) -> type[BaseModel]:
+    return create_model(
+        "Sentiment",
+        __doc__="Rate the sentiment",
+        score=(int, Field(description=description)),
+    )
+
+
+def test_cache_key_is_stable_across_equivalent_models() -> None:
+    assert cache_key("text", _model("Scale from 1 to 10"), "Google", "gemini") == cache_key(
+        "text", _model("Scale from 1 to 10"), "Google", "gemini"
+    )
+
+
+def test_cache_key_changes_with_any_input() -> None:
+    model = _model("Scale from 1 to 10")
+    key = cache_key("text", model, "Google", "gemini")
+    assert cache_key("other text", model, "Google", "gemini") != key
+    assert cache_key("text", _model("Scale from 0 to 1"), "Google", "gemini") != key
+    assert cache_key("text", model, "ollama", "gemini") != key
+    assert cache_key("text", model, "Google", "llama3.2") != key
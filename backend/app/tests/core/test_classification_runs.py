@@ -0,0 +1,144 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from pydantic import BaseModel
+
+from app.api.v2 import classification
+from app.api.v2.classification import ProviderRateLimiter, run_classification_batch
+from app.core.config import settings
+from app.models import ClassificationRunStatus
+
+
+class Answer(BaseModel):
+    answer: int
+
+
+class FakeClassifier:
+    """Stands in for fastclass, records how many calls overlap."""
+
+    def __init__(self, delay: float = 0.0, fail: bool = False):
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def classify(self, ModelClass, instruction, text):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            if self.fail:
+                raise RuntimeError(f"provider error on {text}")
+            return ModelClass(answer=1)
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def run_env(monkeypatch):
+    """Replaces the database and provider access of a run, returns the inserted rows."""
+    inserted = []
+    env = {"classifier": FakeClassifier(), "existing": set(), "inserted": inserted}
+
+    monkeypatch.setattr(settings, "CLASSIFICATION_CACHE_ENABLED", False)
+    monkeypatch.setattr(classification, "get_classifier", lambda *args: env["classifier"])
+    monkeypatch.setattr(classification, "get_rate_limiter", lambda provider: ProviderRateLimiter(0))
+    monkeypatch.setattr(classification, "_load_scheme_models", lambda scheme_ids: {1: Answer})
+    monkeypatch.setattr(
+        classification, "_load_run_chunk",
+        lambda run_id, document_ids, scheme_ids, sibling_ids=(): (
+            [(document_id, f"text {document_id}") for document_id in document_ids], env["existing"]
+        )
+    )
+    monkeypatch.setattr(classification, "_bulk_insert_results", lambda rows, cache_entries: inserted.extend(rows))
+    return env
+
+
+def new_status() -> ClassificationRunStatus:
+    return ClassificationRunStatus(run_id=7, workspace_id=1, provider="Google", model="test")
+
+
+def test_concurrency_is_capped(run_env, monkeypatch) -> None:
+    monkeypatch.setattr(settings, "CLASSIFICATION_MAX_CONCURRENCY", 2)
+    run_env["classifier"] = FakeClassifier(delay=0.02)
+
+    status = asyncio.run(run_classification_batch(new_status(), scheme_ids=[1], document_ids=list(range(10))))
+
+    assert status.status == "completed"
+    assert run_env["classifier"].calls == 10
+    assert run_env["classifier"].max_in_flight == 2
+    assert len(run_env["inserted"]) == 10
+
+
+def test_rate_limiter_spaces_calls() -> None:
+    limiter = ProviderRateLimiter(per_minute=1200)  # one call every 50 ms
+
+    async def acquire_times():
+        started = time.monotonic()
+        times = []
+        for _ in range(3):
+            await limiter.acquire()
+            times.append(time.monotonic() - started)
+        return times
+
+    first, second, third = asyncio.run(acquire_times())
+    assert first < 0.04
+    assert second >= 0.045
+    assert third >= 0.095
+
+
+def test_unlimited_rate_limiter_does_not_wait() -> None:
+    limiter = ProviderRateLimiter(per_minute=0)
+
+    async def acquire_all():
+        await asyncio.gather(*[limiter.acquire() for _ in range(100)])
+
+    started = time.monotonic()
+    asyncio.run(acquire_all())
+    assert time.monotonic() - started < 0.05
+
+
+def test_documents_with_a_result_for_the_run_are_skipped(run_env) -> None:
+    run_env["existing"] = {(2, 1), (4, 1)}
+
+    status = asyncio.run(run_classification_batch(new_status(), scheme_ids=[1], document_ids=[1, 2, 3, 4, 5]))
+
+    assert sorted(row["document_id"] for row in run_env["inserted"]) == [1, 3, 5]
+    assert all(row["run_id"] == 7 and row["value"] == {"answer": 1} for row in run_env["inserted"])
+    assert (status.total, status.completed, status.skipped, status.failed) == (5, 3, 2, 0)
+    assert status.started_at is not None and status.finished_at is not None
+
+
+def test_failures_are_counted_and_errors_capped(run_env, monkeypatch) -> None:
+    monkeypatch.setattr(classification, "MAX_RUN_ERRORS", 3)
+    run_env["classifier"] = FakeClassifier(fail=True)
+
+    status = asyncio.run(run_classification_batch(new_status(), scheme_ids=[1], document_ids=list(range(8))))
+
+    # Per-document failures don't fail the run
+    assert status.status == "completed"
+    assert (status.total, status.completed, status.failed) == (8, 0, 8)
+    assert len(status.errors) == 3
+    assert "provider error" in status.errors[0]
+    assert run_env["inserted"] == []
+
+
+def test_missing_scheme_fails_its_items_only(run_env) -> None:
+    # Scheme 2 was deleted after the run was queued
+    status = asyncio.run(run_classification_batch(
+        new_status(), scheme_ids=[1, 2], document_ids=[1, 2, 3], siblings={1: [4]}
+    ))
+
+    assert status.status == "completed"
+    assert sorted((row["document_id"], row["scheme_id"]) for row in run_env["inserted"]) == [
+        (1, 1), (2, 1), (3, 1), (4, 1)
+    ]
+    assert (status.total, status.completed, status.failed) == (8, 4, 4)
+    assert status.errors == ["scheme 2: not found, its results are counted as failed"]
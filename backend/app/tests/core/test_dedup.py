@@ -0,0 +1,40 @@
+import io
+
+from app.core.dedup import (
+    blob_object_name,
+    document_content_hash,
+    file_sha256,
+    normalize_text,
+    stored_object_name,
+)
+
+
+def test_normalize_text() -> None:
+    assert normalize_text("  Hello  WORLD\n\n") == "hello world"
+    assert normalize_text("ﬁne") == "fine"
+
+
+def test_document_content_hash_precedence() -> None:
+    by_text = document_content_hash("Some  Article\ntext", "https://example.com/a")
+    assert by_text == document_content_hash("some article text", "https://example.com/b")
+    assert document_content_hash(None, "HTTPS://Example.com/a/") == document_content_hash("", "https://example.com/a")
+    # Files win over text, and their order doesn't matter
+    by_files = document_content_hash("Some article text", None, ["b" * 64, "a" * 64])
+    assert by_files == document_content_hash(None, None, ["a" * 64, "b" * 64])
+    assert by_files != by_text
+    assert document_content_hash(None, None) is None
+
+
+def test_file_sha256_resets_position() -> None:
+    file = io.BytesIO(b"%PDF-1.7 content")
+    file.read(4)
+    digest = file_sha256(file)
+    assert file.tell() == 0
+    assert digest == file_sha256(io.BytesIO(b"%PDF-1.7 content"))
+
+
+def test_object_names() -> None:
+    digest = "ab" + "0" * 62
+    assert blob_object_name(digest) == f"blobs/ab/{digest}"
+    assert stored_object_name(7, "report.pdf", digest) == f"blobs/ab/{digest}"
+    assert stored_object_name(7, "report.pdf", None) == "7/report.pdf"
@@ -0,0 +1,66 @@
+import math
+import sys
+
+import pytest
+
+from app.core.embeddings import (
+    EmbedderUnavailable,
+    HashingEmbedder,
+    SentenceTransformerEmbedder,
+    chunk_text,
+    content_hash,
+    document_text,
+)
+
+
+def test_chunk_text_overlaps_and_keeps_words() -> None:
+    text = " ".join(f"word{i}" for i in range(500))
+    chunks = chunk_text(text, size=200, overlap=50)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    words = set(text.split())
+    assert all(word in words for chunk in chunks for word in chunk.split())
+    # Each chunk starts inside the previous one
+    for previous, current in zip(chunks, chunks[1:]):
+        assert current.split()[0] in previous.split()
+    assert chunks[-1].endswith("word499")
+
+
+def test_chunk_text_short_and_empty() -> None:
+    assert chunk_text("short text", size=200, overlap=50) == ["short text"]
+    assert chunk_text("", size=200, overlap=50) == []
+
+
+def test_hashing_embedder() -> None:
+    embedder = HashingEmbedder(64)
+    first, same, other = embedder.embed([
+        "Flooding in the river delta",
+        "Flooding in the river delta",
+        "Central bank raises interest rates",
+    ])
+    assert len(first) == 64
+    assert first == same
+    assert math.isclose(sum(component * component for component in first), 1.0)
+    related = embedder.embed(["river delta flooding continues"])[0]
+    similarity = lambda a, b: sum(x * y for x, y in zip(a, b))
+    assert similarity(first, related) > similarity(first, other)
+
+
+def test_content_hash_depends_on_text_and_model() -> None:
+    text = document_text("Title", None, "Body")
+    assert text == "Title\n\nBody"
+    assert content_hash(text, HashingEmbedder(64)) == content_hash(text, HashingEmbedder(64))
+    assert content_hash(text, HashingEmbedder(64)) != content_hash(text, HashingEmbedder(32))
+    assert content_hash(text, HashingEmbedder(64)) != content_hash(text + "!", HashingEmbedder(64))
+
+
+def test_missing_model_library_disables_embedder(monkeypatch: pytest.MonkeyPatch) -> None:
+    # None in sys.modules makes the import fail as if the embeddings extra weren't installed
+    monkeypatch.setitem(sys.modules, "sentence_transformers", None)
+    embedder = SentenceTransformerEmbedder("sentence-transformers/all-MiniLM-L6-v2", 384)
+    with pytest.raises(EmbedderUnavailable, match="embeddings extra"):
+        embedder.embed(["text"])
+    # The failure is remembered rather than retried on every call
+    monkeypatch.delitem(sys.modules, "sentence_transformers")
+    with pytest.raises(EmbedderUnavailable):
+        embedder.embed(["text"])
@@ -0,0 +1,43 @@
+from app.core.geo_tiles import ClusterIndex, compact_feature, project, unproject
+
+
+def point(lng: float, lat: float, *articles: dict) -> dict:
+    return {
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lng, lat]},
+        "properties": {"name": f"{lng},{lat}", "contents": list(articles)},
+    }
+
+
+def test_projection_round_trip() -> None:
+    lng, lat = unproject(*project(13.4, 52.5))
+    assert abs(lng - 13.4) < 1e-9
+    assert abs(lat - 52.5) < 1e-9
+
+
+def test_compact_feature_keeps_ids_and_count() -> None:
+    feature = point(0, 0, {"id": "a1", "title": "One"}, {"url": "https://example.com/2"})
+    compact = compact_feature(feature)
+    assert "contents" not in compact["properties"]
+    assert compact["properties"]["article_ids"] == ["a1", "https://example.com/2"]
+    assert compact["properties"]["content_count"] == 2
+    assert compact["properties"]["name"] == "0,0"
+
+
+def test_nearby_points_cluster_at_low_zoom() -> None:
+    berlin, potsdam, sydney = point(13.40, 52.52, {"id": "a"}), point(13.06, 52.39, {"id": "b"}, {"id": "c"}), point(151.2, -33.87)
+    index = ClusterIndex({"type": "FeatureCollection", "features": [berlin, potsdam, sydney]}, radius=60, max_zoom=16)
+
+    world = index.tile(0, 0, 0)["features"]
+    assert len(world) == 2
+    cluster = next(feature for feature in world if feature["properties"].get("cluster"))
+    assert cluster["properties"]["point_count"] == 2
+    assert cluster["properties"]["content_count"] == 3
+    assert 1 <= cluster["properties"]["expansion_zoom"] <= 17
+
+    # At street level the two are separate points, Sydney lies in another tile
+    x, y = project(13.40, 52.52)
+    z = 14
+    local = index.tile(z, int(x * 2 ** z), int(y * 2 ** z))["features"]
+    assert [feature["properties"]["article_ids"] for feature in local] == [["a"]]
+    assert index.tile(0, 0, 0) is index.tiles.get((0, 0, 0))
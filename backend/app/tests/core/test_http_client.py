@@ -0,0 +1,75 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import http_client
+
+
+def serve(statuses: list[int]) -> list[str]:
+    """Point the shared client at a mock upstream answering with `statuses` in turn, returns the request log."""
+    log: list[str] = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        log.append(request.method)
+        return httpx.Response(statuses[min(len(log), len(statuses)) - 1])
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return log
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(http_client.settings, "UPSTREAM_RETRY_BACKOFF_SECONDS", 0.0)
+    yield
+    asyncio.run(http_client.close_http_client())
+
+
+def test_idempotent_requests_are_retried() -> None:
+    log = serve([503, 502, 200])
+    response = asyncio.run(http_client.get("http://upstream.test/geojson"))
+    assert response.status_code == 200
+    assert log == ["GET", "GET", "GET"]
+
+
+def test_last_response_is_returned_when_retries_run_out() -> None:
+    log = serve([503])
+    response = asyncio.run(http_client.get("http://upstream.test/geojson", retries=1))
+    assert response.status_code == 503
+    assert len(log) == 2
+
+
+def test_post_is_not_retried_by_default() -> None:
+    log = serve([503, 200])
+    response = asyncio.run(http_client.post("http://upstream.test/score", json={}))
+    assert response.status_code == 503
+    assert log == ["POST"]
+
+
+
+def test_backoff_does_not_hold_the_host_slot(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(http_client.settings, "UPSTREAM_MAX_CONNECTIONS_PER_HOST", 1)
+    monkeypatch.setattr(http_client.settings, "UPSTREAM_RETRY_BACKOFF_SECONDS", 0.2)
+    finished: list[str] = []
+    flaky_calls = 0
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal flaky_calls
+        if request.url.path == "/flaky":
+            flaky_calls += 1
+            return httpx.Response(503 if flaky_calls == 1 else 200)
+        return httpx.Response(200)
+
+    http_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def fetch(path: str, delay: float = 0.0) -> None:
+        await asyncio.sleep(delay)
+        await http_client.get(f"http://upstream.test{path}")
+        finished.append(path)
+
+    async def run() -> None:
+        await asyncio.gather(fetch("/flaky"), fetch("/ok", delay=0.02))
+
+    asyncio.run(run())
+    # /ok got the only slot while /flaky was backing off
+    assert finished == ["/ok", "/flaky"]
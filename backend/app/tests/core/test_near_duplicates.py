@@ -0,0 +1,40 @@
+from app.core.near_duplicates import (
+    band_hashes,
+    cluster_pairs,
+    estimated_similarity,
+    minhash_signature,
+    shingles,
+)
+
+STORY = (
+    "The finance ministers of the member states agreed late on Tuesday to extend "
+    "the emergency credit line by another six months, officials said, after talks "
+    "that ran well past midnight and nearly collapsed over the terms of repayment. "
+    "The agreement still has to be approved by several national parliaments."
+)
+
+
+def test_syndicated_copy_is_near_duplicate() -> None:
+    syndicated = "BRUSSELS (Wire) - " + STORY.replace("officials said", "officials told reporters")
+    unrelated = "Heavy rain flooded several districts of the capital overnight, closing schools and roads."
+
+    original = minhash_signature(shingles(STORY))
+    copy = minhash_signature(shingles(syndicated))
+    other = minhash_signature(shingles(unrelated))
+
+    assert estimated_similarity(original, minhash_signature(shingles(STORY.upper()))) == 1.0
+    assert estimated_similarity(original, copy) > 0.5
+    assert estimated_similarity(original, other) < 0.1
+    assert set(band_hashes(original)) & set(band_hashes(copy))
+    assert not set(band_hashes(original)) & set(band_hashes(other))
+
+
+def test_empty_text_has_no_signature() -> None:
+    assert shingles("") == set()
+    assert minhash_signature(shingles("   ")) == []
+    assert len(shingles("two words")) == 1
+
+
+def test_cluster_pairs() -> None:
+    assert cluster_pairs([(5, 9), (2, 3), (9, 12), (3, 7)]) == [[2, 3, 7], [5, 9, 12]]
+    assert cluster_pairs([]) == []
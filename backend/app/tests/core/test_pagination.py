@@ -0,0 +1,21 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.pagination import decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip() -> None:
+    insertion_date = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    cursor = encode_cursor(insertion_date, 42)
+    assert "=" not in cursor
+    date_value, id_value = decode_cursor(cursor)
+    assert datetime.fromisoformat(date_value) == insertion_date
+    assert id_value == 42
+
+
+def test_invalid_cursor() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,50 @@
+import asyncio
+import tempfile
+
+import fitz
+
+from app.core.pdf_extraction import clean_text, extract_upload, read_pdf, shutdown_process_pool, summarize
+
+
+def make_pdf(pages: list[str]) -> bytes:
+    with fitz.open() as doc:
+        for text in pages:
+            doc.new_page().insert_text((72, 72), text)
+        return doc.tobytes()
+
+
+def test_page_offsets_and_title() -> None:
+    extraction = read_pdf(make_pdf(["Annual Report\n\nFirst paragraph", "Second page", "Third page"]))
+    assert extraction.page_count == 3
+    assert extraction.title == "Annual Report"
+    for offset, page in zip(extraction.page_offsets, extraction.pages):
+        assert extraction.text_content[offset:offset + len(page)] == page
+    assert extraction.text_content.endswith("\n")
+
+
+def test_early_stop_reads_first_page_only() -> None:
+    extraction = read_pdf(make_pdf(["Title", "Body", "More"]), max_pages=1)
+    assert extraction.page_count == 3
+    assert len(extraction.pages) == 1
+    assert extraction.truncated
+
+
+def test_extract_upload_from_disk_and_memory_spools() -> None:
+    data = make_pdf(["Spooled", "Second page"])
+    try:
+        for max_size in (len(data) * 2, 1):
+            spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+            spool.write(data)
+            extraction = asyncio.run(extract_upload(spool, max_pages=1))
+            assert extraction.page_count == 2
+            assert extraction.pages[0].startswith("Spooled")
+            assert extraction.truncated
+            assert spool.tell() == 0
+    finally:
+        shutdown_process_pool()
+
+
+def test_clean_text_and_summarize() -> None:
+    assert clean_text("a\x00b\ud800c") == "abc"
+    assert summarize("\n\n  \n\nfirst\nline\n\nsecond") == "first\nline"
+    assert summarize("x" * 600).endswith("...")
@@ -0,0 +1,67 @@
+import asyncio
+
+from app.core.response_cache import ResponseCache
+
+
+def test_concurrent_misses_share_one_call() -> None:
+    cache = ResponseCache(maxsize=10, ttl=60)
+    calls = 0
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"features": []}
+
+    async def run():
+        results = await asyncio.gather(*[cache.get("key", loader) for _ in range(20)])
+        return results, await cache.get("key", loader)
+
+    results, cached = asyncio.run(run())
+    assert calls == 1
+    assert all(result == {"features": []} for result in results)
+    assert cached == {"features": []}
+    stats = cache.stats()
+    assert stats["coalesced"] == 19
+    assert stats["hits"] == 1
+    assert stats["inflight"] == 0
+
+
+def test_stale_entry_served_while_refreshing() -> None:
+    cache = ResponseCache(maxsize=10, ttl=0, stale_ttl=60)
+    versions = iter(["v1", "v2"])
+
+    async def loader():
+        return next(versions)
+
+    async def run():
+        first = await cache.get("key", loader)
+        await asyncio.sleep(0.01)
+        stale = await cache.get("key", loader)
+        await asyncio.sleep(0.01)  # let the refresh finish
+        return first, stale, await cache.get("key", loader)
+
+    assert asyncio.run(run()) == ("v1", "v1", "v2")
+    assert cache.stats()["refreshes"] == 2
+
+
+def test_failures_are_not_cached() -> None:
+    cache = ResponseCache(maxsize=10, ttl=60)
+    attempts = 0
+
+    async def loader():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            raise ConnectionError("upstream down")
+        return "ok"
+
+    async def run():
+        try:
+            await cache.get("key", loader)
+        except ConnectionError:
+            pass
+        return await cache.get("key", loader)
+
+    assert asyncio.run(run()) == "ok"
+    assert cache.stats()["errors"] == 1
@@ -0,0 +1,48 @@
+from sqlalchemy.dialects import postgresql
+
+from app.core.result_aggregates import (
+    crosstab_statement,
+    histogram_bounds,
+    label_frequency_statement,
+    result_criteria,
+)
+from app.models import ClassificationResult
+
+
+def compiled(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def test_histogram_bounds_small_integer_scale_bins_per_value() -> None:
+    assert histogram_bounds(2, 9, 1, 10, 5) == (1.0, 11.0, 10)
+
+
+def test_histogram_bounds_widen_to_observed_values() -> None:
+    assert histogram_bounds(-1, 12, 1, 10, 5) == (-1.0, 13.0, 14)
+
+
+def test_histogram_bounds_wide_range_uses_requested_bins() -> None:
+    assert histogram_bounds(0, 1000, None, None, 20) == (0.0, 1000.0, 20)
+
+
+def test_label_frequency_expands_lists_and_scopes_to_workspace() -> None:
+    criteria = result_criteria(ClassificationResult, 1, 2, filters=["score:gte:3"])
+    sql = compiled(label_frequency_statement(criteria, "categories", 10))
+    assert "JOIN LATERAL jsonb_array_elements_text" in sql
+    assert "document.workspace_id" in sql
+    assert "@?" in sql
+    assert "GROUP BY labels.label" in sql
+
+
+def test_crosstab_pairs_results_of_the_same_run() -> None:
+    criteria = result_criteria(ClassificationResult, 1, 2, run_id=3)
+    sql = compiled(crosstab_statement(criteria, "categories", 4, "sentiment", 3, 100))
+    assert "classificationresult_1.document_id = classificationresult.document_id" in sql
+    assert "classificationresult_1.run_id" in sql
+
+
+def test_crosstab_counts_documents_not_result_pairs() -> None:
+    # Several results of one document, e.g. from different runs, pair up many times
+    criteria = result_criteria(ClassificationResult, 1, 2)
+    sql = compiled(crosstab_statement(criteria, "categories", 4, "sentiment", None, 100))
+    assert "count(DISTINCT classificationresult.document_id) AS count" in sql
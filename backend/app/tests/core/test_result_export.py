@@ -0,0 +1,65 @@
+import io
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from app.core.result_export import BatchWriter, coerce_value, export_schema, field_columns, record_batch
+from app.models import FieldType
+
+SCHEMES = [
+    SimpleNamespace(id=1, name="topics", fields=[
+        SimpleNamespace(name="score", type=FieldType.INT),
+        SimpleNamespace(name="categories", type=FieldType.LIST_STR),
+    ]),
+    SimpleNamespace(id=2, name="sentiment", fields=[SimpleNamespace(name="label", type=FieldType.STR)]),
+]
+
+
+def rows(count: int) -> list:
+    timestamp = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    return [
+        (index, index, f"Document {index}", 1, 7, "run", timestamp, {"score": 3, "categories": ["Health", "Trade"]})
+        if index % 2 else
+        (index, index, f"Document {index}", 2, 7, "run", timestamp, {"label": "negative"})
+        for index in range(count)
+    ]
+
+
+def test_coerce_value() -> None:
+    assert coerce_value(7.0, FieldType.INT) == 7
+    assert coerce_value(7.5, FieldType.INT) is None
+    assert coerce_value("high", FieldType.INT) is None
+    assert coerce_value("Health", FieldType.LIST_STR) == ["Health"]
+    assert coerce_value([{"name": "x"}], FieldType.LIST_DICT) == '[{"name": "x"}]'
+
+
+def test_columns_are_prefixed_by_scheme_when_exporting_several() -> None:
+    assert [column.name for column in field_columns(SCHEMES)] == ["topics.score", "topics.categories", "sentiment.label"]
+    assert [column.name for column in field_columns(SCHEMES[:1])] == ["score", "categories"]
+
+
+def export(export_format: str, batch_size: int = 4) -> bytes:
+    columns = field_columns(SCHEMES)
+    schema = export_schema(columns)
+    writer = BatchWriter(export_format, schema)
+    data, all_rows = b"", rows(10)
+    for start in range(0, len(all_rows), batch_size):
+        data += writer.write(record_batch(all_rows[start:start + batch_size], columns, schema))
+    return data + writer.close()
+
+
+def test_parquet_export_writes_a_row_group_per_batch() -> None:
+    data = export("parquet")
+    assert pq.ParquetFile(io.BytesIO(data)).num_row_groups == 3
+    table = pq.read_table(io.BytesIO(data))
+    assert table.num_rows == 10
+    assert table.column("topics.score").to_pylist()[:2] == [None, 3]
+    assert table.column("topics.categories").to_pylist()[1] == ["Health", "Trade"]
+
+
+def test_arrow_stream_export() -> None:
+    table = ipc.open_stream(export("arrow")).read_all()
+    assert table.num_rows == 10
+    assert table.column("sentiment.label").to_pylist()[:2] == ["negative", None]
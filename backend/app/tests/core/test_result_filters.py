@@ -0,0 +1,55 @@
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import column
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB
+
+from app.core.result_filters import ResultFilter, compile_filters
+
+value = column("value", JSONB)
+
+
+def render(spec: str) -> tuple[str, list]:
+    compiled = ResultFilter.parse(spec).compile(value).compile(dialect=postgresql.dialect())
+    return str(compiled), list(compiled.params.values())
+
+
+def test_containment_filters() -> None:
+    sql, params = render("categories:contains:Healthcare")
+    assert "value @>" in sql
+    assert params == [{"categories": ["Healthcare"]}]
+
+    sql, params = render("summary.sentiment:eq:negative")
+    assert params == [{"summary": {"sentiment": "negative"}}]
+
+    sql, params = render("score:ne:7")
+    assert sql.startswith("NOT")
+    assert params == [{"score": 7}]
+
+
+def test_comparison_filters_use_jsonpath() -> None:
+    sql, params = render("score:gte:7")
+    assert "@?" in sql and "JSONPATH" in sql
+    assert params == ['$."score" ? (@ >= 7)']
+
+    _, params = render('name:lt:"M"')
+    assert params == ['$."name" ? (@ < "M")']
+
+    _, params = render("location:exists")
+    assert params == ['$."location"']
+
+
+def test_path_keys_are_quoted() -> None:
+    _, params = render('odd") || (true:gt:1')
+    assert params == ['$."odd\\") || (true" ? (@ > 1)']
+
+
+@pytest.mark.parametrize("spec", ["score", "score:between:1", ":eq:1", "a..b:eq:1", "score:gt:true", "score:gt:[1]"])
+def test_invalid_filters(spec: str) -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        ResultFilter.parse(spec)
+    assert exc_info.value.status_code == 400
+
+
+def test_compile_filters_empty() -> None:
+    assert compile_filters(value, None) == []
@@ -0,0 +1,41 @@
+import threading
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+
+from app.core.config import settings
+from app.core.security import (
+    PasswordHasher,
+    get_password_hash,
+    password_needs_rehash,
+    verify_password,
+)
+
+
+def test_hash_and_verify_use_configured_cost() -> None:
+    hashed = get_password_hash("secret")
+    assert hashed.split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+    assert verify_password("secret", hashed)
+    assert not verify_password("wrong", hashed)
+    assert not password_needs_rehash(hashed)
+
+
+def test_other_cost_needs_rehash() -> None:
+    hashed = bcrypt.hashpw(b"secret", bcrypt.gensalt(rounds=4)).decode()
+    assert password_needs_rehash(hashed) == (settings.BCRYPT_ROUNDS != 4)
+
+
+def test_hasher_rejects_beyond_queue_limit() -> None:
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    release = threading.Event()
+    running = hasher.submit(release.wait)
+    queued = hasher.submit(release.wait)
+    assert hasher.stats()["queued"] == 1
+    with pytest.raises(HTTPException) as error:
+        hasher.submit(release.wait)
+    assert error.value.status_code == 503
+    release.set()
+    running.result()
+    queued.result()
+    assert hasher.stats()["rejected"] == 1
@@ -0,0 +1,61 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import (
+    get_workspace_access,
+    invalidate_user_access,
+    invalidate_workspace_access,
+    workspace_access_cache,
+)
+from app.core.security import create_access_token
+
+
+class RecordingSession:
+    """Answers the authorization query with a fixed row and counts round trips."""
+
+    def __init__(self, row):
+        self.row = row
+        self.queries = 0
+
+    async def execute(self, statement):
+        self.queries += 1
+        row = self.row
+
+        class Result:
+            def first(self):
+                return row
+
+        return Result()
+
+
+def authorize(session, user_id: int, workspace_id: int):
+    token = create_access_token(user_id, timedelta(minutes=5))
+    return asyncio.run(get_workspace_access(session, token, workspace_id))
+
+
+def test_authorization_is_cached_until_invalidated() -> None:
+    workspace_access_cache.clear()
+    session = RecordingSession((True, 7))
+    assert authorize(session, 1, 7).user_id == 1
+    authorize(session, 1, 7)
+    assert session.queries == 1
+
+    invalidate_workspace_access(7)
+    authorize(session, 1, 7)
+    assert session.queries == 2
+
+    invalidate_user_access(1)
+    authorize(session, 1, 7)
+    assert session.queries == 3
+
+
+def test_failed_checks_are_not_cached() -> None:
+    workspace_access_cache.clear()
+    for row, status in (((True, None), 404), ((False, 7), 400), (None, 404)):
+        with pytest.raises(HTTPException) as error:
+            authorize(RecordingSession(row), 2, 7)
+        assert error.value.status_code == status
+    assert len(workspace_access_cache) == 0
@@ -1,8 +1,10 @@
+import bcrypt
 from fastapi.encoders import jsonable_encoder
 from sqlmodel import Session
 
 from app import crud
-from app.core.security import verify_password
+from app.core.config import settings
+from app.core.security import password_needs_rehash, verify_password
 from app.models import User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
@@ -89,3 +91,18 @@ def test_update_user(db: Session) -> None:
     assert user_2
     assert user.email == user_2.email
     assert verify_password(new_password, user_2.hashed_password)
+
+
+def test_authenticate_rehashes_outdated_cost(db: Session) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = crud.create_user(session=db, user_create=UserCreate(email=email, password=password))
+    rounds = 5 if settings.BCRYPT_ROUNDS != 5 else 6
+    user.hashed_password = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+    db.add(user)
+    db.commit()
+
+    authenticated_user = crud.authenticate(session=db, email=email, password=password)
+    assert authenticated_user
+    assert not password_needs_rehash(authenticated_user.hashed_password)
+    assert verify_password(password, authenticated_user.hashed_password)
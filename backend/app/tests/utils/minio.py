@@ -0,0 +1,79 @@
+import hashlib
+from dataclasses import dataclass
+from typing import BinaryIO, Iterable, Iterator
+
+from minio.error import S3Error
+
+
+@dataclass
+class FakeStat:
+    size: int
+    etag: str
+    content_type: str
+
+
+class FakeObjectResponse:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.released = False
+
+    def stream(self, chunk_size: int) -> Iterator[bytes]:
+        for start in range(0, len(self.data), chunk_size):
+            yield self.data[start:start + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+    def release_conn(self) -> None:
+        self.released = True
+
+
+class FakeMinio:
+    """
+    In-memory stand-in for the Minio client, for the calls the document routes make.
+    `largest_read` is the most bytes put_object took from an upload in one read.
+    """
+
+    def __init__(self):
+        self.objects: dict[str, tuple[bytes, str]] = {}
+        self.largest_read = 0
+        self.responses: list[FakeObjectResponse] = []
+
+    def _missing(self, object_name: str) -> S3Error:
+        return S3Error(
+            code="NoSuchKey", message="Object does not exist", resource=object_name,
+            request_id="", host_id="", response=None,
+        )
+
+    def stat_object(self, bucket_name: str, object_name: str) -> FakeStat:
+        if object_name not in self.objects:
+            raise self._missing(object_name)
+        data, content_type = self.objects[object_name]
+        return FakeStat(size=len(data), etag=hashlib.md5(data).hexdigest(), content_type=content_type)
+
+    def put_object(
+        self, bucket_name: str, object_name: str, data: BinaryIO, length: int,
+        part_size: int = 0, content_type: str = "application/octet-stream",
+    ) -> None:
+        parts = []
+        while part := data.read(part_size):
+            self.largest_read = max(self.largest_read, len(part))
+            parts.append(part)
+        self.objects[object_name] = (b"".join(parts), content_type)
+
+    def get_object(self, bucket_name: str, object_name: str, offset: int = 0, length: int = 0) -> FakeObjectResponse:
+        self.stat_object(bucket_name, object_name)
+        data, _ = self.objects[object_name]
+        response = FakeObjectResponse(data[offset:offset + length] if length else data[offset:])
+        self.responses.append(response)
+        return response
+
+    def fget_object(self, bucket_name: str, object_name: str, file_path: str) -> None:
+        self.stat_object(bucket_name, object_name)
+        with open(file_path, "wb") as target:
+            target.write(self.objects[object_name][0])
+
+    def remove_objects(self, bucket_name: str, delete_object_list: Iterable) -> Iterator:
+        for delete_object in delete_object_list:
+            self.objects.pop(delete_object.name, None)
+        return iter(())
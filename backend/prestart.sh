@@ -6,6 +6,9 @@ python /app/app/backend_pre_start.py
 # Create initial data in DB
 python /app/app/initial_data.py
 
+# Cache the embedding model, the API itself never downloads it
+python /app/download_embedding_model.py
+
 # alembic revision --autogenerate -m "Add run_id to classification_result"
 
 # # Run migrations
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark of sustained password checks (the CPU cost of a login) on one worker.
+Runs `--concurrency` simulated logins on an event loop for `--seconds`, once with bcrypt
+called inline the way the login route used to, once through the password hashing threads,
+and reports logins per second, latency and how long the event loop was blocked.
+
+    python scripts/bench_login.py --concurrency 32 --seconds 10 --workers 2
+
+With --url it instead drives a running server's /login/access-token endpoint:
+
+    python scripts/bench_login.py --url http://localhost:8000/api/v1 --email a@b.c --password secret
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark login throughput")
+    parser.add_argument("--concurrency", type=int, default=32, help="Logins in flight at once")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Duration of each run")
+    parser.add_argument("--workers", type=int, default=None, help="PASSWORD_HASH_WORKERS for the run")
+    parser.add_argument("--rounds", type=int, default=None, help="BCRYPT_ROUNDS for the run")
+    parser.add_argument("--url", help="API base URL of a running server, benchmarks HTTP logins instead")
+    parser.add_argument("--email", help="Login email for --url")
+    parser.add_argument("--password", help="Login password for --url")
+    return parser.parse_args()
+
+
+async def measure_loop_lag(stop: asyncio.Event, lags: list) -> None:
+    """Largest delay of a 10 ms sleep, i.e. how long requests on the loop would stall."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - start - 0.01)
+
+
+async def run(login, concurrency: int, seconds: float) -> dict:
+    latencies: list = []
+    lags: list = []
+    stop = asyncio.Event()
+    deadline = time.perf_counter() + seconds
+
+    async def client():
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await login()
+            latencies.append(time.perf_counter() - start)
+
+    lag_task = asyncio.create_task(measure_loop_lag(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await lag_task
+    latencies.sort()
+    return {
+        "logins/s": len(latencies) / elapsed,
+        "p50 ms": statistics.median(latencies) * 1000,
+        "p95 ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "max loop lag ms": max(lags, default=0.0) * 1000,
+    }
+
+
+def report(name: str, result: dict) -> None:
+    print(f"{name:<24}" + "  ".join(f"{key} {value:8.1f}" for key, value in result.items()))
+
+
+async def bench_in_process(args) -> None:
+    if args.workers:
+        os.environ["PASSWORD_HASH_WORKERS"] = str(args.workers)
+    if args.rounds:
+        os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    from app.core.config import settings
+    from app.core.security import _checkpw, _hashpw, password_hasher, verify_password_async
+
+    password = "correct horse battery staple"
+    hashed = _hashpw(password)
+    print(
+        f"bcrypt cost {settings.BCRYPT_ROUNDS}, {settings.PASSWORD_HASH_WORKERS} hashing threads, "
+        f"{args.concurrency} concurrent logins, {os.cpu_count()} CPUs"
+    )
+
+    async def inline():
+        assert _checkpw(password, hashed)
+
+    async def offloaded():
+        assert await verify_password_async(password, hashed)
+
+    report("inline bcrypt", await run(inline, args.concurrency, args.seconds))
+    report("hashing threads", await run(offloaded, args.concurrency, args.seconds))
+    print(password_hasher.stats())
+
+
+async def bench_http(args) -> None:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        async def login():
+            response = await client.post(
+                "/login/access-token", data={"username": args.email, "password": args.password}
+            )
+            response.raise_for_status()
+
+        report("HTTP login", await run(login, args.concurrency, args.seconds))
+
+
+def main():
+    args = parse_args()
+    if args.url:
+        if not args.email or not args.password:
+            sys.exit("--url needs --email and --password")
+        asyncio.run(bench_http(args))
+    else:
+        asyncio.run(bench_in_process(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for PDF text assembly.
+Builds a synthetic PDF, then times the old per-page `+=` loop against
+app.core.pdf_extraction.extract_text on the same open document.
+
+    python scripts/bench_pdf_extraction.py --pages 1000 --lines 60
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import fitz  # PyMuPDF
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.pdf_extraction import PdfExtraction, clean_text, extract_text
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark PDF text extraction")
+    parser.add_argument("--pages", type=int, default=1000, help="Pages in the synthetic PDF")
+    parser.add_argument("--lines", type=int, default=60, help="Text lines per page")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per variant, the best is reported")
+    return parser.parse_args()
+
+
+def build_pdf(pages: int, lines: int) -> bytes:
+    line = "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor."
+    with fitz.open() as doc:
+        for number in range(pages):
+            page = doc.new_page()
+            text = "\n".join(f"{number}:{i} {line}" for i in range(lines))
+            page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=6)
+        return doc.tobytes()
+
+
+def legacy_extract(doc: fitz.Document) -> str:
+    """The loop previously duplicated across the PDF endpoints."""
+    text_content = ""
+    for page in doc:
+        page_text = page.get_text()
+        cleaned_text = page_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
+        text_content += cleaned_text + "\n"
+    return text_content
+
+
+def legacy_assemble(raw_pages: list[str]) -> str:
+    text_content = ""
+    for page_text in raw_pages:
+        cleaned_text = page_text.replace('\x00', '').encode('utf-8', errors='ignore').decode('utf-8')
+        text_content += cleaned_text + "\n"
+    return text_content
+
+
+def assemble(raw_pages: list[str]) -> str:
+    return PdfExtraction(len(raw_pages), {}, [clean_text(page) for page in raw_pages]).text_content
+
+
+def best_of(repeat: int, func, *args) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    args = parse_args()
+    data = build_pdf(args.pages, args.lines)
+    print(f"Synthetic PDF: {args.pages} pages, {len(data) / 1e6:.1f} MB")
+
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        legacy = legacy_extract(doc)
+        assert legacy == extract_text(doc).text_content, "outputs differ"
+        print(f"Extracted text: {len(legacy) / 1e6:.1f} M characters")
+
+        results = {
+            "legacy +=": best_of(args.repeat, legacy_extract, doc),
+            "extract_text": best_of(args.repeat, extract_text, doc),
+            "extract_text (page 1 only)": best_of(args.repeat, extract_text, doc, 1),
+        }
+        # Assembly alone, without PyMuPDF's own get_text cost
+        raw_pages = [page.get_text() for page in doc]
+        assembly = {
+            "legacy assembly": best_of(args.repeat, legacy_assemble, raw_pages),
+            "clean + join": best_of(args.repeat, assemble, raw_pages),
+        }
+
+    report(results, "legacy +=")
+    report(assembly, "legacy assembly")
+
+
+def report(results: dict, baseline_name: str) -> None:
+    baseline = results[baseline_name]
+    for name, seconds in results.items():
+        print(f"{name:<28} {seconds * 1000:9.1f} ms  {baseline / seconds:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
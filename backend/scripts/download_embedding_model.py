@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Download the sentence-transformers model of EMBEDDING_MODEL into the local model cache.
+The API only loads cached models, run this at image build or deploy time:
+
+    python scripts/download_embedding_model.py
+    python scripts/download_embedding_model.py --model sentence-transformers/all-MiniLM-L6-v2
+
+Does nothing without the backend's embeddings extra (sentence-transformers).
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add the parent directory to the path so we can import app modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from app.core.config import settings  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Download the document embedding model")
+    parser.add_argument("--model", default=settings.EMBEDDING_MODEL, help="Model name, EMBEDDING_MODEL by default")
+    args = parser.parse_args()
+    if args.model == "hashing":
+        print("The hashing embedder needs no model")
+        return
+
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        print("sentence-transformers is not installed, semantic search stays disabled")
+        return
+
+    model = SentenceTransformer(args.model, device="cpu")
+    dimensions = model.get_sentence_embedding_dimension()
+    print(f"Cached {args.model} ({dimensions} dimensions)")
+    if dimensions != settings.EMBEDDING_DIMENSIONS:
+        print(f"Warning: EMBEDDING_DIMENSIONS is {settings.EMBEDDING_DIMENSIONS}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()